@@ -0,0 +1,34 @@
+"""
+Compares the bulk replacement engine of PlainTextFormatter with the original
+per-character engine over inputs of growing size.
+
+    python -m benchmarks.formatters
+"""
+
+from time import perf_counter
+
+from tests.test_formatters import reference_format
+from transclip.formatters import PlainTextFormatter
+
+SIZES = (10_000, 100_000, 1_000_000, 5_000_000)
+
+
+def measure(function, text: str) -> float:
+    start = perf_counter()
+    function(text)
+    return perf_counter() - start
+
+
+def main():
+    formatter = PlainTextFormatter()
+    with open("resources/other/license.txt", mode="r", encoding="utf-8") as license_file:
+        sample = license_file.read()
+    for size in SIZES:
+        text = (sample * (size // len(sample) + 1))[:size]
+        assert reference_format(text) == formatter.format(text)
+        old, new = measure(reference_format, text), measure(formatter.format, text)
+        print(f"{size:>9} chars: per-character {old * 1000:8.1f} ms, bulk {new * 1000:7.2f} ms, x{old / new:.0f}")
+
+
+if __name__ == "__main__":
+    main()
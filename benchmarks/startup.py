@@ -0,0 +1,72 @@
+"""
+Measures the time to the first paint of the main window with the network
+unavailable. Every run starts a new interpreter with the offscreen platform,
+an empty home folder and the requests pointed at an unreachable proxy.
+
+    python -m benchmarks.startup [runs]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from statistics import median
+from time import monotonic
+
+# Nothing listens on the discard port, so every request through the proxy fails at once
+UNREACHABLE_PROXY = "http://127.0.0.1:9"
+
+
+def child():
+    """Starts the program as main does and prints the clock when the window is painted for the first time"""
+    started = monotonic()
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+
+    from transclip.clipboard import clear
+    from transclip.util import load_style
+    from transclip.widgets import MainWindow
+
+    app = QApplication(sys.argv)
+    clear()
+    load_style(app.setStyleSheet)
+    window = MainWindow(app)
+    window.show()
+
+    def painted():
+        print(started, monotonic(), "deep_translator" in sys.modules, "requests" in sys.modules)
+        app.quit()
+
+    # the timer runs once the event loop has processed the pending events, the paint of the window included
+    QTimer.singleShot(0, painted)
+    app.exec()
+
+
+def run(home: str):
+    environment = dict(os.environ, HOME=home, QT_QPA_PLATFORM="offscreen", HTTP_PROXY=UNREACHABLE_PROXY,
+                       HTTPS_PROXY=UNREACHABLE_PROXY, http_proxy=UNREACHABLE_PROXY, https_proxy=UNREACHABLE_PROXY)
+    launched = monotonic()
+    output = subprocess.run([sys.executable, "-m", "benchmarks.startup", "--child"], env=environment,
+                            capture_output=True, text=True, check=True).stdout.split()
+    started, painted = float(output[-4]), float(output[-3])
+    return painted - launched, painted - started, output[-2] == "True", output[-1] == "True"
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as home:
+        # the first run creates the configuration database, the next ones find it like a usual start
+        first = run(home)
+        results = [run(home) for _ in range(runs)]
+    print(f"first start:   {first[0]:.3f} s from launch, {first[1]:.3f} s from the first import")
+    print(f"next starts:   {median(result[0] for result in results):.3f} s from launch, "
+          f"{median(result[1] for result in results):.3f} s from the first import (median of {runs})")
+    print(f"deep_translator imported before the paint: {any(result[2] for result in results)}, "
+          f"requests: {any(result[3] for result in results)}")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main()
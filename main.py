@@ -1,4 +1,5 @@
 import sys
+from threading import Thread
 
 import setproctitle as spt
 from PyQt5.QtWidgets import QApplication
@@ -7,17 +8,32 @@ from transclip.clipboard import clear
 from transclip.constant import PROGRAM_NAME
 from transclip.logger import logger
 from transclip.widgets import MainWindow
-from transclip.util import load_style
+from transclip.util import load_style, refresh_missing_resources, svg_loader
+
+
+def preload():
+    """
+        Reads the images while the window is built and imports the translation
+        modules while it is shown, the icons, the dialogs and the first
+        monitoring do not wait for the disk
+    """
+    try:
+        svg_loader.preload().join()
+        import transclip.pipeline
+    except Exception as ex:
+        logger.error(ex)
 
 
 def main():
     try:
         spt.setproctitle(PROGRAM_NAME)
         app = QApplication(sys.argv)
+        Thread(target=preload, name="preload", daemon=True).start()
         clear()
         load_style(app.setStyleSheet)
         window = MainWindow(app)
         window.show()
+        refresh_missing_resources()
         sys.exit(app.exec())
     except Exception as ex:
         logger.error(ex)
@@ -0,0 +1,80 @@
+"""
+Tests of the resource bundle: the files are only served when their digest
+matches the manifest, and the bundle shipped with the package is current.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from os.path import dirname, join
+from zipfile import ZipFile
+
+from transclip.bundle import BUNDLE_PATH, MANIFEST, ResourceBundle, build_bundle
+
+RESOURCES = join(dirname(__file__), "..", "resources")
+
+
+class ResourceBundleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.resources = join(self.folder.name, "resources")
+        self.path = join(self.folder.name, "bundle.zip")
+        for name, content in {"locales/en.json": b'{"A": "a"}', "styles/dark.qss": b"QWidget {}",
+                              "other/default.properties": b"key=value", "langid/en.txt": b"text"}.items():
+            os.makedirs(dirname(join(self.resources, name)), exist_ok=True)
+            with open(join(self.resources, name), mode="wb") as resource:
+                resource.write(content)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_serves_the_bundled_folders(self):
+        self.assertEqual(3, build_bundle(self.resources, self.path, version="1.0"))
+        bundle = ResourceBundle(self.path)
+        self.assertEqual("1.0", bundle.version)
+        self.assertEqual(b'{"A": "a"}', bundle.get("locales/en.json"))
+        self.assertEqual(["en.json"], bundle.names("locales"))
+        # the folders that are not bundled stay out
+        self.assertFalse(bundle.has("langid/en.txt"))
+        self.assertIsNone(bundle.get("missing"))
+
+    def test_rejects_the_files_whose_digest_does_not_match(self):
+        build_bundle(self.resources, self.path)
+        with ZipFile(self.path) as archive:
+            entries = {name: archive.read(name) for name in archive.namelist()}
+        entries["styles/dark.qss"] = b"QWidget { color: red; }"
+        with ZipFile(self.path, mode="w") as archive:
+            for name, content in entries.items():
+                archive.writestr(name, content)
+        bundle = ResourceBundle(self.path)
+        self.assertFalse(bundle.has("styles/dark.qss"))
+        self.assertTrue(bundle.has("locales/en.json"))
+
+    def test_missing_and_broken_bundles_are_empty(self):
+        self.assertEqual([], ResourceBundle(join(self.folder.name, "missing.zip")).names("locales"))
+        with open(self.path, mode="wb") as bundle_file:
+            bundle_file.write(b"not a zip")
+        bundle = ResourceBundle(self.path)
+        self.assertIsNone(bundle.version)
+        self.assertEqual([], bundle.names("locales"))
+
+    def test_build_is_reproducible(self):
+        build_bundle(self.resources, self.path)
+        with open(self.path, mode="rb") as bundle_file:
+            first = bundle_file.read()
+        build_bundle(self.resources, self.path)
+        with open(self.path, mode="rb") as bundle_file:
+            self.assertEqual(first, bundle_file.read())
+
+    def test_shipped_bundle_matches_the_resources(self):
+        build_bundle(RESOURCES, self.path)
+        with ZipFile(self.path) as built, ZipFile(BUNDLE_PATH) as shipped:
+            built_files = json.loads(built.read(MANIFEST))["files"]
+            shipped_files = json.loads(shipped.read(MANIFEST))["files"]
+        self.assertEqual(built_files, shipped_files, "rebuild it with: python -m transclip.bundle resources")
+
+
+if __name__ == "__main__":
+    unittest.main()
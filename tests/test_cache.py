@@ -0,0 +1,80 @@
+"""
+Tests of the translation cache: the hit and miss counters, the keys built
+from the normalized text and the least recently used eviction on disk.
+"""
+
+import os
+import tempfile
+import unittest
+from itertools import count
+from os.path import join
+from unittest import mock
+
+from transclip.cache import TranslationCache
+
+
+class TranslationCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.TemporaryDirectory()
+        self.environment = mock.patch.dict(os.environ, {"HOME": self.home.name})
+        self.environment.start()
+        # every use time is later than the previous one, whatever the resolution of the clock
+        self.clock = mock.patch("transclip.cache.time", side_effect=map(float, count(1)).__next__)
+        self.clock.start()
+
+    def tearDown(self):
+        self.clock.stop()
+        self.environment.stop()
+        self.home.cleanup()
+
+    def _open(self, capacity: int = 100, memory_capacity: int = 256) -> TranslationCache:
+        return TranslationCache("test.db", capacity=capacity, memory_capacity=memory_capacity)
+
+    def test_counters(self):
+        cache = self._open()
+        self.assertIsNone(cache.get("en", "es", "hello"))
+        cache.put("en", "es", "hello", "hola")
+        self.assertEqual("hola", cache.get("en", "es", "hello"))
+        self.assertIsNone(cache.get("en", "fr", "hello"))
+        self.assertEqual({"hits": 1, "misses": 2}, cache.stats())
+
+    def test_hits_from_disk(self):
+        self._open().put_many("en", "es", {"hello": "hola", "bye": "adiós"})
+        cache = self._open()
+        self.assertEqual("adiós", cache.get("en", "es", "bye"))
+        self.assertEqual({"hits": 1, "misses": 0}, cache.stats())
+
+    def test_normalized_keys(self):
+        cache = self._open()
+        cache.put("en", "es", "  café\n", "café")
+        self.assertEqual("café", cache.get("en", "es", "café"))
+
+    def test_evicts_the_least_recently_used(self):
+        cache = self._open(capacity=3, memory_capacity=0)
+        cache.put_many("en", "es", {"one": "uno", "two": "dos", "three": "tres"})
+        self.assertEqual("uno", cache.get("en", "es", "one"))
+        cache.put("en", "es", "four", "cuatro")
+        self.assertIsNone(cache.get("en", "es", "two"))
+        self.assertEqual(["uno", "tres", "cuatro"], [cache.get("en", "es", text) for text in ("one", "three", "four")])
+
+    def test_memory_hits_keep_the_entry_on_disk(self):
+        cache = self._open(capacity=3)
+        cache.put("en", "es", "kept", "guardado")
+        for index in range(10):
+            self.assertEqual("guardado", cache.get("en", "es", "kept"))
+            cache.put("en", "es", f"text {index}", f"texto {index}")
+        cache.flush()
+        # a new instance starts with an empty memory, the entry is read from disk
+        self.assertEqual("guardado", self._open().get("en", "es", "kept"))
+
+    def test_clear(self):
+        cache = self._open()
+        cache.put("en", "es", "hello", "hola")
+        cache.clear()
+        self.assertIsNone(cache.get("en", "es", "hello"))
+        self.assertIsNone(self._open().get("en", "es", "hello"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Tests of the configuration database: the migration of the databases that
+repeat a key, the upsert of the saved values and the rejection of the
+values that do not parse.
+"""
+
+import os
+import sqlite3 as sql
+import tempfile
+import unittest
+from os.path import join
+from unittest import mock
+
+from transclip.config import Configuration
+
+
+class ConfigurationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.TemporaryDirectory()
+        # the database lives in the .tcpl folder of the home directory
+        self.environment = mock.patch.dict(os.environ, {"HOME": self.home.name})
+        self.environment.start()
+        self.path = join(self.home.name, ".tcpl", "test.db")
+        self.configurations = []
+
+    def tearDown(self):
+        for configuration in self.configurations:
+            configuration.close()
+        self.environment.stop()
+        self.home.cleanup()
+
+    def _open(self) -> Configuration:
+        configuration = Configuration("test.db")
+        self.configurations.append(configuration)
+        return configuration
+
+    def _rows(self, key: str):
+        with sql.connect(self.path) as connection:
+            return [row[0] for row in connection.execute('SELECT value FROM "config" WHERE key=?', (key,))]
+
+    def test_creates_the_defaults(self):
+        configuration = self._open()
+        self.assertEqual(0.2, configuration.get_float("monitor.interval"))
+        self.assertEqual(["0.2"], self._rows("monitor.interval"))
+
+    def test_migrates_repeated_keys(self):
+        os.mkdir(join(self.home.name, ".tcpl"))
+        with sql.connect(self.path) as connection:
+            # the table of the first versions, without the unique index on the key
+            connection.execute('CREATE TABLE "config" ("id" INTEGER NOT NULL, "key" TEXT NOT NULL, '
+                               '"value" TEXT NOT NULL, PRIMARY KEY("id" AUTOINCREMENT))')
+            connection.executemany('INSERT INTO "config" (key, value) VALUES (?, ?)',
+                                   [("monitor.interval", "1.0"), ("translator.target", "french"),
+                                    ("monitor.interval", "0.5")])
+        configuration = self._open()
+        self.assertEqual(0.5, configuration.get_float("monitor.interval"))
+        self.assertEqual(["0.5"], self._rows("monitor.interval"))
+        self.assertEqual("french", configuration.get("translator.target"))
+        # the keys introduced later are registered with their default value
+        self.assertEqual(["0.3"], self._rows("monitor.coalesce"))
+        with sql.connect(self.path) as connection:
+            with self.assertRaises(sql.IntegrityError):
+                connection.execute('INSERT INTO "config" (key, value) VALUES (?, ?)', ("monitor.interval", "2"))
+
+    def test_save_upserts(self):
+        configuration = self._open()
+        notified = []
+        configuration.subscribe("monitor.interval", notified.append)
+        configuration.add_to_save("monitor.interval", "0.7")
+        configuration.add_to_save("translator.target", configuration.get("translator.target"))
+        self.assertFalse(configuration.save())
+        self.assertEqual(["0.7"], self._rows("monitor.interval"))
+        self.assertEqual([0.7], notified)
+        configuration.close()
+        self.assertEqual(0.7, self._open().get_float("monitor.interval"))
+
+    def test_save_rejects_invalid_values(self):
+        configuration = self._open()
+        notified = []
+        configuration.subscribe("monitor.coalesce", notified.append)
+        configuration.subscribe("monitor.interval", notified.append)
+        configuration.add_to_save("monitor.coalesce", "0,3")
+        configuration.add_to_save("monitor.interval", "0.4")
+        self.assertTrue(configuration.save())
+        self.assertEqual(["0.3"], self._rows("monitor.coalesce"))
+        self.assertEqual(0.3, configuration.get_float("monitor.coalesce"))
+        self.assertEqual(["0.4"], self._rows("monitor.interval"))
+        self.assertEqual([0.4], notified)
+
+    def test_set_rejects_invalid_values(self):
+        configuration = self._open()
+        notified = []
+        configuration.subscribe("monitor.coalesce", notified.append)
+        self.assertTrue(configuration.set("monitor.coalesce", "abc"))
+        self.assertEqual(0.3, configuration.get_float("monitor.coalesce"))
+        self.assertFalse(configuration.set("monitor.coalesce", "0.1"))
+        self.assertEqual([0.1], notified)
+        # set only changes the value in memory
+        self.assertEqual(["0.3"], self._rows("monitor.coalesce"))
+
+
+if __name__ == "__main__":
+    unittest.main()
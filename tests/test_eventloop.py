@@ -0,0 +1,120 @@
+"""
+Tests of the bridge that runs the asyncio loop inside the Qt event loop: the
+coroutines run in the thread of Qt, the loop is woken up by its timers, its
+sockets and the work handed from other threads, and it stays idle otherwise.
+"""
+
+import asyncio
+import threading
+import unittest
+from time import monotonic, sleep
+from unittest import mock
+
+from PyQt5.QtCore import QCoreApplication, QEventLoop, QTimer
+
+from transclip.eventloop import QtLoopBridge, QtSelector
+
+
+class QtLoopBridgeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.application = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.bridge = QtLoopBridge()
+        self.loop = self.bridge.loop
+
+    def tearDown(self):
+        self.bridge.close()
+        asyncio.set_event_loop(None)
+
+    def run_qt(self, future=None, timeout: float = 5.0):
+        """Runs the Qt event loop until the future is done or the timeout expires"""
+        qt_loop = QEventLoop()
+        if future is not None:
+            future.add_done_callback(lambda _: qt_loop.quit())
+        QTimer.singleShot(int(timeout * 1000), qt_loop.quit)
+        qt_loop.exec_()
+        return future.result() if future is not None else None
+
+    def test_coroutines_run_in_the_qt_thread(self):
+        ticks = []
+        timer = QTimer()
+        timer.timeout.connect(lambda: ticks.append(monotonic()))
+        timer.start(10)
+
+        async def work():
+            started = monotonic()
+            await asyncio.sleep(0.1)
+            slept = monotonic() - started
+            worker = await self.loop.run_in_executor(None, lambda: (sleep(0.05), threading.current_thread())[1])
+            return slept, worker, threading.current_thread()
+
+        task = self.loop.create_task(work())
+        self.bridge.wake()
+        slept, worker, thread = self.run_qt(task)
+        timer.stop()
+        self.assertGreaterEqual(slept, 0.1)
+        self.assertIs(threading.main_thread(), thread)
+        self.assertIsNot(thread, worker)
+        # the Qt timers fired while the coroutine waited
+        self.assertGreater(len(ticks), 5)
+
+    def test_sockets_wake_the_loop(self):
+        async def echo():
+            async def handle(reader, writer):
+                writer.write((await reader.readline()).upper())
+                await writer.drain()
+                writer.close()
+
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+            writer.write(b"hello\n")
+            answer = await reader.readline()
+            writer.close()
+            server.close()
+            return answer
+
+        task = self.loop.create_task(echo())
+        self.bridge.wake()
+        self.assertEqual(b"HELLO\n", self.run_qt(task))
+
+    def test_work_handed_from_qt_and_from_threads(self):
+        queue = asyncio.Queue()
+        received = []
+
+        async def consume():
+            while len(received) < 2:
+                received.append(await queue.get())
+
+        task = self.loop.create_task(consume())
+        self.bridge.wake()
+        self.run_qt(timeout=0.05)
+        # from a Qt slot, in the same thread
+        QTimer.singleShot(10, lambda: (queue.put_nowait("slot"), self.bridge.wake()))
+        threading.Timer(0.1, lambda: self.loop.call_soon_threadsafe(queue.put_nowait, "thread")).start()
+        self.run_qt(task)
+        self.assertEqual(["slot", "thread"], received)
+
+    def test_idle_loop_does_not_run(self):
+        calls = []
+        select = QtSelector.select
+
+        def counted(selector, timeout=None):
+            calls.append(timeout)
+            return select(selector, timeout)
+
+        with mock.patch.object(QtSelector, "select", counted):
+            event = asyncio.Event()
+            task = self.loop.create_task(event.wait())
+            self.bridge.wake()
+            self.run_qt(timeout=0.3)
+            self.assertLess(len(calls), 5)
+            QTimer.singleShot(10, lambda: (event.set(), self.bridge.wake()))
+            self.run_qt(task)
+            self.assertTrue(task.done())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Tests of the translation executor: only the newest job delivers its result
+and the replaced jobs are cancelled, running or pending.
+"""
+
+import unittest
+from threading import Event
+from time import sleep
+
+from transclip.executor import TranslationExecutor, current_job
+
+TIMEOUT = 5
+
+
+class TranslationExecutorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = TranslationExecutor(workers=1)
+        self.results = []
+        self.delivered = Event()
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def callback(self, job, result):
+        self.results.append((job.text, result))
+        self.delivered.set()
+
+    def test_delivers_the_result(self):
+        job = self.executor.submit("text", str.upper, self.callback)
+        self.assertTrue(self.delivered.wait(TIMEOUT))
+        self.assertEqual([("text", "TEXT")], self.results)
+        self.assertTrue(job.is_done())
+        self.assertFalse(job.is_cancelled())
+
+    def test_newer_job_cancels_the_running_one(self):
+        started, release = Event(), Event()
+
+        def blocking(text):
+            started.set()
+            release.wait(TIMEOUT)
+            return text
+
+        old = self.executor.submit("old", blocking, self.callback)
+        self.assertTrue(started.wait(TIMEOUT))
+        new = self.executor.submit("new", str.upper, self.callback)
+        self.assertTrue(old.is_cancelled())
+        release.set()
+        self.assertTrue(self.delivered.wait(TIMEOUT))
+        self.assertTrue(self._wait_done(new))
+        self.assertTrue(self._wait_done(old))
+        self.assertEqual([("new", "NEW")], self.results)
+
+    def test_pending_job_never_runs(self):
+        started, release = Event(), Event()
+        calls = []
+
+        def blocking(text):
+            started.set()
+            release.wait(TIMEOUT)
+            return text
+
+        def recorded(text):
+            calls.append(text)
+            return text
+
+        self.executor.submit("first", blocking, self.callback)
+        self.assertTrue(started.wait(TIMEOUT))
+        pending = self.executor.submit("pending", recorded, self.callback)
+        last = self.executor.submit("last", recorded, self.callback)
+        self.assertTrue(pending.is_cancelled())
+        release.set()
+        self.assertTrue(self.delivered.wait(TIMEOUT))
+        self.assertTrue(self._wait_done(last))
+        self.assertEqual(["last"], calls)
+        self.assertEqual([("last", "last")], self.results)
+
+    def test_cancel_all(self):
+        started, release = Event(), Event()
+
+        def blocking(text):
+            started.set()
+            release.wait(TIMEOUT)
+            return text
+
+        job = self.executor.submit("text", blocking, self.callback)
+        self.assertTrue(started.wait(TIMEOUT))
+        self.executor.cancel_all()
+        self.assertTrue(job.is_cancelled())
+        self.assertFalse(self.executor.is_latest(job))
+        release.set()
+        self.assertTrue(self._wait_done(job))
+        self.assertEqual([], self.results)
+
+    def test_current_job_is_visible(self):
+        seen = []
+        job = self.executor.submit("text", lambda text: seen.append(current_job.get()), self.callback)
+        self.assertTrue(self.delivered.wait(TIMEOUT))
+        self.assertEqual([job], seen)
+        self.assertIsNone(current_job.get())
+
+    def test_failure_does_not_stop_the_executor(self):
+        def failing(text):
+            raise RuntimeError(text)
+
+        failed = self.executor.submit("broken", failing, self.callback)
+        self.assertTrue(self._wait_done(failed))
+        self.executor.submit("text", str.upper, self.callback)
+        self.assertTrue(self.delivered.wait(TIMEOUT))
+        self.assertEqual([("text", "TEXT")], self.results)
+
+    @staticmethod
+    def _wait_done(job) -> bool:
+        for _ in range(TIMEOUT * 100):
+            if job.is_done():
+                return True
+            sleep(0.01)
+        return False
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Differential tests of the formatters: the bulk replacement engine of
+PlainTextFormatter must give byte for byte the output of the per-character
+engine it replaced, which is kept here as the oracle. The sniffing of the
+payloads is checked against prose and code samples.
+"""
+
+import random
+import unittest
+
+from transclip.formatters import CODE_CONTENT, PROSE_CONTENT, PlainTextFormatter, sniff_content
+
+
+def reference_format(text: str) -> str:
+    """The original per-character engine of PlainTextFormatter.format"""
+    text_fixed: str = text.replace('\r', '')
+    text_length: int = len(text_fixed)
+    character_string_counter: int = 0
+    character_string_buffer: list = []
+    while character_string_counter < text_length:
+        current_character = text_fixed[character_string_counter]
+        if current_character == '-':
+            try:
+                if text_fixed[character_string_counter + 1] == '\n':
+                    character_string_buffer.append('')
+                else:
+                    character_string_buffer.append(current_character)
+            except IndexError:
+                character_string_buffer.append(current_character)
+        elif current_character == '\n':
+            try:
+                if text_fixed[character_string_counter - 1] == '.':
+                    character_string_buffer.append('\n\n')
+                elif text_fixed[character_string_counter - 1] == '-':
+                    character_string_buffer.append('')
+                else:
+                    character_string_buffer.append(' ')
+            except IndexError:
+                character_string_buffer.append(current_character)
+        else:
+            character_string_buffer.append(current_character)
+        character_string_counter += 1
+    return "".join(character_string_buffer)
+
+
+# Pieces the random inputs are built from, weighted towards the characters the engine treats specially
+ALPHABET = ["\x00", "\x01", "-", "\n", ".", "\r", "a", "b", " ", "é", "-\n", ".\n", "\r\n"]
+
+EDGE_CASES = ["", "\n", "\r", "-", ".", " \n", "\n.", "\n-", "-\n", ".\n", "\n\n", "\r\n\r\n", "a-\nb", "end.\nnext",
+              "x-\r\ny", "\x00", "\x01", "\x00\n", "a\x01.\nb", "-\x00-\n", "\n\x01.", "text ending in -",
+              "text ending in.\n", "\nstarts with a break.", "\nstarts with a break-"]
+
+
+def random_texts(seed: int, count: int, size: int = 25):
+    generator = random.Random(seed)
+    for _ in range(count):
+        yield "".join(generator.choice(ALPHABET) for _ in range(generator.randint(0, size)))
+
+
+def random_cuts(generator: random.Random, text: str):
+    cuts = sorted(generator.sample(range(len(text) + 1), min(len(text) + 1, generator.randint(0, 6))))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+class PlainTextFormatterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.formatter = PlainTextFormatter()
+
+    def test_edge_cases(self):
+        for text in EDGE_CASES:
+            self.assertEqual(reference_format(text), self.formatter.format(text), repr(text))
+
+    def test_random_inputs(self):
+        for text in random_texts(seed=7, count=20000):
+            self.assertEqual(reference_format(text), self.formatter.format(text), repr(text))
+
+    def test_long_inputs(self):
+        for text in random_texts(seed=11, count=200, size=2000):
+            self.assertEqual(reference_format(text), self.formatter.format(text))
+
+    def test_format_stream(self):
+        generator = random.Random(9)
+        for text in list(EDGE_CASES) + list(random_texts(seed=13, count=10000)):
+            fixed = text.replace('\r', '')
+            if fixed[:1] == '\n' and fixed[-1:] in ('.', '-'):
+                # a leading line break depends on the end of the text, which a stream does not know yet
+                self.assertEqual(" ", "".join(self.formatter.format_stream([text]))[:1])
+                continue
+            chunks = random_cuts(generator, text)
+            self.assertEqual(reference_format(text), "".join(self.formatter.format_stream(chunks)), repr(chunks))
+
+
+class SniffContentTest(unittest.TestCase):
+
+    def test_prose_with_symbols(self):
+        for text in ("Please call me (at home) tomorrow; thanks!",
+                     "Results (n = 40) were significant (p < 0.05).",
+                     "The function f(x) is defined (see the appendix) for every x; it grows fast.",
+                     "Milk, eggs (a dozen), bread; and [optionally] some cheese."):
+            self.assertEqual(PROSE_CONTENT, sniff_content(text), text)
+
+    def test_prose_lines_ending_in_commas(self):
+        for text in ("Dear John,\nthanks for the letter,\nI will write soon,\nyours,\nAnna",
+                     "The steps are as follows:\nfirst, open the box,\nthen, take the book,\nfinally, read it."):
+            self.assertEqual(PROSE_CONTENT, sniff_content(text), text)
+
+    def test_code(self):
+        for text in ("x = f(y);",
+                     "if (a == b && c != d) return;",
+                     "def foo(x):\n    if x:\n        return bar(x)\n    return None",
+                     "for (int i = 0; i < n; i++) {\n    total += values[i];\n}",
+                     "<div class=\"box\">\n  <p>Hello</p>\n</div>",
+                     "items = [\n    1,\n    2,\n    3,\n]",
+                     "SELECT name, age\nFROM people\nWHERE age >= 18;"):
+            self.assertEqual(CODE_CONTENT, sniff_content(text), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Tests of the clipboard history: the retention of the newest entries, the
+batched writes of the background thread and the prefix search of the
+full-text index.
+"""
+
+import os
+import sqlite3 as sql
+import tempfile
+import unittest
+from unittest import mock
+
+from transclip.history import ClipboardHistory
+
+
+class ClipboardHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.TemporaryDirectory()
+        self.environment = mock.patch.dict(os.environ, {"HOME": self.home.name})
+        self.environment.start()
+        self.histories = []
+
+    def tearDown(self):
+        for history in self.histories:
+            history.close()
+        self.environment.stop()
+        self.home.cleanup()
+
+    def _open(self, capacity: int = 100) -> ClipboardHistory:
+        history = ClipboardHistory("test.db", capacity=capacity)
+        self.histories.append(history)
+        return history
+
+    def test_keeps_the_newest_entries(self):
+        history = self._open(capacity=5)
+        for index in range(12):
+            history.add(f"text {index}", f"texto {index}", "en", "es")
+        history.flush()
+        self.assertEqual(5, history.count())
+        self.assertEqual([f"text {index}" for index in range(11, 6, -1)], [entry[1] for entry in history.search()])
+        # the removed entries leave the index too
+        self.assertEqual(["text 7"], [entry[1] for entry in history.search("7")])
+
+    def test_writes_in_batches(self):
+        connect = sql.connect
+        statements = []
+
+        def traced(*args, **kwargs):
+            connection = connect(*args, **kwargs)
+            connection.set_trace_callback(statements.append)
+            return connection
+
+        with mock.patch("transclip.history.sql.connect", side_effect=traced):
+            history = self._open(capacity=1000)
+        for index in range(500):
+            history.add(f"text {index}", f"texto {index}", "en", "es")
+        history.flush()
+        self.assertEqual(500, history.count())
+        self.assertLess(statements.count("COMMIT"), 10)
+
+    def test_entries_survive_a_restart(self):
+        history = self._open()
+        history.add("hello", "hola", "en", "es")
+        history.close()
+        entries = self._open().search()
+        self.assertEqual([("hello", "hola", "en", "es")], [entry[1:5] for entry in entries])
+
+    def test_prefix_search(self):
+        history = self._open()
+        history.add("Hello world", "Hola mundo", "en", "es")
+        history.add("The coffee shop", "La cafetería", "en", "es")
+        history.add("World news", "Noticias del mundo", "en", "es")
+        history.flush()
+        self.assertEqual(["World news", "Hello world"], [entry[1] for entry in history.search("wor")])
+        # the translation is indexed as well, and every word of the search must match
+        self.assertEqual(["Hello world"], [entry[1] for entry in history.search("mun hol")])
+        # the diacritics are ignored
+        self.assertEqual(["The coffee shop"], [entry[1] for entry in history.search("cafeteria")])
+        self.assertEqual([], history.search("missing"))
+        self.assertEqual(1, len(history.search("", limit=1)))
+
+    def test_search_ignores_the_syntax_of_the_index(self):
+        history = self._open()
+        history.add("a AND b", "a y b", "en", "es")
+        history.flush()
+        self.assertEqual(["a AND b"], [entry[1] for entry in history.search('"AND" (b*')])
+
+    def test_clear(self):
+        history = self._open()
+        history.add("hello", "hola", "en", "es")
+        history.clear()
+        self.assertEqual(0, history.count())
+        self.assertEqual([], history.search("hello"))
+
+
+if __name__ == "__main__":
+    unittest.main()
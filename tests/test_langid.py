@@ -0,0 +1,81 @@
+"""
+Tests of the local language identification used to skip the texts already
+written in the target language.
+"""
+
+import unittest
+from os.path import dirname, join
+from threading import Thread
+
+from transclip.langid import DETECTED_SIZE, SAMPLE_SIZE, LanguageIdentifier, ngram_profile
+
+PROFILES = join(dirname(__file__), "..", "resources", "langid")
+
+SAMPLES = {
+    "en": "The weather was cold this morning, so we stayed at home and read the newspaper together.",
+    "es": "El tiempo estaba frío esta mañana, así que nos quedamos en casa leyendo el periódico juntos.",
+    "fr": "Il faisait froid ce matin, alors nous sommes restés à la maison pour lire le journal ensemble.",
+    "de": "Heute Morgen war es kalt, deshalb sind wir zu Hause geblieben und haben zusammen Zeitung gelesen.",
+    "it": "Stamattina faceva freddo, quindi siamo rimasti a casa a leggere il giornale insieme.",
+    "pt": "Esta manhã estava frio, então ficamos em casa lendo o jornal juntos.",
+}
+
+
+class LanguageIdentifierTest(unittest.TestCase):
+
+    def setUp(self):
+        self.identifier = LanguageIdentifier(PROFILES)
+
+    def test_identifies_the_samples(self):
+        for code, text in SAMPLES.items():
+            self.assertEqual(code, self.identifier.detect(text), text)
+
+    def test_short_texts_are_not_identified(self):
+        self.assertIsNone(self.identifier.detect("ok"))
+        self.assertIsNone(self.identifier.detect("12345 67890 !!"))
+
+    def test_only_the_sample_is_identified(self):
+        text = SAMPLES["es"] * (SAMPLE_SIZE // len(SAMPLES["es"]) + 1)
+        self.assertEqual("es", self.identifier.detect(text + SAMPLES["en"] * 100))
+
+    def test_memo_is_bounded(self):
+        calls = []
+        identify = self.identifier._identify
+        self.identifier._identify = lambda text: calls.append(text) or identify(text)
+        self.identifier.detect(SAMPLES["en"])
+        self.identifier.detect(SAMPLES["en"])
+        self.assertEqual(1, len(calls))
+        for index in range(DETECTED_SIZE + 1):
+            self.identifier.detect(f"{SAMPLES['fr']} {index}")
+        self.identifier.detect(SAMPLES["en"])
+        self.assertEqual(DETECTED_SIZE + 3, len(calls))
+
+    def test_concurrent_detection(self):
+        errors = []
+
+        def detect(offset: int):
+            try:
+                for index in range(2000):
+                    self.identifier.detect(f"{SAMPLES['de']} {(index + offset) % (DETECTED_SIZE * 2)}")
+            except Exception as ex:
+                errors.append(ex)
+
+        threads = [Thread(target=detect, args=(offset,)) for offset in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+
+    def test_missing_profiles(self):
+        self.assertIsNone(LanguageIdentifier(join(PROFILES, "missing")).detect(SAMPLES["en"]))
+
+    def test_profile_is_normalized(self):
+        profile = ngram_profile("hello world")
+        self.assertAlmostEqual(1.0, sum(weight * weight for weight in profile.values()))
+        self.assertIn(" h", profile)
+        self.assertEqual({}, ngram_profile("123 !!"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests of the offline translator: the longest phrase replacement, the case
+of the replaced words and the phrase tables read from disk.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from os.path import join
+from unittest import mock
+
+from transclip.translation import LocalTranslator, load_phrase_table
+
+TABLE = {
+    "good": "bueno",
+    "morning": "mañana",
+    "good morning": "buenos días",
+    "thank you very much": "muchas gracias",
+    "the": "el",
+    "cat": "gato",
+}
+
+
+class LocalTranslatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.translator = LocalTranslator("en", "es", table=TABLE)
+
+    def test_whole_text(self):
+        self.assertEqual("muchas gracias", self.translator.translate("  thank   you very much\n"))
+
+    def test_longest_phrase_wins(self):
+        self.assertEqual("buenos días, el gato", self.translator.translate("good morning, the cat"))
+        self.assertEqual("bueno gato", self.translator.translate("good cat"))
+
+    def test_unknown_words_are_kept(self):
+        self.assertEqual("el dog is bueno!", self.translator.translate("the dog is good!"))
+
+    def test_keeps_the_whitespace_between_words(self):
+        self.assertEqual("el\tgato\n\nbueno", self.translator.translate("the\tcat\n\ngood"))
+
+    def test_phrases_across_lines(self):
+        self.assertEqual("buenos días", self.translator.translate("good\nmorning"))
+
+    def test_case_of_the_first_letter(self):
+        self.assertEqual("Buenos días. El gato", self.translator.translate("Good morning. The cat"))
+        self.assertEqual("Muchas gracias", self.translator.translate("Thank you very much"))
+
+    def test_table_keys_are_normalized(self):
+        translator = LocalTranslator("en", "es", table={"  Good   Night ": "buenas noches"})
+        self.assertEqual("buenas noches!", translator.translate("good night!"))
+
+    def test_empty_table(self):
+        translator = LocalTranslator("en", "es", table={})
+        self.assertEqual("hello world", translator.translate("hello world"))
+
+
+class PhraseTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.TemporaryDirectory()
+        self.resources = tempfile.TemporaryDirectory()
+        self.environment = mock.patch.dict(os.environ, {"HOME": self.home.name})
+        self.environment.start()
+        self.resources_path = mock.patch("transclip.translation.resources_path", return_value=self.resources.name)
+        self.resources_path.start()
+
+    def tearDown(self):
+        self.resources_path.stop()
+        self.environment.stop()
+        self.resources.cleanup()
+        self.home.cleanup()
+
+    def _write(self, folder: str, table: dict) -> None:
+        os.makedirs(join(folder, "phrases"), exist_ok=True)
+        with open(join(folder, "phrases", "en-es.json"), mode="w", encoding="utf-8") as phrases:
+            json.dump(table, phrases)
+
+    def test_working_directory_takes_precedence(self):
+        self._write(self.resources.name, {"cat": "gato", "dog": "perro"})
+        self._write(join(self.home.name, ".tcpl"), {"dog": "can"})
+        self.assertEqual({"cat": "gato", "dog": "can"}, load_phrase_table("en", "es"))
+        self.assertEqual("gato can", LocalTranslator("en", "es").translate("cat dog"))
+
+    def test_missing_and_broken_tables(self):
+        self.assertEqual({}, load_phrase_table("en", "fr"))
+        os.makedirs(join(self.resources.name, "phrases"))
+        with open(join(self.resources.name, "phrases", "en-es.json"), mode="w", encoding="utf-8") as phrases:
+            phrases.write("{broken")
+        self.assertEqual({}, load_phrase_table("en", "es"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Tests of the string tables of the interface texts: the ids shared by every
+language, the fallback to the reference texts and the switch of language.
+"""
+
+import unittest
+from unittest import mock
+
+from transclip.util import LocaleUtil, StringTable
+
+ENGLISH = {"OPEN": "Open", "CLOSE": "Close", "SAVE": "Save"}
+SPANISH = {"OPEN": "Abrir", "CLOSE": "Cerrar", "EXTRA": "Extra"}
+DOCUMENTS = {
+    "locales/index.json": {"English": "en.json", "Spanish": "es.json", "Broken": "missing.json"},
+    "locales/en.json": ENGLISH,
+    "locales/es.json": SPANISH,
+}
+
+
+class StringTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.reference = StringTable(ENGLISH)
+        self.table = StringTable(SPANISH, self.reference)
+
+    def test_texts_of_the_reference(self):
+        self.assertEqual("Save", self.reference.text("SAVE"))
+        self.assertIsNone(self.reference.text("MISSING"))
+
+    def test_missing_keys_keep_the_reference_text(self):
+        self.assertEqual("Abrir", self.table.text("OPEN"))
+        self.assertEqual("Save", self.table.text("SAVE"))
+        self.assertIsNone(self.table.text("MISSING"))
+
+    def test_ids_are_shared_with_the_reference(self):
+        for key in ENGLISH:
+            self.assertEqual(self.reference.ids[key], self.table.ids[key])
+        # the keys only found in a translation are added after the reference ones
+        self.assertEqual(len(ENGLISH), self.table.ids["EXTRA"])
+        self.assertEqual("Extra", self.table.text("EXTRA"))
+        self.assertEqual(len(ENGLISH), len(self.reference.messages))
+
+    def test_reference_is_not_modified(self):
+        self.assertEqual("Open", self.reference.text("OPEN"))
+        self.assertNotIn("EXTRA", self.reference.ids)
+
+
+class LocaleUtilTest(unittest.TestCase):
+
+    def setUp(self):
+        self.resource_cache = mock.patch("transclip.util.resource_cache")
+        self.resource_cache.start().json.side_effect = lambda name, default=None: DOCUMENTS.get(name, default)
+        self.config = mock.patch("transclip.util.config")
+        self.config.start().get.return_value = "Spanish"
+        self.locale = LocaleUtil()
+
+    def tearDown(self):
+        self.config.stop()
+        self.resource_cache.stop()
+
+    def test_loads_the_configured_language(self):
+        self.assertEqual("Abrir", self.locale.value("OPEN"))
+        self.assertEqual("Save", self.locale.value("SAVE"))
+        self.assertEqual("unknown", self.locale.value("MISSING"))
+
+    def test_switch_notifies_and_keeps_the_ids(self):
+        notified = []
+        self.locale.subscribe(lambda: notified.append(self.locale.value("OPEN")))
+        message_id = self.locale.message_id("CLOSE")
+        self.assertEqual("Cerrar", self.locale.message(message_id))
+        self.locale.switch("English")
+        self.assertEqual(["Open"], notified)
+        self.assertEqual("Close", self.locale.message(message_id))
+        self.assertEqual("unknown", self.locale.message(-1))
+
+    def test_unknown_and_missing_languages_fall_back_to_the_reference(self):
+        for name in ("Unknown", "Broken"):
+            self.locale.switch(name)
+            self.assertEqual("Open", self.locale.value("OPEN"))
+
+    def test_labels_follow_the_language(self):
+        self.assertEqual("Abrir: 1", self.locale.label("OPEN", 1))
+        self.assertEqual("Abrir: 1.0", self.locale.label("OPEN", 1.0))
+        self.locale.switch("English")
+        self.assertEqual("Open: 1", self.locale.label("OPEN", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
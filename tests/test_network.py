@@ -0,0 +1,155 @@
+"""
+Tests of the non-blocking HTTP client against a local server: the bodies with
+a length, in chunks or compressed, the connections kept alive and the ones
+closed by the server.
+"""
+
+import asyncio
+import gzip
+import unittest
+from typing import List
+from urllib.parse import parse_qs, urlsplit
+
+from transclip.network import AsyncHttpClient
+
+
+class LocalServer:
+    """Answers every request with the response built by the test, recording the requests and connections"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests: List[str] = []
+        self.connections = 0
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                self.requests.append(head.decode("latin-1"))
+                response = self.respond(head.decode("latin-1").split(" ")[1])
+                if response is None:
+                    break
+                writer.write(response)
+                await writer.drain()
+                if b"Content-Length" not in response and b"chunked" not in response:
+                    # the body ends with the connection
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def response(body: bytes) -> bytes:
+    return f"HTTP/1.1 200 OK\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+
+
+class AsyncHttpClientTest(unittest.TestCase):
+
+    def run_with_server(self, respond, test):
+        async def run():
+            server = LocalServer(respond)
+            url = await server.start()
+            client = AsyncHttpClient(headers={"User-Agent": "test"}, proxies={})
+            try:
+                return await test(client, url, server)
+            finally:
+                client.close()
+                await server.stop()
+
+        return asyncio.run(run())
+
+    def test_query_and_headers(self):
+        async def test(client, url, server):
+            answer = await client.get(url + "/path?a=1", params={"q": "hola mundo"})
+            self.assertEqual(200, answer.status)
+            self.assertEqual("ok", answer.text)
+            target = urlsplit(server.requests[0].split(" ")[1])
+            self.assertEqual("/path", target.path)
+            self.assertEqual({"a": ["1"], "q": ["hola mundo"]}, parse_qs(target.query))
+            self.assertIn("User-Agent: test\r\n", server.requests[0])
+
+        self.run_with_server(lambda target: response(b"ok"), test)
+
+    def test_reuses_the_connection(self):
+        async def test(client, url, server):
+            for _ in range(3):
+                self.assertEqual("ok", (await client.get(url)).text)
+            self.assertEqual(1, server.connections)
+
+        self.run_with_server(lambda target: response(b"ok"), test)
+
+    def test_concurrent_requests(self):
+        async def test(client, url, server):
+            answers = await asyncio.gather(*(client.get(url, params={"n": str(index)}) for index in range(8)))
+            self.assertEqual([f"n={index}" for index in range(8)], [answer.text for answer in answers])
+            self.assertLessEqual(server.connections, client.max_connections)
+
+        self.run_with_server(lambda target: response(urlsplit(target).query.encode("ascii")), test)
+
+    def test_chunked_and_compressed_bodies(self):
+        body = gzip.compress("¿Qué tal?".encode("utf-8") * 100)
+        chunks = b"".join(f"{len(part):x}\r\n".encode("ascii") + part + b"\r\n"
+                          for part in (body[:10], body[10:])) + b"0\r\n\r\n"
+
+        def respond(target):
+            return (b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\nContent-Encoding: gzip\r\n"
+                    b"Content-Type: text/html; charset=utf-8\r\n\r\n" + chunks)
+
+        async def test(client, url, server):
+            self.assertEqual("¿Qué tal?" * 100, (await client.get(url)).text)
+            self.assertEqual("¿Qué tal?" * 100, (await client.get(url)).text)
+            self.assertEqual(1, server.connections)
+
+        self.run_with_server(respond, test)
+
+    def test_body_until_the_connection_closes(self):
+        async def test(client, url, server):
+            self.assertEqual("first", (await client.get(url)).text)
+            self.assertEqual("first", (await client.get(url)).text)
+            self.assertEqual(2, server.connections)
+
+        self.run_with_server(lambda target: b"HTTP/1.0 200 OK\r\n\r\nfirst", test)
+
+    def test_replaces_a_connection_closed_by_the_server(self):
+        answers = iter([response(b"one"), None, response(b"two")])
+
+        async def test(client, url, server):
+            self.assertEqual("one", (await client.get(url)).text)
+            # the server drops the idle connection as soon as the next request arrives
+            self.assertEqual("two", (await client.get(url)).text)
+            self.assertEqual(2, server.connections)
+
+        self.run_with_server(lambda target: next(answers), test)
+
+    def test_status_and_timeout(self):
+        async def test(client, url, server):
+            answer = await client.get(url + "/missing")
+            self.assertEqual(404, answer.status)
+            with self.assertRaises(asyncio.TimeoutError):
+                await client.get(url + "/slow", timeout=0.2)
+            # the connection of the request given up is not reused
+            self.assertEqual(200, (await client.get(url)).status)
+
+        def respond(target):
+            if target == "/missing":
+                return b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n"
+            if target == "/slow":
+                return b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\nhalf"
+            return response(b"ok")
+
+        self.run_with_server(respond, test)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Tests of the plain text translator with a stub backend, through the blocking
+path of the threaded pipeline and the coroutines of the async one: both
+send the same requests and rebuild the same text.
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from typing import List
+from unittest import mock
+
+from transclip.cache import TranslationCache
+from transclip.executor import TranslationJob, current_job, progress_listener
+from transclip.impl import AbstractTranslator
+from transclip.translation import PlainTextTranslator, TranslationCancelledException
+
+TEXT = ("First sentence. Second sentence!\n\nA new paragraph with more words in it.\n"
+        "Another line? The last one.")
+
+
+class StubTranslator(AbstractTranslator):
+    """Translates to uppercase, the async requests wait a little so several of them overlap"""
+
+    def __init__(self, merge_lines: bool = False, failures: int = 0):
+        super(StubTranslator, self).__init__()
+        self.merge_lines = merge_lines
+        self.failures = failures
+        self.requests: List[str] = []
+        self.threads = set()
+        self.active = 0
+        self.most_active = 0
+
+    def translate(self, text: str) -> str:
+        self.requests.append(text)
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("unavailable")
+        translated = text.upper()
+        return translated.replace("\n", " ") if self.merge_lines else translated
+
+    async def translate_async(self, text: str) -> str:
+        self.threads.add(threading.current_thread())
+        self.active += 1
+        self.most_active = max(self.most_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            return self.translate(text)
+        finally:
+            self.active -= 1
+
+
+class PlainTextTranslatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.TemporaryDirectory()
+        self.environment = mock.patch.dict(os.environ, {"HOME": self.home.name})
+        self.environment.start()
+
+    def tearDown(self):
+        self.environment.stop()
+        self.home.cleanup()
+
+    def _create(self, backend: StubTranslator, cache: bool = False, chunk_limit: int = 40) -> PlainTextTranslator:
+        translator = PlainTextTranslator("en", "es", backend=backend,
+                                         cache=TranslationCache("test.db") if cache else None)
+        translator.chunk_limit = chunk_limit
+        translator.retries = 1
+        return translator
+
+    def test_chunks_are_requested_at_the_same_time(self):
+        backend = StubTranslator()
+        translated = asyncio.run(self._create(backend).translate_async(TEXT))
+        self.assertEqual(TEXT.upper(), translated)
+        self.assertGreater(len(backend.requests), 1)
+        self.assertGreater(backend.most_active, 1)
+        self.assertEqual({threading.current_thread()}, backend.threads)
+        self.assertEqual(translated, self._create(StubTranslator()).translate(TEXT))
+
+    def test_only_the_missing_segments_are_requested(self):
+        self._create(StubTranslator(), cache=True).translate(TEXT)
+        backend = StubTranslator()
+        changed = TEXT.replace("The last one.", "A changed one.")
+        translated = asyncio.run(self._create(backend, cache=True).translate_async(changed))
+        self.assertEqual(changed.upper(), translated)
+        self.assertEqual(["A changed one."], backend.requests)
+
+    def test_groups_whose_lines_do_not_match(self):
+        text = "one\ntwo\nthree"
+        sync_backend, async_backend = StubTranslator(merge_lines=True), StubTranslator(merge_lines=True)
+        translated = self._create(sync_backend, cache=True, chunk_limit=4500).translate(text)
+        self.assertEqual("ONE TWO THREE", translated)
+        os.remove(os.path.join(self.home.name, ".tcpl", "test.db"))
+        self.assertEqual(translated, asyncio.run(self._create(async_backend, cache=True,
+                                                              chunk_limit=4500).translate_async(text)))
+        self.assertEqual(sync_backend.requests, async_backend.requests)
+
+    def test_progress_in_order(self):
+        parts = []
+
+        async def translate():
+            progress_listener.set(lambda complete, total, text: parts.append(text))
+            return await self._create(StubTranslator()).translate_async(TEXT)
+
+        translated = asyncio.run(translate())
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(translated, "".join(parts))
+
+    def test_retries_a_failed_request(self):
+        backend = StubTranslator(failures=1)
+        self.assertEqual("HELLO", asyncio.run(self._create(backend).translate_async("hello")))
+        self.assertEqual(["hello", "hello"], backend.requests)
+        with self.assertRaises(ConnectionError):
+            asyncio.run(self._create(StubTranslator(failures=2)).translate_async("hello"))
+
+    def test_cancelled_job(self):
+        job = TranslationJob(1, TEXT)
+        job.cancel()
+
+        async def translate():
+            current_job.set(job)
+            return await self._create(StubTranslator()).translate_async(TEXT)
+
+        with self.assertRaises(TranslationCancelledException):
+            asyncio.run(translate())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests of the adaptive token bucket placed in front of the online translators.
+"""
+
+import asyncio
+import unittest
+from threading import Event, Thread
+from time import monotonic, sleep
+
+from transclip.ratelimit import RateLimiter
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def test_burst_up_to_capacity(self):
+        limiter = RateLimiter(rate=0.5, capacity=3)
+        started = monotonic()
+        for _ in range(3):
+            self.assertTrue(limiter.acquire())
+        self.assertLess(monotonic() - started, 0.5)
+        tokens, rate = limiter.budget()
+        self.assertLess(tokens, 1)
+        self.assertEqual(0.5, rate)
+
+    def test_refill_at_the_rate(self):
+        limiter = RateLimiter(rate=10, capacity=1)
+        limiter.acquire()
+        started = monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(monotonic() - started, 0.05)
+
+    def test_throttle_halves_the_rate_and_pauses(self):
+        limiter = RateLimiter(rate=8, capacity=5, cooldown=0.2)
+        limiter.throttle()
+        self.assertEqual(4, limiter.budget()[1])
+        started = monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(monotonic() - started, 0.2)
+
+    def test_rate_bounds(self):
+        limiter = RateLimiter(rate=1, min_rate=0.3, increase=0.4, cooldown=0)
+        for _ in range(5):
+            limiter.throttle()
+        self.assertEqual(0.3, limiter.rate)
+        for _ in range(5):
+            limiter.succeed()
+        self.assertEqual(1, limiter.rate)
+
+    def test_cancelled_while_waiting(self):
+        limiter = RateLimiter(rate=0.1, capacity=1)
+        limiter.acquire()
+        cancelled = Event()
+        Thread(target=lambda: (sleep(0.05), cancelled.set()), daemon=True).start()
+        started = monotonic()
+        self.assertFalse(limiter.acquire(is_cancelled=cancelled.is_set))
+        self.assertLess(monotonic() - started, 1)
+        self.assertLess(limiter.budget()[0], 1)
+
+    def test_higher_priority_goes_first(self):
+        limiter = RateLimiter(rate=10, capacity=1)
+        limiter.acquire()
+        order = []
+        older = Thread(target=lambda: (limiter.acquire(priority=1), order.append(1)))
+        older.start()
+        sleep(0.02)
+        newer = Thread(target=lambda: (limiter.acquire(priority=2), order.append(2)))
+        newer.start()
+        older.join(2)
+        newer.join(2)
+        self.assertEqual([2, 1], order)
+
+    def test_acquire_as_a_coroutine(self):
+        limiter = RateLimiter(rate=10, capacity=1)
+        limiter.acquire()
+
+        async def acquire():
+            started = monotonic()
+            # the loop goes on while the request waits for its token
+            ticks = asyncio.ensure_future(asyncio.sleep(0.01))
+            self.assertTrue(await limiter.acquire_async())
+            self.assertTrue(ticks.done())
+            self.assertGreaterEqual(monotonic() - started, 0.05)
+            cancelled = Event()
+            asyncio.get_running_loop().call_later(0.05, cancelled.set)
+            self.assertFalse(await limiter.acquire_async(is_cancelled=cancelled.is_set))
+
+        asyncio.run(acquire())
+
+    def test_listener_receives_the_budget(self):
+        limiter = RateLimiter(rate=2, capacity=4)
+        reports = []
+        limiter.listener = lambda tokens, rate: reports.append((round(tokens), rate))
+        limiter.acquire()
+        limiter.throttle()
+        self.assertEqual((3, 2), reports[0])
+        self.assertEqual((0, 1), reports[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
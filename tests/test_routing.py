@@ -0,0 +1,161 @@
+"""
+Tests of the routing translator with stub providers whose latency and
+failures are controlled by the tests.
+"""
+
+import unittest
+from threading import Event, Lock
+from time import monotonic, sleep
+from typing import List
+
+from transclip.impl import AbstractTranslator
+from transclip.routing import Provider, ProviderStats, RoutingTranslator
+
+
+class StubTranslator(AbstractTranslator):
+    """Answers with its name after the given latency, or raises while failing is set"""
+
+    def __init__(self, name: str, latency: float = 0.0, failing: bool = False):
+        super(StubTranslator, self).__init__()
+        self.name = name
+        self.latency = latency
+        self.failing = failing
+        self.requests: List[str] = []
+        self.released = Event()
+        self.__lock = Lock()
+
+    def translate(self, text: str) -> str:
+        with self.__lock:
+            self.requests.append(text)
+        # a latency is cut short when the test releases the stub, so no thread outlives the test for long
+        self.released.wait(self.latency)
+        if self.failing:
+            raise RuntimeError(f"{self.name} failed")
+        return f"{self.name}:{text}"
+
+
+class RoutingTranslatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stubs: List[StubTranslator] = []
+        self.routers: List[RoutingTranslator] = []
+
+    def tearDown(self):
+        for stub in self.stubs:
+            stub.released.set()
+        for router in self.routers:
+            router.close()
+
+    def _router(self, *stubs: StubTranslator, hedge_delay: float = 0.1) -> RoutingTranslator:
+        self.stubs.extend(stubs)
+        router = RoutingTranslator([Provider(stub.name, stub) for stub in stubs], hedge_delay=hedge_delay)
+        self.routers.append(router)
+        return router
+
+    def test_fast_provider_is_not_hedged(self):
+        first, second = StubTranslator("first"), StubTranslator("second")
+        router = self._router(first, second, hedge_delay=0.5)
+        self.assertEqual("first:text", router.translate("text"))
+        self.assertEqual(["text"], first.requests)
+        self.assertEqual([], second.requests)
+
+    def test_hedges_after_delay(self):
+        slow, fast = StubTranslator("slow", latency=5.0), StubTranslator("fast")
+        router = self._router(slow, fast, hedge_delay=0.1)
+        started = monotonic()
+        self.assertEqual("fast:text", router.translate("text"))
+        elapsed = monotonic() - started
+        self.assertGreaterEqual(elapsed, 0.1)
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual(["text"], slow.requests)
+        self.assertEqual(["text"], fast.requests)
+
+    def test_first_answer_wins(self):
+        # the hedged request is slower than what is left of the first one, so the first provider answers
+        first, second = StubTranslator("first", latency=0.3), StubTranslator("second", latency=2.0)
+        router = self._router(first, second, hedge_delay=0.1)
+        self.assertEqual("first:text", router.translate("text"))
+        self.assertEqual(["text"], second.requests)
+
+    def test_failure_tries_next_provider(self):
+        broken, healthy = StubTranslator("broken", failing=True), StubTranslator("healthy")
+        router = self._router(broken, healthy, hedge_delay=5.0)
+        started = monotonic()
+        self.assertEqual("healthy:text", router.translate("text"))
+        # the next provider is tried as soon as the first one fails, without waiting for the hedge delay
+        self.assertLess(monotonic() - started, 2.0)
+
+    def test_every_provider_fails(self):
+        router = self._router(StubTranslator("one", failing=True), StubTranslator("two", failing=True))
+        with self.assertRaises(RuntimeError):
+            router.translate("text")
+
+    def test_cooldown_after_failure(self):
+        broken, healthy = StubTranslator("broken", failing=True), StubTranslator("healthy", latency=0.05)
+        router = self._router(broken, healthy)
+        router.translate("text")
+        self.assertFalse(router.stats["broken"].is_healthy())
+        self.assertEqual(["healthy", "broken"], [provider.name for provider in router.ranking("text")])
+        broken.failing = False
+        self.assertEqual("healthy:again", router.translate("again"))
+        self.assertEqual(["text"], broken.requests)
+
+    def test_ranking_by_latency(self):
+        router = self._router(StubTranslator("slow"), StubTranslator("fast"), StubTranslator("steady"))
+        for latency in (0.5, 0.6, 0.7):
+            router.stats["slow"].record_success(latency)
+        for latency in (0.1, 0.1, 0.9):
+            router.stats["fast"].record_success(latency)
+        for latency in (0.1, 0.1, 0.2):
+            router.stats["steady"].record_success(latency)
+        # same median for fast and steady, the p95 breaks the tie
+        self.assertEqual(["steady", "fast", "slow"], [provider.name for provider in router.ranking()])
+
+    def test_ranking_skips_long_texts(self):
+        short, long = StubTranslator("short"), StubTranslator("long")
+        router = RoutingTranslator([Provider("short", short, max_chars=5), Provider("long", long)])
+        self.routers.append(router)
+        self.assertEqual(["long"], [provider.name for provider in router.ranking("long text")])
+        self.assertEqual("long:long text", router.translate("long text"))
+
+
+class ProviderStatsTest(unittest.TestCase):
+
+    def test_percentile(self):
+        stats = ProviderStats()
+        self.assertEqual(0.0, stats.percentile(50))
+        for latency in (0.5, 0.1, 0.4, 0.2, 0.3):
+            stats.record_success(latency)
+        self.assertEqual(0.3, stats.percentile(50))
+        self.assertEqual(0.5, stats.percentile(95))
+        self.assertEqual(0.1, stats.percentile(0))
+
+    def test_window_keeps_last_latencies(self):
+        stats = ProviderStats(window=3)
+        for latency in (9.0, 1.0, 2.0, 3.0):
+            stats.record_success(latency)
+        self.assertEqual(3.0, stats.percentile(100))
+
+    def test_cooldown_doubles(self):
+        stats = ProviderStats(cooldown=0.05)
+        stats.record_failure()
+        self.assertFalse(stats.is_healthy())
+        sleep(0.06)
+        self.assertTrue(stats.is_healthy())
+        stats.record_failure()
+        sleep(0.06)
+        # the second failure in a row doubles the cooldown
+        self.assertFalse(stats.is_healthy())
+        sleep(0.05)
+        self.assertTrue(stats.is_healthy())
+
+    def test_success_restores_health(self):
+        stats = ProviderStats(cooldown=60)
+        stats.record_failure()
+        stats.record_success(0.1)
+        self.assertTrue(stats.is_healthy())
+        self.assertEqual(0, stats.failures)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Tests of the splitting of the texts into segments and chunks, and of their
+reassembly, in order or as the parts arrive.
+"""
+
+import random
+import unittest
+
+from transclip.segments import PrefixJoiner, join_segments, pack_segments, split_chunks, split_segments
+
+TEXTS = ["", "single", "One sentence. Another one! A question?\nA new line.\n\n  An indented paragraph.",
+         "No terminator at the end\n", "\n\nStarts with breaks.", "Spaces after.   Many of them.\t\tTabs too."]
+
+
+def random_text(generator: random.Random, size: int) -> str:
+    pieces = ["word", "sentence.", "question?", " ", " ", "\n", "\n\n", "  ", "x" * 30]
+    return "".join(generator.choice(pieces) for _ in range(size))
+
+
+class SplitSegmentsTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        generator = random.Random(3)
+        for text in TEXTS + [random_text(generator, 200) for _ in range(200)]:
+            segments, separators = split_segments(text)
+            self.assertEqual(len(segments), len(separators) + 1)
+            self.assertEqual(text, join_segments(segments, separators))
+
+    def test_boundaries(self):
+        segments, separators = split_segments("First one. Second one!\nThird")
+        self.assertEqual(["First one.", "Second one!", "Third"], segments)
+        self.assertEqual([" ", "\n"], separators)
+
+    def test_join_empty(self):
+        self.assertEqual("", join_segments([], []))
+
+
+class SplitChunksTest(unittest.TestCase):
+
+    def test_short_text_is_one_chunk(self):
+        self.assertEqual((["short text"], []), split_chunks("short text", 100))
+
+    def test_chunks_fit_and_round_trip(self):
+        generator = random.Random(5)
+        for limit in (10, 50, 200):
+            for _ in range(100):
+                text = random_text(generator, 300)
+                chunks, separators = split_chunks(text, limit)
+                self.assertEqual(len(chunks), len(separators) + 1)
+                self.assertTrue(all(len(chunk) <= limit for chunk in chunks))
+                self.assertEqual(text, join_segments(chunks, separators))
+
+    def test_prefers_paragraphs(self):
+        first, second = "First paragraph. It has two sentences.", "Second paragraph. Also two sentences."
+        self.assertEqual(([first, second], ["\n\n"]), split_chunks(f"{first}\n\n{second}", 50))
+
+    def test_packs_pieces(self):
+        chunks, separators = split_chunks("One. Two. Three. Four.", 10)
+        self.assertEqual(["One. Two.", "Three.", "Four."], chunks)
+        self.assertEqual([" ", " "], separators)
+
+    def test_splits_long_words(self):
+        chunks, separators = split_chunks("a" * 25, 10)
+        self.assertEqual(["a" * 10, "a" * 10, "a" * 5], chunks)
+        self.assertEqual(["", ""], separators)
+
+
+class PackSegmentsTest(unittest.TestCase):
+
+    def test_groups_fit(self):
+        segments = ["aaaa", "bbbb", "cc", "dddddddddddd", "e"]
+        groups = pack_segments(segments, 10)
+        self.assertEqual([["aaaa", "bbbb"], ["cc"], ["dddddddddddd"], ["e"]], groups)
+        self.assertEqual(segments, [segment for group in groups for segment in group])
+
+
+class PrefixJoinerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.reports = []
+        self.separators = [" ", "\n", "\n\n"]
+        self.joiner = PrefixJoiner(self.separators, lambda *report: self.reports.append(report))
+
+    def test_reports_the_prefix_in_order(self):
+        self.joiner.put({2: "C"})
+        self.assertEqual([], self.reports)
+        self.joiner.put({0: "A"})
+        self.assertEqual([(1, 4, "A")], self.reports)
+        self.joiner.put({1: "B", 3: "D"})
+        self.assertEqual([(1, 4, "A"), (4, 4, " B\nC\n\nD")], self.reports)
+
+    def test_concatenation_gives_the_joined_text(self):
+        parts = ["one", "two", "", "four"]
+        order = [3, 1, 0, 2]
+        for index in order:
+            self.joiner.put({index: parts[index]})
+        self.assertEqual(join_segments(parts, self.separators), "".join(report[2] for report in self.reports))
+        self.assertEqual(4, self.reports[-1][0])
+
+    def test_single_part(self):
+        joiner = PrefixJoiner([], lambda *report: self.reports.append(report))
+        joiner.put({0: "only"})
+        self.assertEqual([(1, 1, "only")], self.reports)
+
+
+if __name__ == "__main__":
+    unittest.main()
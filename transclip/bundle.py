@@ -0,0 +1,144 @@
+"""
+This module provides the resource bundle shipped with the package: a zip
+archive with the locales, styles, icons and default settings that is read in
+one go and kept in memory, so the program never needs the network to start.
+It is rebuilt from the resources folder with: python -m transclip.bundle
+"""
+
+import json
+from hashlib import sha256
+from io import BytesIO
+from os import makedirs, walk
+from os.path import dirname, isfile, join, relpath
+from typing import Dict, Iterable, List, Optional
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED
+
+from transclip.constant import PROGRAM_VERSION, REMOTE_TIMEOUT
+from transclip.homedir import create_dir
+from transclip.lazy import LazyObject
+from transclip.logger import logger
+
+BUNDLE_PATH = join(dirname(__file__), "bundle.zip")
+
+# Folders of the resources that are bundled, the rest are optional
+BUNDLED_FOLDERS = ("locales", "styles", "svg", "other")
+
+MANIFEST = "manifest.json"
+
+
+class ResourceBundle:
+    """Indexes in memory the files of the bundle whose digest matches the one recorded in its manifest"""
+
+    def __init__(self, path: str = BUNDLE_PATH):
+        super(ResourceBundle, self).__init__()
+        self.path = path
+        self.version: Optional[str] = None
+        self.__entries: Dict[str, bytes] = {}
+        self.load()
+
+    def load(self):
+        if not isfile(self.path):
+            logger.warning(f"Resource bundle not found: {self.path}")
+            return
+        try:
+            with open(self.path, mode="rb") as bundle_file:
+                data = bundle_file.read()
+            with ZipFile(BytesIO(data)) as archive:
+                manifest = json.loads(archive.read(MANIFEST).decode("utf-8"))
+                for name, digest in manifest["files"].items():
+                    content = archive.read(name)
+                    if sha256(content).hexdigest() == digest:
+                        self.__entries[name] = content
+                    else:
+                        logger.error(f"Corrupted resource in bundle: {name}")
+            self.version = manifest.get("version")
+            logger.info(f"Resource bundle {self.version} loaded with {len(self.__entries)} files")
+        except Exception as ex:
+            logger.error(ex)
+
+    def get(self, name: str) -> Optional[bytes]:
+        """Returns the content of a file given by its path inside the resources folder, like locales/en.json"""
+        return self.__entries.get(name)
+
+    def has(self, name: str) -> bool:
+        return name in self.__entries
+
+    def names(self, folder: str) -> List[str]:
+        """Returns the names of the files bundled in a folder"""
+        prefix = folder.rstrip("/") + "/"
+        return [name[len(prefix):] for name in self.__entries if name.startswith(prefix)]
+
+
+def build_bundle(resources_dir: str, path: str = BUNDLE_PATH, version: str = PROGRAM_VERSION) -> int:
+    """Writes the bundle with the files of the resources folder and returns how many were added"""
+    files: Dict[str, str] = {}
+    # a fixed date keeps the archive identical while the resources do not change
+    with ZipFile(path, mode="w", compression=ZIP_DEFLATED) as archive:
+        for folder in BUNDLED_FOLDERS:
+            for root, _, file_names in sorted(walk(join(resources_dir, folder))):
+                for file_name in sorted(file_names):
+                    name = relpath(join(root, file_name), resources_dir).replace("\\", "/")
+                    with open(join(root, file_name), mode="rb") as resource:
+                        content = resource.read()
+                    files[name] = sha256(content).hexdigest()
+                    archive.writestr(ZipInfo(name, date_time=(2021, 1, 1, 0, 0, 0)), content, ZIP_DEFLATED)
+        manifest = json.dumps({"version": version, "files": files}, indent=2, sort_keys=True)
+        archive.writestr(ZipInfo(MANIFEST, date_time=(2021, 1, 1, 0, 0, 0)), manifest, ZIP_DEFLATED)
+    return len(files)
+
+
+def cached_resource_path(name: str) -> str:
+    """Returns where the copy of a resource refreshed from the network is kept"""
+    return join(create_dir("cache"), *name.split("/"))
+
+
+def refresh_resources(base_url: str, names: Iterable[str]):
+    """
+        Downloads the newer versions of the resources given into the cache.
+        The requests carry the ETag of the copy already downloaded, so the
+        unchanged files are not transferred again. Meant to run in the
+        background, the copies are used from the next start.
+    """
+    from requests import get
+    tags_path = cached_resource_path("etags.json")
+    tags: Dict[str, str] = {}
+    if isfile(tags_path):
+        try:
+            with open(tags_path, mode="r", encoding="utf-8") as tags_file:
+                tags = json.load(tags_file)
+        except Exception as ex:
+            logger.error(ex)
+    for name in names:
+        try:
+            file_path = cached_resource_path(name)
+            headers = {"If-None-Match": tags[name]} if name in tags and isfile(file_path) else {}
+            response = get(base_url.rstrip("/") + "/" + name, headers=headers, timeout=REMOTE_TIMEOUT)
+            if response.status_code == 304:
+                continue
+            response.raise_for_status()
+            if name.endswith(".json"):
+                # a broken download must not replace the bundled copy
+                json.loads(response.content.decode("utf-8"))
+            makedirs(dirname(file_path), exist_ok=True)
+            with open(file_path, mode="wb") as resource:
+                resource.write(response.content)
+            if "ETag" in response.headers:
+                tags[name] = response.headers["ETag"]
+            logger.info(f"Resource refreshed: {name}")
+        except Exception as ex:
+            logger.error(f"Unable to refresh {name}: {ex}")
+    try:
+        with open(tags_path, mode="w", encoding="utf-8") as tags_file:
+            json.dump(tags, tags_file)
+    except Exception as ex:
+        logger.error(ex)
+
+
+resource_bundle = None
+if resource_bundle is None:
+    resource_bundle = LazyObject(ResourceBundle)
+
+
+if __name__ == "__main__":
+    import sys
+    print(f"{build_bundle(sys.argv[1] if len(sys.argv) > 1 else 'resources')} files bundled in {BUNDLE_PATH}")
@@ -0,0 +1,168 @@
+"""
+This module provides a persistent translation memory stored in the working
+directory, so that a text already translated does not travel to the network again.
+"""
+
+import sqlite3 as sql
+from collections import OrderedDict
+from hashlib import blake2b
+from os.path import join
+from threading import Lock
+from time import time
+from typing import Dict, Optional
+from unicodedata import normalize
+
+from transclip.config import config
+from transclip.homedir import get_home_path
+from transclip.logger import logger
+
+# Hits remembered before their use time is written, they are also written with the next translations stored
+TOUCH_BATCH = 64
+
+
+def normalize_text(text: str) -> str:
+    """Returns the canonical form of a text used to build the cache keys"""
+    return normalize("NFC", text.strip())
+
+
+def text_digest(text: str) -> str:
+    """Returns the hash that identifies a normalized text inside the cache"""
+    return blake2b(normalize_text(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class TranslationCache:
+    """
+        Keeps the translations already made in a SQLite table with least
+        recently used eviction, fronted by a small in-memory table so that
+        repeated texts are answered without touching the disk.
+    """
+
+    def __init__(self, file_name: str = "cache.db", capacity: int = 10000, memory_capacity: int = 256):
+        """Opens (or creates) the cache database inside the working directory"""
+        super(TranslationCache, self).__init__()
+        self.capacity = capacity
+        self.memory_capacity = memory_capacity
+        self.hits = 0
+        self.misses = 0
+        self.__memory: OrderedDict = OrderedDict()
+        self.__touched: Dict[tuple, float] = {}
+        self.__lock = Lock()
+        self.__connection = None
+        try:
+            self.__connection = sql.connect(join(get_home_path(), file_name), check_same_thread=False)
+            self.__connection.execute('CREATE TABLE IF NOT EXISTS "translations" ("source" TEXT NOT NULL, '
+                                      '"target" TEXT NOT NULL, "digest" TEXT NOT NULL, "translation" TEXT NOT NULL, '
+                                      '"used" REAL NOT NULL, PRIMARY KEY("source", "target", "digest"))')
+            self.__connection.execute('CREATE INDEX IF NOT EXISTS "translations_used" ON "translations" ("used")')
+            self.__connection.commit()
+        except Exception as ex:
+            logger.error(ex)
+            self.__connection = None
+
+    def get(self, source: str, target: str, text: str) -> Optional[str]:
+        """Returns the stored translation of the text or None if it is not cached"""
+        key = (source, target, text_digest(text))
+        with self.__lock:
+            if key in self.__memory:
+                self.__memory.move_to_end(key)
+                self.hits += 1
+                self._touch(key)
+                return self.__memory[key]
+            translation = None
+            if self.__connection is not None:
+                try:
+                    row = self.__connection.execute('SELECT translation FROM translations WHERE source=? AND '
+                                                    'target=? AND digest=?', key).fetchone()
+                    if row is not None:
+                        translation = row[0]
+                        self._touch(key)
+                except Exception as ex:
+                    logger.error(ex)
+            if translation is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._remember(key, translation)
+            return translation
+
+    def put(self, source: str, target: str, text: str, translation: str) -> None:
+        """Stores a translation, evicting the least recently used ones when the cache is full"""
+        self.put_many(source, target, {text: translation})
+
+    def put_many(self, source: str, target: str, translations: Dict[str, str]) -> None:
+        """Stores several translations of the same language pair in a single transaction"""
+        used = time()
+        rows = [(source, target, text_digest(text), translation, used) for text, translation in translations.items()]
+        with self.__lock:
+            for row in rows:
+                self._remember(row[:3], row[3])
+            if self.__connection is not None and len(rows) > 0:
+                try:
+                    self._write_touched()
+                    self.__connection.executemany('INSERT OR REPLACE INTO translations (source, target, digest, '
+                                                  'translation, used) VALUES (?, ?, ?, ?, ?)', rows)
+                    self.__connection.execute('DELETE FROM translations WHERE rowid IN (SELECT rowid FROM '
+                                              'translations ORDER BY used DESC LIMIT -1 OFFSET ?)', (self.capacity,))
+                    self.__connection.commit()
+                except Exception as ex:
+                    logger.error(ex)
+
+    def flush(self) -> None:
+        """Writes the use time of the hits not stored yet"""
+        with self.__lock:
+            if self.__connection is not None and len(self.__touched) > 0:
+                try:
+                    self._write_touched()
+                    self.__connection.commit()
+                except Exception as ex:
+                    logger.error(ex)
+
+    def clear(self) -> None:
+        """Removes every stored translation"""
+        with self.__lock:
+            self.__memory.clear()
+            self.__touched.clear()
+            if self.__connection is not None:
+                try:
+                    self.__connection.execute("DELETE FROM translations")
+                    self.__connection.commit()
+                except Exception as ex:
+                    logger.error(ex)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit and miss counters of the cache"""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _touch(self, key: tuple) -> None:
+        """
+            Remembers the use time of a hit, from memory or from disk. The
+            times are written in batches, a commit per hit would serialize
+            the lookups.
+        """
+        if self.__connection is None:
+            return
+        self.__touched[key] = time()
+        if len(self.__touched) >= TOUCH_BATCH:
+            try:
+                self._write_touched()
+                self.__connection.commit()
+            except Exception as ex:
+                logger.error(ex)
+
+    def _write_touched(self) -> None:
+        """Updates the use time of the hits in the current transaction, the caller commits it"""
+        touched = [(used, *key) for key, used in self.__touched.items()]
+        self.__touched.clear()
+        self.__connection.executemany('UPDATE translations SET used=? WHERE source=? AND target=? AND digest=?',
+                                      touched)
+
+    def _remember(self, key: tuple, translation: str) -> None:
+        self.__memory[key] = translation
+        self.__memory.move_to_end(key)
+        while len(self.__memory) > self.memory_capacity:
+            self.__memory.popitem(last=False)
+
+
+translation_cache = None
+if translation_cache is None:
+    translation_cache = TranslationCache(capacity=config.get_int("cache.size") or 10000)
@@ -1,3 +1,4 @@
+from PyQt5.QtCore import QObject, pyqtSignal
 from PyQt5.QtGui import QClipboard
 from PyQt5.QtWidgets import QApplication
 from pyperclip import copy, paste
@@ -5,3 +6,37 @@ from pyperclip import copy, paste
 
 def clear():
     QApplication.clipboard().clear(QClipboard.Clipboard)
+
+
+class ClipboardWatcher(QObject):
+    """Notifies the changes of the system clipboard without polling it"""
+
+    changed = pyqtSignal(str)
+
+    def __init__(self, mode=QClipboard.Clipboard):
+        """The watcher must be created in the thread that owns the QApplication"""
+        super(ClipboardWatcher, self).__init__()
+        self.mode = mode
+        self.__watching: bool = False
+
+    def start(self) -> None:
+        """Starts listening to the dataChanged notifications of the clipboard"""
+        if not self.__watching:
+            QApplication.clipboard().dataChanged.connect(self._on_data_changed)
+            self.__watching = True
+
+    def stop(self) -> None:
+        """Stops listening to the clipboard"""
+        if self.__watching:
+            QApplication.clipboard().dataChanged.disconnect(self._on_data_changed)
+            self.__watching = False
+
+    def is_watching(self) -> bool:
+        return self.__watching
+
+    def text(self) -> str:
+        """Returns the current clipboard text without spawning any process"""
+        return QApplication.clipboard().text(self.mode)
+
+    def _on_data_changed(self) -> None:
+        self.changed.emit(self.text())
@@ -3,50 +3,97 @@
 
 import sqlite3 as sql
 import sys
-from typing import Dict
-from os.path import join, isfile
-
-from requests import get
+from threading import RLock
+from typing import Callable, Dict, Iterable, List
+from os.path import join
 
+from transclip.bundle import resource_bundle
 from transclip.homedir import get_home_path
 from transclip.impl import AbstractLoader
+from transclip.lazy import LazyObject
 from transclip.logger import logger
 
 
+def parse_bool(value: str) -> bool:
+    return value == "True"
+
+
+def parse_list(value: str) -> List[str]:
+    """Splits a setting that holds values separated by commas, skipping the empty ones"""
+    return [item.strip() for item in value.split(",") if len(item.strip()) > 0]
+
+
+# Type of the settings that are not plain text, their values are parsed once, when they are loaded or changed
+SCHEMA: Dict[str, Callable[[str], object]] = {
+    "monitor.interval": float,
+    "monitor.coalesce": float,
+    "monitor.coalesce.leading": parse_bool,
+    "formatter.auto": parse_bool,
+    "editext.source.view": parse_bool,
+    "editext.plain.view": parse_bool,
+    "transclip.resources.refresh": parse_bool,
+    "translator.targets": parse_list,
+    "translator.providers": parse_list,
+    "translator.hedge.delay": float,
+    "translator.chunk.size": int,
+    "translator.workers": int,
+    "translator.retries": int,
+    "translator.rate": float,
+    "translator.burst": float,
+    "cache.enabled": parse_bool,
+    "cache.size": int,
+    "history.enabled": parse_bool,
+    "history.size": int,
+}
+
+
 class Configuration(AbstractLoader):
 
-    def __init__(self):
+    def __init__(self, file_name: str = "config.db"):
         super(Configuration, self).__init__()
         self.__config = {}
+        self.__values: Dict[str, object] = {}
+        self.__observers: Dict[str, List[Callable[[object], None]]] = {}
         self._to_save: Dict[str, str] = {}
+        self.__path = join(get_home_path(), file_name)
+        self.__connection = None
+        self.__lock = RLock()
         self.load()
 
     def load(self):
-        try:
-            db_file = join(get_home_path(), "config.db")
-            if not isfile(db_file):
-                connection = sql.connect(db_file)
-                cursor = connection.cursor()
-                cursor.execute('CREATE TABLE "config" ("id"	INTEGER NOT NULL, "key"	TEXT NOT NULL, "value"	TEXT NOT '
-                               'NULL, PRIMARY KEY("id" AUTOINCREMENT))')
-                self.load_default()
-                for key, value in self.__config.items():
-                    cursor.execute(f'INSERT INTO "config" (key, value) VALUES ("{key}", "{value}")')
+        """Reads every setting into memory, the database is created with the default values the first time"""
+        with self.__lock:
+            try:
+                connection = self._get_connection()
+                if connection.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='config'") \
+                        .fetchone() is None:
+                    connection.execute('CREATE TABLE "config" ("id"	INTEGER NOT NULL, "key"	TEXT NOT NULL, '
+                                       '"value"	TEXT NOT NULL, PRIMARY KEY("id" AUTOINCREMENT))')
+                    connection.execute('CREATE UNIQUE INDEX "config_key" ON "config" ("key")')
+                    self.load_default()
+                    connection.executemany('INSERT INTO "config" (key, value) VALUES (?, ?)', self.__config.items())
+                else:
+                    # the databases written before the index existed could repeat a key, the last row wins
+                    connection.execute('DELETE FROM "config" WHERE id NOT IN (SELECT MAX(id) FROM "config" '
+                                       'GROUP BY key)')
+                    connection.execute('CREATE UNIQUE INDEX IF NOT EXISTS "config_key" ON "config" ("key")')
+                    for key, value in connection.execute("SELECT key, value FROM config"):
+                        self.__config[key] = value
+                    self.register_missing(connection)
                 connection.commit()
-                cursor.close()
-                connection.close()
-            else:
-                connection = sql.connect(db_file)
-                cursor = connection.cursor()
-                cursor.execute("SELECT key, value FROM config")
-                rows = cursor.fetchall()
-                for row in rows:
-                    self.__config[row[0]] = row[1]
-                cursor.close()
-                connection.close()
-        except Exception as ex:
-            logger.error(ex)
-            self.load_default()
+            except Exception as ex:
+                logger.error(ex)
+                if self.__connection is not None:
+                    self.__connection.rollback()
+                self.load_default()
+            self._parse(self.__config)
+
+    def _get_connection(self) -> sql.Connection:
+        """Returns the connection kept open for the life of the program"""
+        if self.__connection is None:
+            self.__connection = sql.connect(self.__path, check_same_thread=False)
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+        return self.__connection
 
     def register_configs(self, stream: list):
         """
@@ -61,69 +108,104 @@ class Configuration(AbstractLoader):
                 except ValueError as ex:
                     logger.error(ex)
 
+    def register_missing(self, connection: sql.Connection):
+        """
+            Adds to the database the default values of the keys introduced
+            after it was created
+        """
+        stored = dict(self.__config)
+        try:
+            self.register_configs(self.read_default())
+        except Exception as ex:
+            logger.error(ex)
+        missing = []
+        for key, value in self.__config.items():
+            if key in stored:
+                self.__config[key] = stored[key]
+            else:
+                missing.append((key, value))
+                logger.info(f"Registering new setting: {key}")
+        connection.executemany('INSERT INTO "config" (key, value) VALUES (?, ?) ON CONFLICT (key) DO NOTHING', missing)
+
+    def read_default(self) -> List[str]:
+        """Returns the lines of the default settings, taken from the bundle when the resources are missing"""
+        try:
+            with open("resources/other/default.properties") as default:
+                return default.readlines()
+        except OSError as ex:
+            logger.warning(ex)
+        content = resource_bundle.get("other/default.properties")
+        if content is None:
+            raise FileNotFoundError("No default settings found")
+        return content.decode("utf-8").splitlines(keepends=True)
+
     def load_default(self):
-        # loading default configuration
+        # loading default configuration, the program starts without network
         try:
-            default = open("resources/other/default.properties")
-            lines = default.readlines()
-            default.close()
-            self.register_configs(lines)
+            self.register_configs(self.read_default())
         except Exception as ex:
             logger.error(ex)
-            try:
-                # loading default configuration from github
-                data = get("https://raw.githubusercontent.com/jhondevcode/Transclip-qt/master/src/resources/other/default.properties")
-                lines = data.content.decode("utf-8")
-                data.close()
-                lines = lines.split("\n")
-                del lines[-1]
-                self.register_configs(lines)
-            except Exception as ex:
-                logger.error(ex)
-                sys.exit(-1)
+            sys.exit(-1)
 
     def save(self) -> bool:
+        """
+            Stores the pending values that differ from the current ones in a
+            single transaction and applies them to the values in memory.
+            Returns True if an error occurred.
+        """
         have_error = False
-        connection = None
-        cursor = None
-        if len(self._to_save):
-            try:
-                connection = sql.connect(join(get_home_path(), "config.db"))
-                cursor = connection.cursor()
-                # cursor.execute("UPDATE config SET value")
-
-                for key, value in self._to_save.items():
-                    try:
-                        cursor.execute(f'UPDATE config SET value="{value}" WHERE key="{key}"')
-                    except Exception as ex:
-                        logger.error(ex)
-                        connection.rollback()
-                        have_error = True
-                        break
-                connection.commit()
-                # cursor.close()
-                # connection.close()
-            except Exception as ex:
-                logger.error(ex)
+        with self.__lock:
+            changes = [(key, str(value)) for key, value in self._to_save.items() if self.__config.get(key) != value]
+            invalid = [key for key, value in changes if not self.is_valid(key, value)]
+            if len(invalid):
+                # the invalid values are not stored, the settings keep their current ones
+                logger.error(f"Invalid values for: {', '.join(invalid)}")
                 have_error = True
-                if connection:
-                    connection.rollback()
-            finally:
-                if cursor:
-                    cursor.close()
-
-                if connection:
-                    connection.close()
+                changes = [(key, value) for key, value in changes if key not in invalid]
+            if len(changes):
+                connection = None
+                try:
+                    connection = self._get_connection()
+                    connection.executemany('INSERT INTO "config" (key, value) VALUES (?, ?) ON CONFLICT (key) '
+                                           'DO UPDATE SET value=excluded.value', changes)
+                    connection.commit()
+                    self.__config.update(changes)
+                    self._parse(key for key, _ in changes)
+                except Exception as ex:
+                    logger.error(ex)
+                    have_error = True
+                    changes = []
+                    if connection:
+                        connection.rollback()
+        self._notify(key for key, _ in changes)
         return have_error
 
+    def close(self):
+        """Closes the connection to the database"""
+        with self.__lock:
+            if self.__connection is not None:
+                self.__connection.close()
+                self.__connection = None
+
     def get(self, key: str):
         try:
             return self.__config[key]
         except KeyError as err:
             logger.error(err)
             return None
-    
+
+    def value(self, key: str):
+        """Returns the value of a setting converted to the type given by the schema"""
+        try:
+            return self.__values[key]
+        except KeyError as err:
+            logger.error(err)
+            return None
+
     def get_bool(self, key: str) -> bool:
+        value = self.__values.get(key)
+        if isinstance(value, bool):
+            return value
         try:
             return True if self.get(key) == 'True' else False
         except Exception as err:
@@ -131,6 +213,9 @@ class Configuration(AbstractLoader):
             return False
 
     def get_float(self, key: str) -> float:
+        value = self.__values.get(key)
+        if isinstance(value, float):
+            return value
         try:
             return float(self.get(key))
         except Exception as err:
@@ -138,6 +223,9 @@ class Configuration(AbstractLoader):
             return 0.0
 
     def get_int(self, key: str) -> int:
+        value = self.__values.get(key)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
         try:
             return int(self.get(key))
         except Exception as err:
@@ -151,8 +239,69 @@ class Configuration(AbstractLoader):
             logger.error(err)
             return ""
 
-    def set(self, key: str, value: str):
-        self.__config[key] = value
+    def get_list(self, key: str) -> List[str]:
+        """Returns the non empty items of a setting that holds values separated by commas"""
+        value = self.__values.get(key)
+        if isinstance(value, list):
+            return list(value)
+        value = self.get(key)
+        if value is None:
+            return []
+        return parse_list(str(value))
+
+    def set(self, key: str, value: str) -> bool:
+        """
+            Changes a setting only in memory, the observers of the key are
+            notified. An invalid value is rejected, returns True if so.
+        """
+        if not self.is_valid(key, value):
+            logger.error(f"Invalid value for {key}: {value}")
+            return True
+        with self.__lock:
+            self.__config[key] = value
+            self._parse([key])
+        self._notify([key])
+        return False
+
+    @staticmethod
+    def is_valid(key: str, value: str) -> bool:
+        """Checks that the value can be parsed with the type of the setting"""
+        try:
+            SCHEMA.get(key, str)(value)
+            return True
+        except Exception:
+            return False
+
+    def subscribe(self, key: str, callback: Callable[[object], None]):
+        """Calls the callback with the parsed value every time the setting changes"""
+        with self.__lock:
+            self.__observers.setdefault(key, []).append(callback)
+
+    def unsubscribe(self, key: str, callback: Callable[[object], None]):
+        with self.__lock:
+            if callback in self.__observers.get(key, []):
+                self.__observers[key].remove(callback)
+
+    def _parse(self, keys: Iterable[str]):
+        for key in keys:
+            try:
+                self.__values[key] = SCHEMA.get(key, str)(self.__config[key])
+            except Exception as ex:
+                logger.error(f"Invalid value for {key}: {ex}")
+                self.__values.pop(key, None)
+
+    def _notify(self, keys: Iterable[str]):
+        for key in keys:
+            with self.__lock:
+                callbacks = list(self.__observers.get(key, []))
+            if key not in self.__values:
+                # a value that could not be parsed is never handed to the observers
+                continue
+            for callback in callbacks:
+                try:
+                    callback(self.__values[key])
+                except Exception as ex:
+                    logger.error(ex)
 
     def clean_to_save(self):
         self._to_save.clear()
@@ -163,4 +312,5 @@ class Configuration(AbstractLoader):
 
 config = None
 if config is None:
-    config = Configuration()
+    # the database is opened the first time a setting is read
+    config = LazyObject(Configuration)
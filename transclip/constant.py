@@ -5,3 +5,4 @@ PROGRAM_COPYRIGHT = "Copyright 2021 jhondevcode"
 PROGRAM_DESCRIPTION = "A small utility to translate clipboard content"
 PROGRAM_VERSION = "1.0.0"
 PROGRAM_URL = "https://github.com/jhondevcode/transclip-qt"
+REMOTE_TIMEOUT = 5
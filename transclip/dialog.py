@@ -3,15 +3,17 @@ This module provides widgets to display information in text boxes as well as
 functions to display dialog.
 """
 
-from os.path import join
+from datetime import datetime
 
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QDialog, QMessageBox, QVBoxLayout, QHBoxLayout
 from PyQt5.QtWidgets import QTextEdit, QPushButton, QLabel, QTabWidget
+from PyQt5.QtWidgets import QLineEdit, QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView, QSplitter
 
+from transclip.clipboard import copy
 from transclip.constant import PROGRAM_NAME, PROGRAM_DESCRIPTION, PROGRAM_VERSION
 from transclip.exceptions import UnsatisfiedResourceException
-from transclip.util import locale, svg_loader, resources_path
+from transclip.util import locale, svg_loader, resource_cache
 
 AUTHORS = [{'name': 'Jhon Fernandez', 'email': 'jhondev.code@gmail.com', 'github': 'github.com/jhondevcode'}]
 
@@ -112,12 +114,85 @@ class AboutDialog(QDialog):
     def get_license(self):
         widget = QTextEdit()
         widget.setReadOnly(True)
-        with open(join(join(resources_path(), "other"), "license.txt"), mode='r', encoding='utf-8') as license_file:
-            widget.setPlainText(license_file.read())
+        license_text = resource_cache.data("other/license.txt")
+        widget.setPlainText(license_text.decode("utf-8") if license_text is not None else "")
         widget.setAlignment(Qt.AlignJustify)
         return widget
 
 
+class HistoryDialog(QDialog):
+    """Lists the clipboard history, filtered while the search is being typed"""
+
+    def __init__(self, parent, history):
+        super(HistoryDialog, self).__init__(parent)
+        self.history = history
+        self.entries = []
+        self.setWindowTitle(locale.value("HISTORY_DIALOG_TITLE"))
+        self.main_layout = QVBoxLayout()
+        self.setLayout(self.main_layout)
+        self.resize(700, 450)
+        self.init_ui()
+        self.search("")
+
+    def init_ui(self):
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText(locale.value("HISTORY_SEARCH"))
+        self.search_edit.textChanged.connect(self.search)
+        self.main_layout.addWidget(self.search_edit)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels([locale.value("HISTORY_DATE"), locale.value("HISTORY_LANGUAGES"),
+                                              locale.value("HISTORY_TEXT"), locale.value("HISTORY_TRANSLATION")])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.currentCellChanged.connect(self.show_entry)
+        splitter.addWidget(self.table)
+        self.text_view = QTextEdit()
+        self.text_view.setReadOnly(True)
+        splitter.addWidget(self.text_view)
+        self.translation_view = QTextEdit()
+        self.translation_view.setReadOnly(True)
+        splitter.addWidget(self.translation_view)
+        self.main_layout.addWidget(splitter)
+
+        buttons_layout = QHBoxLayout()
+        self.copy_button = QPushButton(locale.value("HISTORY_COPY"))
+        self.copy_button.setEnabled(False)
+        self.copy_button.clicked.connect(lambda: copy(self.translation_view.toPlainText()))
+        buttons_layout.addWidget(self.copy_button)
+        close_button = QPushButton(locale.value("CLOSE"))
+        close_button.clicked.connect(self.close)
+        buttons_layout.addWidget(close_button)
+        self.main_layout.addLayout(buttons_layout)
+
+    def search(self, query: str):
+        """Shows the newest entries that match the search, the query runs on the index so it can follow the typing"""
+        self.entries = self.history.search(query)
+        self.table.setRowCount(len(self.entries))
+        for row, (_, text, translation, source, target, created) in enumerate(self.entries):
+            self.table.setItem(row, 0, QTableWidgetItem(datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M")))
+            self.table.setItem(row, 1, QTableWidgetItem(f"{source} > {target}"))
+            # the cells only show the first line, the whole texts are shown below the table
+            self.table.setItem(row, 2, QTableWidgetItem(text.split("\n", 1)[0][:200]))
+            self.table.setItem(row, 3, QTableWidgetItem(translation.split("\n", 1)[0][:200]))
+        self.show_entry(self.table.currentRow())
+
+    def show_entry(self, row: int, *args):
+        if 0 <= row < len(self.entries):
+            self.text_view.setPlainText(self.entries[row][1])
+            self.translation_view.setPlainText(self.entries[row][2])
+            self.copy_button.setEnabled(True)
+        else:
+            self.text_view.clear()
+            self.translation_view.clear()
+            self.copy_button.setEnabled(False)
+
+
 def show_question_dialog(parent, title, message):
     buttons = QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
     return QMessageBox.question(parent, title, message, buttons, QMessageBox.StandardButton.Yes)
@@ -145,3 +220,8 @@ def show_text_dialog(parent=None, file="", title="", buttons=False):
 
 def show_about_dialog(parent=None):
     AboutDialog(parent=parent).exec()
+
+
+def show_history_dialog(parent=None):
+    from transclip.history import clipboard_history
+    HistoryDialog(parent=parent, history=clipboard_history).exec()
@@ -0,0 +1,111 @@
+"""
+This module provides the bridge that runs an asyncio event loop inside the
+Qt event loop, so the coroutines run in the thread of the window, between
+its events, instead of in a loop of their own.
+"""
+
+import asyncio
+import selectors
+from math import ceil
+from typing import Optional
+
+from PyQt5.QtCore import QObject, QSocketNotifier, QTimer, Qt
+
+from transclip.lazy import LazyObject
+from transclip.logger import logger
+
+# Longest wait between two steps when Qt cannot watch the selector (select on Windows)
+POLL_INTERVAL = 0.01
+
+# Waits shorter than this are spun by the loop instead of being handed to a Qt timer
+MIN_WAIT = 0.001
+
+
+class QtSelector(selectors.DefaultSelector):
+    """
+        Selector that never blocks. When the loop has nothing to run and
+        would wait for its sockets or timers, the selector stops it and keeps
+        the time until its next timer, Qt wakes it up again.
+    """
+
+    def __init__(self):
+        super(QtSelector, self).__init__()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.timeout: Optional[float] = None
+
+    def select(self, timeout: Optional[float] = None):
+        events = super(QtSelector, self).select(0)
+        if len(events) == 0 and (timeout is None or timeout >= MIN_WAIT):
+            self.timeout = timeout
+            self.loop.stop()
+        return events
+
+
+class QtLoopBridge(QObject):
+    """
+        Runs an asyncio loop in steps driven by the Qt event loop of the
+        thread that creates it. A step runs every callback that is ready and
+        ends as soon as the loop would wait. The next one comes when the
+        selector reports events (a socket, or the wake up written by
+        call_soon_threadsafe), when the next timer of the loop is due, or
+        when wake is called after handing work to the loop from a Qt slot.
+        Nothing runs while the loop is idle.
+    """
+
+    def __init__(self):
+        """Must be created in the thread that runs the Qt event loop, the loop becomes its event loop"""
+        super(QtLoopBridge, self).__init__()
+        self.selector = QtSelector()
+        self.loop = asyncio.SelectorEventLoop(self.selector)
+        self.selector.loop = self.loop
+        asyncio.set_event_loop(self.loop)
+        self.__timer = QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setTimerType(Qt.PreciseTimer)
+        self.__timer.timeout.connect(self._step)
+        self.__notifier: Optional[QSocketNotifier] = None
+        if hasattr(self.selector, "fileno"):
+            # epoll and kqueue descriptors become readable when any of their sockets has events
+            self.__notifier = QSocketNotifier(self.selector.fileno(), QSocketNotifier.Read, self)
+            self.__notifier.activated.connect(self._step)
+
+    def wake(self) -> None:
+        """Runs a step as soon as the Qt event loop is free"""
+        self.__timer.start(0)
+
+    def close(self) -> None:
+        """Cancels the tasks left and closes the loop"""
+        self.__timer.stop()
+        if self.__notifier is not None:
+            self.__notifier.setEnabled(False)
+        if not self.loop.is_closed() and not self.loop.is_running():
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            try:
+                self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            except Exception as ex:
+                logger.error(ex)
+            self.loop.close()
+
+    def _step(self) -> None:
+        # a nested Qt loop (a dialog opened by a callback) must not run the loop again
+        if self.loop.is_running() or self.loop.is_closed():
+            return
+        self.selector.timeout = None
+        try:
+            self.loop.run_forever()
+        except Exception as ex:
+            logger.error(ex)
+        timeout = self.selector.timeout
+        if self.__notifier is None:
+            timeout = POLL_INTERVAL if timeout is None else min(timeout, POLL_INTERVAL)
+        if timeout is not None:
+            self.__timer.start(ceil(timeout * 1000))
+        else:
+            self.__timer.stop()
+
+
+loop_bridge = None
+if loop_bridge is None:
+    loop_bridge = LazyObject(QtLoopBridge)
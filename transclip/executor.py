@@ -0,0 +1,109 @@
+"""
+This module provides the executor that runs the translations outside the
+monitor thread, discarding the work made for clipboard contents that were
+already replaced by a newer one.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from threading import Event, Lock
+from typing import Callable, Dict, Optional
+
+from transclip.logger import logger
+
+
+class TranslationJob:
+    """Represents the translation of a single clipboard content"""
+
+    def __init__(self, generation: int, text: str):
+        """The generation orders the jobs, the newest job has the highest generation"""
+        super(TranslationJob, self).__init__()
+        self.generation = generation
+        self.text = text
+        self.__cancelled = Event()
+        self.__done = Event()
+
+    def cancel(self) -> None:
+        """Marks the job as superseded, its pending requests will not be sent"""
+        self.__cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self.__cancelled.is_set()
+
+    def finish(self) -> None:
+        self.__done.set()
+
+    def is_done(self) -> bool:
+        return self.__done.is_set()
+
+
+# The job being executed in the current context, used to stop the work of cancelled jobs
+current_job: ContextVar = ContextVar("current_job", default=None)
+
+# Receives the progress of the translation running in the current context: parts done, total parts and new text
+progress_listener: ContextVar = ContextVar("progress_listener", default=None)
+
+
+class TranslationExecutor:
+    """Runs translation jobs in a worker pool, delivering only the result of the newest one"""
+
+    def __init__(self, workers: int = 2):
+        """Starts the worker pool"""
+        super(TranslationExecutor, self).__init__()
+        self.__pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.__lock = Lock()
+        self.__generation: int = 0
+        self.__futures: Dict[TranslationJob, Future] = {}
+
+    def submit(self, text: str, function: Callable[[str], object],
+               callback: Callable[[TranslationJob, object], None]) -> TranslationJob:
+        """
+            Creates a new job that runs function over the text and cancels
+            the older ones. The callback receives the result only if no
+            newer job was submitted in the meantime.
+        """
+        with self.__lock:
+            self.__generation += 1
+            job = TranslationJob(self.__generation, text)
+            self._cancel_jobs()
+            self.__futures[job] = self.__pool.submit(self._run, job, function, callback)
+            return job
+
+    def cancel_all(self) -> None:
+        """Cancels every pending or running job"""
+        with self.__lock:
+            self.__generation += 1
+            self._cancel_jobs()
+
+    def is_latest(self, job: TranslationJob) -> bool:
+        return job.generation == self.__generation and not job.is_cancelled()
+
+    def shutdown(self) -> None:
+        """Cancels the jobs and releases the workers without waiting for them"""
+        self.cancel_all()
+        self.__pool.shutdown(wait=False)
+
+    def _cancel_jobs(self) -> None:
+        for job, future in self.__futures.items():
+            job.cancel()
+            future.cancel()
+        self.__futures.clear()
+
+    def _run(self, job: TranslationJob, function: Callable[[str], object],
+             callback: Callable[[TranslationJob, object], None]) -> None:
+        result: Optional[object] = None
+        try:
+            if not job.is_cancelled():
+                token = current_job.set(job)
+                try:
+                    result = function(job.text)
+                finally:
+                    current_job.reset(token)
+            with self.__lock:
+                if self.is_latest(job):
+                    callback(job, result)
+                    self.__futures.pop(job, None)
+        except Exception as ex:
+            logger.error(ex)
+        finally:
+            job.finish()
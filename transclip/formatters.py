@@ -1,4 +1,45 @@
-from impl import AbstractFormatter
+import re
+from typing import Dict, Iterable, Iterator, Optional
+
+from transclip.impl import AbstractFormatter
+
+# A hyphen before a line break joins the word, a period closes the paragraph and any other line break is a space
+LINE_BREAKS = re.compile(r"-\n|\.\n|\n")
+LINE_BREAKS_REPLACEMENTS = {"-\n": "", ".\n": ".\n\n", "\n": " "}
+LEADING_LINE_BREAKS = {".": "\n\n", "-": ""}
+
+# Kinds of content recognized by sniff_content
+PROSE_CONTENT = "prose"
+CODE_CONTENT = "code"
+LOG_CONTENT = "log"
+SKIP_CONTENT = "skip"
+
+# Single line payloads that are not natural language: urls, e-mails, paths, hashes and uuids
+# (payloads without letters, like numbers, are discarded before)
+UNTRANSLATABLE = re.compile(r"(?:[a-z][a-z0-9+.-]*://|www\.)\S+|[\w.+-]+@[\w-]+(?:\.[\w-]+)+|(?:~|\.{1,2})?/\S*|"
+                            r"[a-z]:\\\S*|(?=[0-9a-f]*\d)[0-9a-f]{7,}|[0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}",
+                            re.IGNORECASE)
+LOG_LINE = re.compile(r"\s*(?:\[?\d{4}-\d{2}-\d{2}|\[?\d{2}:\d{2}:\d{2}|"
+                      r"\[?(?:TRACE|DEBUG|INFO|WARN|WARNING|ERROR|FATAL|CRITICAL)\b)")
+PDF_HYPHENATION = re.compile(r"[a-z]-\n[a-z]")
+CODE_SYMBOLS = re.compile(r"[{}\[\]();=<>]")
+# Constructs seldom found in prose: calls and indexing glued to a name, comparisons, arrows, scopes, markup
+# attributes and tags, statements closed and blocks opened at the end of a line, blocks closed at the start
+CODE_TOKENS = re.compile(r"\w[(\[]|[=!<>]=|=>|->|::|&&|\|\||\w=[\"']|</|/>|[;{}\[(]$|^\s*[}\])]", re.MULTILINE)
+CODE_LINE_ENDINGS = (";", "{", "}", ")", "[", "]")
+# Line endings shared with prose (lists, addresses, introductions), they count only along with code tokens
+LIST_LINE_ENDINGS = (",", ":")
+# Code symbols per character needed along with two code tokens, and without them in payloads of CODE_MIN_SIZE
+CODE_DENSITY = 0.03
+DENSE_CODE = 0.12
+CODE_MIN_SIZE = 80
+
+# Only the beginning of the payload is inspected to keep the detection cheap
+SNIFF_SIZE = 4096
+
+# Placeholders used by the bulk replacements, the regular expression is used when the text contains them
+JOINED_MARK = "\x00"
+PARAGRAPH_MARK = "\x01"
 
 
 class PlainTextFormatter(AbstractFormatter):
@@ -10,31 +51,119 @@ class PlainTextFormatter(AbstractFormatter):
 
     def format(self, text: str):
         text_fixed: str = text.replace('\r', '')
-        text_length: int = len(text_fixed)
-        character_string_counter: int = 0
-        character_string_buffer: list = []
-        # format engine
-        while character_string_counter < text_length:
-            current_character = text_fixed[character_string_counter]
-            if current_character == '-':
-                try:
-                    if text_fixed[character_string_counter + 1] == '\n':
-                        character_string_buffer.append('')
-                    else:
-                        character_string_buffer.append(current_character)
-                except IndexError:
-                    character_string_buffer.append(current_character)
-            elif current_character == '\n':
-                try:
-                    if text_fixed[character_string_counter - 1] == '.':
-                        character_string_buffer.append('\n\n')
-                    elif text_fixed[character_string_counter - 1] == '-':
-                        character_string_buffer.append('')
-                    else:
-                        character_string_buffer.append(' ')
-                except IndexError:
-                    character_string_buffer.append(current_character)
-            else:
-                character_string_buffer.append(current_character)
-            character_string_counter += 1
-        return "".join(character_string_buffer)
\ No newline at end of file
+        if len(text_fixed) == 0:
+            return ""
+        # a leading line break is decided by the last character of the text, as it wraps around to index -1
+        return self._format_span(text_fixed, text_fixed[-1], None)
+
+    def format_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+            Formats the text chunk by chunk keeping a single character of
+            lookahead, so the memory used does not depend on the size of the
+            text. Unlike format, a line break at the very beginning of the
+            stream is always rendered as a space, since the last character of
+            the text is not known yet.
+        """
+        previous = None
+        pending = ""
+        for chunk in chunks:
+            buffer = pending + chunk.replace('\r', '')
+            if len(buffer) > 1:
+                yield self._format_span(buffer[:-1], previous, buffer[-1])
+                previous = buffer[-2]
+                buffer = buffer[-1]
+            pending = buffer
+        if len(pending) > 0:
+            yield self._format_span(pending, previous, None)
+
+    def _format_span(self, span: str, previous, following) -> str:
+        """Formats a piece of text given the characters that surround it"""
+        # format engine, every kind of line break is rewritten in bulk
+        if JOINED_MARK in span or PARAGRAPH_MARK in span:
+            formatted: str = LINE_BREAKS.sub(self._replace_line_break, span)
+        else:
+            formatted: str = span.replace('-\n', JOINED_MARK).replace('.\n', '.' + PARAGRAPH_MARK) \
+                .replace('\n', ' ').replace(PARAGRAPH_MARK, '\n\n').replace(JOINED_MARK, '')
+        if span[0] == '\n':
+            formatted = LEADING_LINE_BREAKS.get(previous, ' ') + formatted[1:]
+        if span[-1] == '-' and following == '\n':
+            formatted = formatted[:-1]
+        return formatted
+
+    @staticmethod
+    def _replace_line_break(match) -> str:
+        return LINE_BREAKS_REPLACEMENTS[match.group()]
+
+
+class RawTextFormatter(AbstractFormatter):
+    """Provides a formatter that keeps the lines of the text, used for code, structured data and logs"""
+
+    def __init__(self):
+        """Default constructor"""
+        super(RawTextFormatter, self).__init__()
+
+    def format(self, text: str):
+        return text.replace('\r', '')
+
+
+def sniff_content(text: str) -> str:
+    """
+        Guesses the kind of a clipboard payload with cheap heuristics over its
+        beginning: untranslatable tokens, log prefixes, PDF hyphenation,
+        code tokens, bracket density and the way the lines end. A single
+        signal is not enough to take prose for code, parentheses and
+        semicolons are common in both.
+    """
+    sample = text[:SNIFF_SIZE].replace('\r', '')
+    stripped = sample.strip()
+    if len(stripped) == 0 or not any(character.isalpha() for character in stripped):
+        return SKIP_CONTENT
+    if '\n' not in stripped and UNTRANSLATABLE.fullmatch(stripped):
+        return SKIP_CONTENT
+    lines = [line for line in stripped.split('\n') if len(line.strip()) > 0]
+    if len(lines) > 1 and sum(1 for line in lines if LOG_LINE.match(line)) * 2 >= len(lines):
+        return LOG_CONTENT
+    if PDF_HYPHENATION.search(stripped):
+        return PROSE_CONTENT
+    if stripped[0] in "{[" and stripped[-1] in "}]" and len(text) <= SNIFF_SIZE:
+        return CODE_CONTENT
+    tokens = len(CODE_TOKENS.findall(sample))
+    density = len(CODE_SYMBOLS.findall(stripped)) / len(stripped)
+    if tokens >= 2 and density > CODE_DENSITY:
+        return CODE_CONTENT
+    if len(stripped) >= CODE_MIN_SIZE and density > DENSE_CODE:
+        return CODE_CONTENT
+    endings = CODE_LINE_ENDINGS + LIST_LINE_ENDINGS if tokens > 0 else CODE_LINE_ENDINGS
+    if len(lines) > 2 and sum(1 for line in lines if line.rstrip().endswith(endings)) * 2 >= len(lines):
+        return CODE_CONTENT
+    return PROSE_CONTENT
+
+
+class FormatterRegistry:
+    """Associates each kind of content with the formatter that must handle it"""
+
+    def __init__(self):
+        """Starts an empty registry"""
+        super(FormatterRegistry, self).__init__()
+        self.__formatters: Dict[str, AbstractFormatter] = {}
+
+    def register(self, kind: str, formatter: AbstractFormatter) -> None:
+        self.__formatters[kind] = formatter
+
+    def get(self, kind: str) -> Optional[AbstractFormatter]:
+        return self.__formatters.get(kind)
+
+    def select(self, text: str) -> Optional[AbstractFormatter]:
+        """Returns the formatter for the payload, or None if it must not be translated"""
+        kind = sniff_content(text)
+        if kind == SKIP_CONTENT:
+            return None
+        return self.__formatters.get(kind, self.__formatters.get(PROSE_CONTENT))
+
+
+formatter_registry = None
+if formatter_registry is None:
+    formatter_registry = FormatterRegistry()
+    formatter_registry.register(PROSE_CONTENT, PlainTextFormatter())
+    formatter_registry.register(CODE_CONTENT, RawTextFormatter())
+    formatter_registry.register(LOG_CONTENT, RawTextFormatter())
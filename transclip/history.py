@@ -0,0 +1,148 @@
+"""
+This module provides the clipboard history, a SQLite database in the working
+directory with a full-text index over the texts and their translations.
+"""
+
+import re
+import sqlite3 as sql
+from os.path import join
+from queue import Queue, Empty
+from threading import Lock, Thread
+from time import time
+from typing import List, Optional, Tuple
+
+from transclip.config import config
+from transclip.homedir import get_home_path
+from transclip.logger import logger
+
+# Words of a search, each one is matched as a prefix so that the results follow the typing
+SEARCH_TERMS = re.compile(r"\w+")
+
+# Most entries written in a single transaction by the writer thread
+BATCH_SIZE = 200
+
+# A history entry: id, text, translation, source language, target language and creation time
+HistoryEntry = Tuple[int, str, str, str, str, float]
+
+
+class ClipboardHistory:
+    """
+        Keeps the texts translated by the monitor. The writes are queued and
+        stored in batches by a background thread, the searches read through
+        their own connection and an FTS5 index, so neither of them waits for
+        the other nor blocks the interface.
+    """
+
+    def __init__(self, file_name: str = "history.db", capacity: int = 100000):
+        """Opens (or creates) the history database and starts the writer thread"""
+        super(ClipboardHistory, self).__init__()
+        self.path = join(get_home_path(), file_name)
+        self.capacity = capacity
+        self.__pending: Queue = Queue()
+        self.__lock = Lock()
+        self.__connection = None
+        try:
+            self.__connection = sql.connect(self.path, check_same_thread=False)
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.executescript(
+                'CREATE TABLE IF NOT EXISTS "history" ("id" INTEGER PRIMARY KEY, "text" TEXT NOT NULL, '
+                '"translation" TEXT NOT NULL, "source" TEXT NOT NULL, "target" TEXT NOT NULL, "created" REAL NOT NULL);'
+                'CREATE VIRTUAL TABLE IF NOT EXISTS "history_index" USING fts5(text, translation, content="history", '
+                'content_rowid="id", tokenize="unicode61 remove_diacritics 2", prefix="1 2 3");'
+                'CREATE TRIGGER IF NOT EXISTS "history_insert" AFTER INSERT ON "history" BEGIN '
+                'INSERT INTO history_index (rowid, text, translation) VALUES (new.id, new.text, new.translation); END;'
+                'CREATE TRIGGER IF NOT EXISTS "history_delete" AFTER DELETE ON "history" BEGIN '
+                'INSERT INTO history_index (history_index, rowid, text, translation) '
+                "VALUES ('delete', old.id, old.text, old.translation); END;")
+            self.__connection.commit()
+        except Exception as ex:
+            logger.error(ex)
+            self.__connection = None
+        self.__writer = Thread(target=self._write, name="history", daemon=True)
+        if self.__connection is not None:
+            self.__writer.start()
+
+    def add(self, text: str, translation: str, source: str, target: str) -> None:
+        """Queues an entry, it is stored with the next batch"""
+        if self.__connection is not None:
+            self.__pending.put((text, translation, source, target, time()))
+
+    def search(self, query: str = "", limit: int = 100) -> List[HistoryEntry]:
+        """Returns the newest entries whose text or translation contains words starting with the ones searched"""
+        if self.__connection is None:
+            return []
+        terms = SEARCH_TERMS.findall(query)
+        with self.__lock:
+            try:
+                if len(terms) == 0:
+                    return self.__connection.execute('SELECT id, text, translation, source, target, created FROM '
+                                                     'history ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+                match = " ".join(f'"{term}"*' for term in terms)
+                return self.__connection.execute('SELECT h.id, h.text, h.translation, h.source, h.target, h.created '
+                                                 'FROM history_index JOIN history h ON h.id = history_index.rowid '
+                                                 'WHERE history_index MATCH ? ORDER BY history_index.rowid DESC '
+                                                 'LIMIT ?', (match, limit)).fetchall()
+            except Exception as ex:
+                logger.error(ex)
+                return []
+
+    def count(self) -> int:
+        if self.__connection is None:
+            return 0
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def clear(self) -> None:
+        """Removes every entry, including the ones waiting to be written"""
+        self.flush()
+        if self.__connection is not None:
+            with self.__lock:
+                try:
+                    self.__connection.execute("DELETE FROM history")
+                    self.__connection.execute("INSERT INTO history_index (history_index) VALUES ('rebuild')")
+                    self.__connection.commit()
+                except Exception as ex:
+                    logger.error(ex)
+
+    def flush(self) -> None:
+        """Waits until the queued entries are stored"""
+        if self.__writer.is_alive():
+            self.__pending.join()
+
+    def close(self) -> None:
+        """Stores the queued entries and stops the writer thread"""
+        if self.__writer.is_alive():
+            self.__pending.put(None)
+            self.__writer.join()
+
+    def _write(self) -> None:
+        connection = sql.connect(self.path)
+        running = True
+        while running:
+            batch: List[Optional[tuple]] = [self.__pending.get()]
+            try:
+                # the entries that arrive in the meantime travel in the same transaction
+                while len(batch) < BATCH_SIZE:
+                    batch.append(self.__pending.get(timeout=0.05))
+            except Empty:
+                pass
+            entries = [entry for entry in batch if entry is not None]
+            running = len(entries) == len(batch)
+            try:
+                if len(entries) > 0:
+                    connection.executemany('INSERT INTO history (text, translation, source, target, created) '
+                                           'VALUES (?, ?, ?, ?, ?)', entries)
+                    connection.execute('DELETE FROM history WHERE id <= (SELECT id FROM history ORDER BY id DESC '
+                                       'LIMIT 1 OFFSET ?)', (self.capacity,))
+                    connection.commit()
+            except Exception as ex:
+                logger.error(ex)
+            finally:
+                for _ in batch:
+                    self.__pending.task_done()
+        connection.close()
+
+
+clipboard_history = None
+if clipboard_history is None:
+    clipboard_history = ClipboardHistory(capacity=config.get_int("history.size") or 100000)
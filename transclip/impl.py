@@ -2,6 +2,10 @@
 This module contains a series of classes with undefined methods to later be implemented in the subclasses.
 """
 
+import asyncio
+from contextvars import copy_context
+from typing import Iterable, Iterator
+
 
 class Requester:
     """Any class that requires content from the clipboard or test source must implement this class"""
@@ -62,3 +66,27 @@ class AbstractFormatter:
     def format(self, content) -> object:
         """Used to format objects"""
         pass
+
+    def format_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Formats a text received in chunks, yielding the formatted chunks as soon as they are ready"""
+        yield self.format("".join(chunks))
+
+
+class AbstractTranslator:
+    """Provides a simple outline for implementing a translator between two languages"""
+
+    def __init__(self):
+        """Default constructor"""
+        super(AbstractTranslator, self).__init__()
+
+    def translate(self, text: str) -> str:
+        """Returns the translation of the text"""
+        pass
+
+    async def translate_async(self, text: str) -> str:
+        """Returns the translation of the text without blocking the running loop, by default from a worker thread"""
+        return await asyncio.get_running_loop().run_in_executor(None, copy_context().run, self.translate, text)
+
+    def close(self) -> None:
+        """Releases the resources held by the translator"""
+        pass
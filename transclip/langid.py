@@ -0,0 +1,104 @@
+"""
+This module identifies the language of a text locally, comparing its character
+n-grams with the profiles built from the sample texts in resources/langid.
+"""
+
+import re
+from collections import Counter
+from math import sqrt
+from os import listdir
+from os.path import isdir, join, splitext
+from threading import Lock
+from typing import Dict, Optional
+
+from transclip.logger import logger
+from transclip.util import resources_path
+
+# The n-grams are taken from the words only, numbers and symbols say nothing about the language
+WORDS = re.compile(r"[^\W\d_]+")
+
+NGRAM_SIZES = (2, 3)
+
+# Only the beginning of a text is identified, it is enough to tell the language and keeps the cost constant
+SAMPLE_SIZE = 2048
+
+# Samples whose language is remembered, the same clipboard content is usually checked several times
+DETECTED_SIZE = 256
+
+
+def ngram_profile(text: str) -> Dict[str, float]:
+    """Returns the normalized frequencies of the character n-grams of the words of a text"""
+    counts: Counter = Counter()
+    for word in WORDS.findall(text.lower()):
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            counts.update(padded[index:index + size] for index in range(len(padded) - size + 1))
+    norm = sqrt(sum(count * count for count in counts.values())) or 1.0
+    return {ngram: count / norm for ngram, count in counts.items()}
+
+
+class LanguageIdentifier:
+    """
+        Guesses the language of a text with the cosine similarity of its
+        n-gram profile against the profile of every known language. The
+        texts too short or too close to two languages are not identified.
+    """
+
+    def __init__(self, folder: str = None, min_letters: int = 12, min_margin: float = 0.01):
+        """The profiles are built from the files of the folder the first time a text is identified"""
+        super(LanguageIdentifier, self).__init__()
+        self.folder = folder
+        self.min_letters = min_letters
+        self.min_margin = min_margin
+        self.__profiles: Optional[Dict[str, Dict[str, float]]] = None
+        self.__detected: Dict[str, Optional[str]] = {}
+        self.__lock = Lock()
+
+    def detect(self, text: str) -> Optional[str]:
+        """Returns the code of the language of the text, or None if it cannot be told apart"""
+        sample = text[:SAMPLE_SIZE]
+        # the monitor, the executor and the target workers detect at the same time
+        with self.__lock:
+            if sample in self.__detected:
+                return self.__detected[sample]
+        code = self._identify(sample)
+        with self.__lock:
+            if len(self.__detected) >= DETECTED_SIZE:
+                self.__detected.clear()
+            self.__detected[sample] = code
+        return code
+
+    def _identify(self, text: str) -> Optional[str]:
+        if sum(len(word) for word in WORDS.findall(text)) < self.min_letters:
+            return None
+        profile = ngram_profile(text)
+        scores = sorted(((sum(weight * language_profile.get(ngram, 0.0) for ngram, weight in profile.items()), code)
+                         for code, language_profile in self._get_profiles().items()), reverse=True)
+        if len(scores) == 0:
+            return None
+        if len(scores) > 1 and scores[0][0] - scores[1][0] < self.min_margin:
+            return None
+        return scores[0][1]
+
+    def _get_profiles(self) -> Dict[str, Dict[str, float]]:
+        with self.__lock:
+            if self.__profiles is None:
+                self.__profiles = {}
+                folder = self.folder if self.folder is not None else join(resources_path(), "langid")
+                if isdir(folder):
+                    for file_name in listdir(folder):
+                        code, extension = splitext(file_name)
+                        if extension == ".txt":
+                            try:
+                                with open(join(folder, file_name), mode="r", encoding="utf-8") as sample:
+                                    self.__profiles[code] = ngram_profile(sample.read())
+                            except Exception as ex:
+                                logger.error(ex)
+                if len(self.__profiles) == 0:
+                    logger.warning(f"No language profiles found in: {folder}")
+            return self.__profiles
+
+
+language_identifier = None
+if language_identifier is None:
+    language_identifier = LanguageIdentifier()
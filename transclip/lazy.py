@@ -0,0 +1,47 @@
+"""
+This module provides the proxy that defers the creation of the program
+singletons until they are used for the first time.
+"""
+
+from threading import RLock
+from typing import Callable
+
+# Attributes of the proxy itself, the rest belong to the object
+LAZY_ATTRIBUTES = frozenset(("is_loaded", "_get_instance", "_LazyObject__factory", "_LazyObject__instance",
+                             "_LazyObject__lock", "__class__", "__dict__"))
+
+
+class LazyObject:
+    """
+        Stands for an object that is created by the factory the first time
+        one of its attributes is read or written, every access is then
+        delegated to it. Importing a module that owns a lazy singleton costs
+        nothing until the singleton is really needed.
+    """
+
+    def __init__(self, factory: Callable[[], object]):
+        object.__setattr__(self, "_LazyObject__factory", factory)
+        object.__setattr__(self, "_LazyObject__instance", None)
+        object.__setattr__(self, "_LazyObject__lock", RLock())
+
+    def is_loaded(self) -> bool:
+        return self.__instance is not None
+
+    def __getattribute__(self, name: str):
+        # the attributes are looked up in the object first, without the failed lookup that __getattr__ needs
+        if name in LAZY_ATTRIBUTES:
+            return object.__getattribute__(self, name)
+        instance = object.__getattribute__(self, "_LazyObject__instance")
+        if instance is None:
+            instance = object.__getattribute__(self, "_get_instance")()
+        return getattr(instance, name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self._get_instance(), name, value)
+
+    def _get_instance(self):
+        if self.__instance is None:
+            with self.__lock:
+                if self.__instance is None:
+                    object.__setattr__(self, "_LazyObject__instance", self.__factory())
+        return self.__instance
@@ -1,78 +1,343 @@
 """
 """
 
-from time import sleep
+from contextvars import copy_context
+from queue import Queue, Empty
+from time import sleep, monotonic
+from typing import Callable, Dict, List, Optional, Tuple
 
 from PyQt5.QtCore import QThread, pyqtSignal
 from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
 
-from clipboard import copy, paste
-from config import config
-from formatters import PlainTextFormatter
-from impl import AbstractMonitor, AbstractFormatter
-from logger import logger
-from translation import PlainTextTranslator
-from util import locale
+from transclip.cache import translation_cache
+from transclip.clipboard import ClipboardWatcher, copy, paste
+from transclip.config import config
+from transclip.executor import TranslationExecutor, TranslationJob, current_job, progress_listener
+from transclip.formatters import PlainTextFormatter, formatter_registry
+from transclip.history import clipboard_history
+from transclip.impl import AbstractMonitor, AbstractFormatter, AbstractTranslator
+from transclip.langid import language_identifier
+from transclip.logger import logger
+from transclip.ratelimit import rate_limiter
+from transclip.translation import TranslationCancelledException, translator_service, target_pool
+from transclip.translation import GOOGLE_BACKEND, LOCAL_BACKEND, ROUTING_BACKEND
+from transclip.util import locale
+
+# Backends used to detect the clipboard changes
+EVENT_BACKEND = "event"
+POLLING_BACKEND = "polling"
 
 
 class Monitor(QThread, AbstractMonitor):
     source = pyqtSignal(str)
     target = pyqtSignal(str)
     words = pyqtSignal(int)
+    avoided = pyqtSignal(int)
+    skipped = pyqtSignal(int)
+    same_language = pyqtSignal(int)
+    targets = pyqtSignal(dict)
+    budget = pyqtSignal(float, float)
+    progress = pyqtSignal(int, int, str)
 
     def __init__(self, owner):
         QThread.__init__(self)
         AbstractMonitor.__init__(self)
         self.owner = owner
-        self.interval_time = config.get("monitor.interval")
-        self.formatter = PlainTextFormatter()
-        self.translator = PlainTextTranslator(self._get_safe_lang_key(config.get("translator.source")),
-                                              self._get_safe_lang_key(config.get("translator.target")))
+        self.interval_time = config.get_float("monitor.interval")
+        self.coalesce_time = config.get_float("monitor.coalesce")
+        self.coalesce_leading = config.get_bool("monitor.coalesce.leading")
+        self.avoided_translations: int = 0
+        self.skipped_translations: int = 0
+        self.same_language_translations: int = 0
+        self.backend = self._get_safe_backend(config.get("monitor.backend"))
+        # without a fixed formatter, the registry picks one for each payload
+        self.formatter = None if config.get_bool("formatter.auto") else PlainTextFormatter()
+        self.translator = None
+        self.translator_backend = GOOGLE_BACKEND
+        self.source_code = "auto"
+        self.target_code = "auto"
+        self.target_languages: List[str] = []
+        self.set_backend(config.get("translator.backend"))
+        self.set_targets(config.get_list("translator.targets"))
+        # the settings saved while the monitor exists are applied without restarting it
+        self._subscriptions = {"monitor.interval": self.set_interval_time,
+                               "monitor.coalesce": self.set_coalesce_time,
+                               "monitor.coalesce.leading": self.set_coalesce_leading,
+                               "translator.source": self._on_languages_changed,
+                               "translator.target": self._on_languages_changed,
+                               "translator.targets": self._on_languages_changed,
+                               "translator.backend": self._on_languages_changed}
+        for key, callback in self._subscriptions.items():
+            config.subscribe(key, callback)
+        self.executor = TranslationExecutor()
+        self._job = None
+        self._last_content = None
+        self._last_translation = ""
+        # the clipboard content of the last skip, it stays in the clipboard since nothing is copied back
+        self._last_skipped = None
+        # when the last new content arrived, with a leading window only the ones that follow it are coalesced
+        self._last_change = float("-inf")
+        self._changes: Queue = Queue()
+        # the limiter reports the requests left and its rate every time they change
+        rate_limiter.listener = self.budget.emit
+        self.watcher = None
+        if self.backend == EVENT_BACKEND:
+            self.watcher = ClipboardWatcher()
+            self.watcher.changed.connect(self._changes.put)
 
-    def set_interval_time(self, interval: int):
+    def set_interval_time(self, interval: float):
         self.interval_time = interval
-        
+
+    def set_coalesce_time(self, window: float):
+        self.coalesce_time = window
+
+    def set_coalesce_leading(self, leading: bool):
+        self.coalesce_leading = leading
+
     def set_formatter(self, new_formatter: AbstractFormatter):
         self.formatter = new_formatter
-        
-    def set_translator(self, new_translator):
+
+    def set_translator(self, new_translator: AbstractTranslator):
+        """Replaces the translator, the jobs submitted from now on use the new one"""
         self.translator = new_translator
 
-    def invoke_translate(self, actual: str, old: str):
+    def set_backend(self, backend: str):
+        """Switches to the translator of the configured language pair in the backend given"""
+        self.translator_backend = backend if backend in (LOCAL_BACKEND, ROUTING_BACKEND) else GOOGLE_BACKEND
+        source_code = self._get_safe_lang_key(config.get("translator.source"))
+        target_code = self._get_safe_lang_key(config.get("translator.target"))
+        self.set_translator(translator_service.get(source_code, target_code, self._get_cache(),
+                                                   self.translator_backend))
+        self.source_code = source_code
+        self.target_code = target_code
+
+    def set_targets(self, languages: List[str]):
+        """Sets the languages, apart from the configured target, that every content is also translated into"""
+        self.target_languages = [language for language in languages
+                                 if self._get_safe_lang_key(language) not in (self.target_code, "auto")]
+
+    def detect_source(self, text: str) -> str:
+        """Returns the code of the language the text is written in, shared by every target of the text"""
+        if self.source_code == "auto":
+            return language_identifier.detect(text) or self.source_code
+        return self.source_code
+
+    def invoke_translate(self, actual: str):
+        """Sends the text to the executor, the result is emitted when the job finishes"""
         self.source.emit(actual)
         self.target.emit(locale.value("TRANSLATING"))
-        try:
-            translated = self.translator.translate(actual)
-            copy(translated)
-            return translated
-        except Exception as ex:
-            logger.error(ex)
-            print(ex)
-            return old
+        self._emit_targets({}, locale.value("TRANSLATING"))
+        self._job = self.executor.submit(actual, self._translate, self._on_translated)
+
+    def process(self, clipboard_content: str) -> None:
+        """Translates the clipboard content if it is new"""
+        if self._is_new(clipboard_content):
+            self._last_content = clipboard_content
+            self._last_skipped = None
+            formatter = self.formatter if self.formatter is not None else formatter_registry.select(clipboard_content)
+            if formatter is None:
+                self._skip(clipboard_content)
+                return
+            clipboard_content = formatter.format(clipboard_content)
+            if len(self.target_languages) == 0 and self.detect_source(clipboard_content) == self.target_code:
+                # already written in the target language, there is nothing to translate
+                self._skip(clipboard_content, same_language=True)
+                return
+            self.words.emit(len(clipboard_content.split(" ")))
+            self.invoke_translate(clipboard_content)
+
+    def _skip(self, clipboard_content: str, same_language: bool = False) -> None:
+        """
+            Shows a content that is not worth translating without sending it
+            to the translator. The contents already written in the target
+            language are counted apart from the untranslatable ones.
+        """
+        self.executor.cancel_all()
+        self._last_translation = clipboard_content
+        self._last_skipped = self._last_content
+        self.source.emit(clipboard_content)
+        self.target.emit(clipboard_content)
+        self._emit_targets({}, clipboard_content)
+        if same_language:
+            self.same_language_translations += 1
+            self.same_language.emit(self.same_language_translations)
+        else:
+            self.skipped_translations += 1
+            self.skipped.emit(self.skipped_translations)
 
     def run(self) -> None:
-        old_text = ""
+        if self.backend == EVENT_BACKEND:
+            self._listen()
+        else:
+            self._poll()
+
+    def _poll(self) -> None:
+        """Fallback backend, reads the clipboard every interval"""
         while self.is_running():
             clipboard_content = paste()
-            if clipboard_content is not None and len(clipboard_content) > 0:
-                if clipboard_content != old_text:
-                    clipboard_content = self.formatter.format(clipboard_content)
-                    old_text = self.invoke_translate(clipboard_content, old_text)
-                    self.words.emit(len(clipboard_content.split(" ")))
-                    self.target.emit(old_text)
-                else:
-                    if old_text == "":
-                        old_text = self.invoke_translate(clipboard_content, old_text)
+            if self._must_coalesce(clipboard_content):
+                deadline = monotonic() + float(self.coalesce_time)
+                while self.is_running() and monotonic() < deadline:
+                    sleep(min(float(self.interval_time), max(deadline - monotonic(), 0)))
+                    newer_content = paste()
+                    if newer_content != clipboard_content:
+                        self._avoid()
+                        clipboard_content = newer_content
+            self.process(clipboard_content)
             sleep(float(self.interval_time))
 
+    def _listen(self) -> None:
+        """Sleeps until the clipboard watcher reports a change"""
+        while self.is_running():
+            clipboard_content = self._changes.get()
+            if self._must_coalesce(clipboard_content):
+                clipboard_content = self._coalesce(clipboard_content)
+            if self.is_running():
+                self.process(clipboard_content)
+
+    def _coalesce(self, clipboard_content: str) -> str:
+        """Waits for the coalesce window to finish and returns the last content reported"""
+        deadline = monotonic() + float(self.coalesce_time)
+        while self.is_running() and monotonic() < deadline:
+            try:
+                newer_content = self._changes.get(timeout=max(deadline - monotonic(), 0))
+            except Empty:
+                break
+            if newer_content is None:
+                break
+            if newer_content != clipboard_content:
+                self._avoid()
+                clipboard_content = newer_content
+        return clipboard_content
+
+    def _must_coalesce(self, clipboard_content: str) -> bool:
+        """
+            Checks if a new content must wait for the coalesce window, so that
+            only the last content of a burst is translated. With a leading
+            window, the first content of a burst is translated at once and
+            only the ones that arrive within the window of the previous one
+            wait. That leading translation is sent anyway, it is not avoided.
+        """
+        if not self._is_new(clipboard_content):
+            return False
+        now = monotonic()
+        in_burst = now - self._last_change < float(self.coalesce_time)
+        self._last_change = now
+        return in_burst or not self.coalesce_leading
+
+    def _avoid(self) -> None:
+        """Counts a clipboard content that was replaced before being translated"""
+        self._last_change = monotonic()
+        self.avoided_translations += 1
+        self.avoided.emit(self.avoided_translations)
+
+    def _translate(self, text: str) -> Tuple[Optional[str], Dict[str, Optional[str]]]:
+        """Translates the text into the target and the additional languages at the same time"""
+        futures = {language: target_pool.submit(copy_context().run, self._translate_into, translator, text)
+                   for language, translator in self._get_target_translators(text).items()}
+        translated = self._translate_into(self.translator, text, self._get_progress_listener(current_job.get()))
+        return translated, {language: future.result() for language, future in futures.items()}
+
+    def _translate_into(self, translator: Optional[AbstractTranslator], text: str,
+                        listener: Callable = None) -> Optional[str]:
+        if translator is None:
+            # the text is already written in that language
+            return text
+        token = progress_listener.set(listener)
+        try:
+            return translator.translate(text)
+        except TranslationCancelledException:
+            return None
+        except Exception as ex:
+            logger.error(ex)
+            return None
+        finally:
+            progress_listener.reset(token)
+
+    def _get_progress_listener(self, job: Optional[TranslationJob]) -> Callable[[int, int, str], None]:
+        """Returns the function that emits the parts of the translation of the job while it is not replaced"""
+        def listener(complete: int, total: int, text: str):
+            if job is None or not job.is_cancelled():
+                self.progress.emit(complete, total, text)
+        return listener
+
+    def _on_translated(self, job: TranslationJob, result: Tuple[Optional[str], Dict[str, Optional[str]]]) -> None:
+        """Receives the result of the newest job from the executor"""
+        translated, translations = result if result is not None else (None, {})
+        if translated is not None:
+            self._last_translation = translated
+            self._copy(translated)
+            if config.get_bool("history.enabled"):
+                clipboard_history.add(job.text, translated, self.detect_source(job.text), self.target_code)
+        self.target.emit(self._last_translation)
+        self._emit_targets(translations, "")
+
+    def _copy(self, text: str) -> None:
+        copy(text)
+
+    def _emit_targets(self, translations: Dict[str, Optional[str]], default: str) -> None:
+        """Emits the text of every additional language, using the default for the ones without translation"""
+        if len(self.target_languages) > 0:
+            self.targets.emit({language: translations.get(language) or default for language in self.target_languages})
+
+    def _get_target_translators(self, text: str) -> Dict[str, Optional[AbstractTranslator]]:
+        """Returns the translators of the additional languages from the language detected in the text"""
+        source = self.detect_source(text)
+        translators: Dict[str, Optional[AbstractTranslator]] = {}
+        for language in self.target_languages:
+            target = self._get_safe_lang_key(language)
+            if target == source:
+                translators[language] = None
+                continue
+            try:
+                translators[language] = translator_service.get(source, target, self._get_cache(),
+                                                               self.translator_backend)
+            except Exception as ex:
+                logger.error(ex)
+        return translators
+
+    def _is_new(self, clipboard_content: str) -> bool:
+        """Checks if the content must be translated"""
+        return clipboard_content is not None and len(clipboard_content) > 0 and \
+            clipboard_content != self._last_translation and clipboard_content != self._last_skipped and \
+            not self._is_pending(clipboard_content)
+
+    def _is_pending(self, clipboard_content: str) -> bool:
+        """Checks if the content is already being translated by the newest job"""
+        return self._job is not None and not self._job.is_done() and clipboard_content == self._last_content
+
     def start_monitoring(self):
         super().start_monitoring()
+        if self.watcher is not None:
+            self._changes.put(self.watcher.text())
+            self.watcher.start()
         self.start()
 
     def stop_monitoring(self):
         super().stop_monitoring()
+        for key, callback in self._subscriptions.items():
+            config.unsubscribe(key, callback)
+        self.executor.shutdown()
+        if self.watcher is not None:
+            self.watcher.stop()
+            # wakes up the listener so that it can finish
+            self._changes.put(None)
         if not self.isRunning() and self.isFinished():
             self.exit(0)
 
     def _get_safe_lang_key(self, lang: str):
         return GOOGLE_LANGUAGES_TO_CODES[lang] if lang in GOOGLE_LANGUAGES_TO_CODES else "auto"
+
+    def _on_languages_changed(self, _value) -> None:
+        """Switches to the translators of the new language pair, the job in progress keeps the old ones"""
+        try:
+            self.set_backend(config.get("translator.backend"))
+            self.set_targets(config.get_list("translator.targets"))
+        except Exception as ex:
+            logger.error(ex)
+
+    def _get_cache(self):
+        return translation_cache if config.get_bool("cache.enabled") else None
+
+    def _get_safe_backend(self, backend: str):
+        return backend if backend in (EVENT_BACKEND, POLLING_BACKEND) else EVENT_BACKEND
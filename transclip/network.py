@@ -0,0 +1,230 @@
+"""
+This module provides a small HTTP/1.1 client built on asyncio streams, so the
+requests of the async pipeline wait as coroutines of the event loop instead
+of holding a thread each.
+"""
+
+import asyncio
+import socket
+import ssl
+import zlib
+from base64 import b64encode
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlencode, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+# Requests sent at the same time by a client, like the connections pooled by the session of the threaded pipeline
+MAX_CONNECTIONS = 4
+
+# A connection: the stream reader and writer
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class HttpResponse:
+    """Status, headers (with lowercase names) and decoded body of a response"""
+
+    def __init__(self, status: int, headers: Dict[str, str], content: bytes):
+        super(HttpResponse, self).__init__()
+        self.status = status
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        charset = "utf-8"
+        for parameter in self.headers.get("content-type", "").split(";")[1:]:
+            name, _, value = parameter.strip().partition("=")
+            if name.lower() == "charset" and len(value) > 0:
+                charset = value.strip('"')
+        try:
+            return self.content.decode(charset, errors="replace")
+        except LookupError:
+            return self.content.decode("utf-8", errors="replace")
+
+
+class AsyncHttpClient:
+    """
+        Sends GET requests keeping the connections alive, so the DNS lookup
+        and the TLS handshake are made once per connection. The bodies may
+        come with a length or in chunks, compressed with gzip or deflate.
+        The proxies given, or else the ones of the environment, are used as
+        requests does: HTTPS goes through a CONNECT tunnel.
+    """
+
+    def __init__(self, headers: Dict[str, str] = None, proxies: Dict[str, str] = None,
+                 max_connections: int = MAX_CONNECTIONS):
+        super(AsyncHttpClient, self).__init__()
+        self.headers = dict(headers) if headers is not None else {}
+        self.proxies = proxies
+        self.max_connections = max_connections
+        self.ssl_context = ssl.create_default_context()
+        self.__idle: Dict[Tuple[str, str, int], List[Connection]] = {}
+        self.__slots: Optional[asyncio.Semaphore] = None
+
+    async def get(self, url: str, params: Dict[str, str] = None, timeout: float = None) -> HttpResponse:
+        """Sends the request, a connection found closed by the server is replaced once"""
+        if self.__slots is None:
+            self.__slots = asyncio.Semaphore(self.max_connections)
+        async with self.__slots:
+            return await asyncio.wait_for(self._get(url, params), timeout)
+
+    def close(self) -> None:
+        """Closes the idle connections"""
+        for connections in self.__idle.values():
+            for _, writer in connections:
+                writer.close()
+        self.__idle.clear()
+
+    async def _get(self, url: str, params: Optional[Dict[str, str]]) -> HttpResponse:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        target = parts.path or "/"
+        query = "&".join(part for part in (parts.query, urlencode(params) if params else "") if len(part) > 0)
+        if len(query) > 0:
+            target += "?" + query
+        proxy = self._get_proxy(scheme, parts.hostname)
+        if proxy is not None and scheme == "http":
+            # a plain request goes to the proxy with the whole address
+            target = f"http://{parts.netloc}{target}"
+        headers = {"Host": parts.netloc, "Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+        headers.update(self.headers)
+        if proxy is not None and scheme == "http":
+            headers.update(self._get_proxy_headers(proxy))
+        request = f"GET {target} HTTP/1.1\r\n" + "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        request = (request + "\r\n").encode("latin-1")
+        while True:
+            connection, reused = await self._acquire(key, proxy)
+            try:
+                response, keep_alive = await self._exchange(connection, request)
+            except (ConnectionError, asyncio.IncompleteReadError) as ex:
+                connection[1].close()
+                if reused:
+                    # the server closed the idle connection, the request is sent through a new one
+                    continue
+                raise ConnectionError(ex)
+            except BaseException:
+                # a cancelled or failed exchange leaves the connection in an unknown state
+                connection[1].close()
+                raise
+            if keep_alive and len(self.__idle.setdefault(key, [])) < self.max_connections:
+                self.__idle[key].append(connection)
+            else:
+                connection[1].close()
+            return response
+
+    async def _acquire(self, key: Tuple[str, str, int], proxy: Optional[str]) -> Tuple[Connection, bool]:
+        """Returns an idle connection to the host, or a new one, and whether it was reused"""
+        idle = self.__idle.get(key, [])
+        while len(idle) > 0:
+            reader, writer = idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return (reader, writer), True
+            writer.close()
+        scheme, host, port = key
+        context = self.ssl_context if scheme == "https" else None
+        if proxy is None:
+            return await asyncio.open_connection(host, port, ssl=context), False
+        proxy_parts = urlsplit(proxy)
+        proxy_host, proxy_port = proxy_parts.hostname, proxy_parts.port or 8080
+        if context is None:
+            return await asyncio.open_connection(proxy_host, proxy_port), False
+        tunnel = await self._open_tunnel(proxy, host, port)
+        return await asyncio.open_connection(sock=tunnel, ssl=context, server_hostname=host), False
+
+    async def _open_tunnel(self, proxy: str, host: str, port: int) -> socket.socket:
+        """Connects to the proxy and asks it for a tunnel to the host, the TLS handshake goes through it"""
+        loop = asyncio.get_running_loop()
+        proxy_parts = urlsplit(proxy)
+        addresses = await loop.getaddrinfo(proxy_parts.hostname, proxy_parts.port or 8080, type=socket.SOCK_STREAM)
+        error: Optional[Exception] = None
+        for family, kind, protocol, _, address in addresses:
+            tunnel = socket.socket(family, kind, protocol)
+            tunnel.setblocking(False)
+            try:
+                await loop.sock_connect(tunnel, address)
+                headers = "".join(f"{name}: {value}\r\n" for name, value in self._get_proxy_headers(proxy).items())
+                await loop.sock_sendall(tunnel, f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+                                                f"{headers}\r\n".encode("latin-1"))
+                answer = b""
+                # nothing else comes before the handshake, so the answer ends with its headers
+                while b"\r\n\r\n" not in answer:
+                    data = await loop.sock_recv(tunnel, 4096)
+                    if len(data) == 0:
+                        raise ConnectionError("The proxy closed the connection")
+                    answer += data
+                status_line = answer.split(b"\r\n", 1)[0].decode("latin-1")
+                if len(status_line.split()) < 2 or status_line.split()[1] != "200":
+                    raise ConnectionError(f"The proxy refused the tunnel: {status_line}")
+                return tunnel
+            except BaseException as ex:
+                tunnel.close()
+                if not isinstance(ex, OSError):
+                    raise
+                error = ex
+        raise ConnectionError(error)
+
+    @staticmethod
+    async def _exchange(connection: Connection, request: bytes) -> Tuple[HttpResponse, bool]:
+        """Sends the request and reads the response, returns it along with whether the connection can be reused"""
+        reader, writer = connection
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        if len(status_line) == 0:
+            raise ConnectionResetError("The server closed the connection")
+        version, status = status_line.decode("latin-1").split(None, 2)[:2]
+        headers: Dict[str, str] = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            name = name.strip().lower()
+            headers[name] = f"{headers[name]}, {value.strip()}" if name in headers else value.strip()
+        connection_header = headers.get("connection", "").lower()
+        keep_alive = "close" not in connection_header if version == "HTTP/1.1" else "keep-alive" in connection_header
+        if status.startswith("1") or status in ("204", "304"):
+            content = b""
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            parts: List[bytes] = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # the trailers end with an empty line
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            content = b"".join(parts)
+        elif "content-length" in headers:
+            content = await reader.readexactly(int(headers["content-length"]))
+        else:
+            # the body ends when the server closes the connection
+            content = await reader.read()
+            keep_alive = False
+        encoding = headers.get("content-encoding", "").lower()
+        if encoding == "gzip":
+            content = zlib.decompress(content, 16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            try:
+                content = zlib.decompress(content)
+            except zlib.error:
+                content = zlib.decompress(content, -zlib.MAX_WBITS)
+        return HttpResponse(int(status), headers, content), keep_alive
+
+    def _get_proxy(self, scheme: str, host: str) -> Optional[str]:
+        if self.proxies:
+            return self.proxies.get(scheme)
+        proxy = getproxies().get(scheme)
+        return proxy if proxy and not proxy_bypass(host) else None
+
+    @staticmethod
+    def _get_proxy_headers(proxy: str) -> Dict[str, str]:
+        parts = urlsplit(proxy)
+        if parts.username is None:
+            return {}
+        credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}".encode("utf-8")
+        return {"Proxy-Authorization": "Basic " + b64encode(credentials).decode("ascii")}
@@ -0,0 +1,192 @@
+"""
+This module provides a monitor that runs the clipboard-to-translation pipeline
+as coroutines of an asyncio loop driven by the Qt event loop, so that the
+changes are coalesced and the translations requested without a thread per
+request.
+"""
+
+import asyncio
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from PyQt5.QtWidgets import QApplication
+
+from transclip.clipboard import paste
+from transclip.config import config
+from transclip.eventloop import loop_bridge
+from transclip.executor import TranslationJob, current_job, progress_listener
+from transclip.impl import AbstractMonitor, AbstractTranslator
+from transclip.logger import logger
+from transclip.monitor import Monitor, EVENT_BACKEND
+from transclip.translation import TranslationCancelledException
+from transclip.util import locale
+
+# Pipelines available to run the monitor
+THREAD_PIPELINE = "thread"
+ASYNC_PIPELINE = "async"
+
+
+class AsyncMonitor(Monitor):
+    """
+        Runs detection, formatting, cache lookup, translation and copy back
+        as coroutines of the asyncio loop that the Qt event loop drives, in
+        the thread of the window: the thread of Monitor is never started and
+        the signals are the same ones. The chunks and the additional targets
+        of a text are requests in flight at the same time, sent to Google by
+        a non-blocking client, and a new clipboard content cancels them. The
+        translators without such a client (the routing of several providers)
+        run in the default executor of the loop, as do the clipboard reads
+        of the polling backend, which may spawn a process.
+    """
+
+    def __init__(self, owner):
+        super(AsyncMonitor, self).__init__(owner)
+        self.loop = loop_bridge.loop
+        self.__lock = Lock()
+        self.__generation: int = 0
+        self.__changes: Optional[asyncio.Queue] = None
+        self.__listener: Optional[asyncio.Task] = None
+        self.__task: Optional[asyncio.Task] = None
+        if self.watcher is not None:
+            # the changes are handed to the loop instead of the queue of the threaded monitor
+            self.watcher.changed.disconnect()
+            self.watcher.changed.connect(self._on_changed)
+
+    def invoke_translate(self, actual: str):
+        """Starts the translation task of the text, cancelling the previous one"""
+        self.source.emit(actual)
+        self.target.emit(locale.value("TRANSLATING"))
+        self._emit_targets({}, locale.value("TRANSLATING"))
+        self._cancel_task()
+        with self.__lock:
+            self._job = TranslationJob(self.__generation, actual)
+        self.__task = self.loop.create_task(self._pipeline(self._job))
+
+    def _skip(self, clipboard_content: str, same_language: bool = False) -> None:
+        self._cancel_task()
+        super(AsyncMonitor, self)._skip(clipboard_content, same_language)
+
+    async def _listen_async(self) -> None:
+        """Waits for the changes reported by the clipboard watcher"""
+        while self.is_running():
+            clipboard_content = await self.__changes.get()
+            if self._must_coalesce(clipboard_content):
+                clipboard_content = await self._coalesce_async(clipboard_content)
+            if self.is_running():
+                self.process(clipboard_content)
+
+    async def _coalesce_async(self, clipboard_content: str) -> str:
+        """Waits for the coalesce window to finish and returns the last content reported"""
+        deadline = self.loop.time() + float(self.coalesce_time)
+        while self.is_running() and self.loop.time() < deadline:
+            try:
+                newer_content = await asyncio.wait_for(self.__changes.get(), max(deadline - self.loop.time(), 0))
+            except asyncio.TimeoutError:
+                break
+            if newer_content != clipboard_content:
+                self._avoid()
+                clipboard_content = newer_content
+        return clipboard_content
+
+    async def _poll_async(self) -> None:
+        """Fallback backend, reads the clipboard every interval"""
+        while self.is_running():
+            clipboard_content = await self.loop.run_in_executor(None, paste)
+            if self._must_coalesce(clipboard_content):
+                deadline = self.loop.time() + float(self.coalesce_time)
+                while self.is_running() and self.loop.time() < deadline:
+                    await asyncio.sleep(min(float(self.interval_time), max(deadline - self.loop.time(), 0)))
+                    newer_content = await self.loop.run_in_executor(None, paste)
+                    if newer_content != clipboard_content:
+                        self._avoid()
+                        clipboard_content = newer_content
+            self.process(clipboard_content)
+            await asyncio.sleep(float(self.interval_time))
+
+    async def _pipeline(self, job: TranslationJob) -> None:
+        """Translates the text of the job and copies the result if no newer job replaced it"""
+        # the requests of the translators run in tasks that inherit the job
+        current_job.set(job)
+        try:
+            others = self._get_target_translators(job.text)
+            results = await asyncio.gather(self._translate_async(job, self.translator, report=True),
+                                           *(self._translate_async(job, translator) for translator in others.values()))
+            result: Tuple[Optional[str], Dict[str, Optional[str]]] = (results[0], dict(zip(others, results[1:])))
+            # the generation changes under the same lock, as in TranslationExecutor
+            with self.__lock:
+                if self._is_latest(job):
+                    self._on_translated(job, result)
+        except asyncio.CancelledError:
+            pass
+        except Exception as ex:
+            logger.error(ex)
+        finally:
+            job.finish()
+
+    async def _translate_async(self, job: TranslationJob, translator: Optional[AbstractTranslator],
+                               report: bool = False) -> Optional[str]:
+        """
+            Hands the whole text to the translator, so the cache entry of the
+            text and the language check apply to texts of any size. With
+            report, the translated parts are emitted in order as they arrive.
+        """
+        if translator is None:
+            return job.text
+        progress_listener.set(self._get_progress_listener(job) if report else None)
+        try:
+            return await translator.translate_async(job.text)
+        except TranslationCancelledException:
+            return None
+        except Exception as ex:
+            logger.error(ex)
+            return None
+
+    def _is_latest(self, job: TranslationJob) -> bool:
+        return job.generation == self.__generation and not job.is_cancelled()
+
+    def _cancel_task(self) -> None:
+        with self.__lock:
+            self.__generation += 1
+            if self._job is not None:
+                self._job.cancel()
+        if self.__task is not None and not self.__task.done():
+            self.__task.cancel()
+
+    def _copy(self, text: str) -> None:
+        # the loop runs in the thread of the window, which writes the clipboard without spawning any process
+        QApplication.clipboard().setText(text)
+
+    def _on_changed(self, clipboard_content: str) -> None:
+        """Receives the watcher notifications and hands them to the loop"""
+        if self.__changes is not None:
+            self.__changes.put_nowait(clipboard_content)
+            loop_bridge.wake()
+
+    def start_monitoring(self):
+        AbstractMonitor.start_monitoring(self)
+        self.__changes = asyncio.Queue()
+        if self.watcher is not None:
+            self.__changes.put_nowait(self.watcher.text())
+            self.watcher.start()
+        self.__listener = self.loop.create_task(self._listen_async() if self.backend == EVENT_BACKEND
+                                                else self._poll_async())
+        loop_bridge.wake()
+
+    def stop_monitoring(self):
+        AbstractMonitor.stop_monitoring(self)
+        for key, callback in self._subscriptions.items():
+            config.unsubscribe(key, callback)
+        self.executor.shutdown()
+        if self.watcher is not None:
+            self.watcher.stop()
+        self._cancel_task()
+        if self.__listener is not None:
+            self.__listener.cancel()
+        loop_bridge.wake()
+
+
+def create_monitor(owner) -> Monitor:
+    """Returns the monitor of the pipeline selected in the settings"""
+    if config.get("monitor.pipeline") == ASYNC_PIPELINE:
+        return AsyncMonitor(owner)
+    return Monitor(owner)
@@ -0,0 +1,140 @@
+"""
+This module provides the rate limiter placed in front of the online
+translators, so that the requests stay below the ceiling the provider allows
+instead of alternating between bursts and throttling errors.
+"""
+
+import asyncio
+import heapq
+from itertools import count
+from threading import Condition
+from time import monotonic
+from typing import Callable, List, Optional, Tuple
+
+from transclip.config import config
+
+
+class RateLimiter:
+    """
+        Token bucket whose refill rate adapts to the provider: it grows
+        slowly while the requests succeed and is halved every time the
+        provider throttles them (additive increase, multiplicative decrease).
+        The requests waiting for a token are served by priority, so the
+        newest clipboard content goes first.
+    """
+
+    def __init__(self, rate: float = 5.0, capacity: float = 10.0, min_rate: float = 0.2,
+                 increase: float = 0.05, cooldown: float = 2.0):
+        """The rate is given in requests per second and the capacity is the largest burst allowed"""
+        super(RateLimiter, self).__init__()
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.increase = increase
+        self.cooldown = cooldown
+        self.tokens: float = capacity
+        self.listener: Optional[Callable[[float, float], None]] = None
+        self.__updated = monotonic()
+        self.__paused_until: float = 0.0
+        self.__waiting: List[Tuple[int, int]] = []
+        self.__sequence = count()
+        self.__condition = Condition()
+
+    def acquire(self, priority: int = 0, is_cancelled: Callable[[], bool] = None) -> bool:
+        """
+            Blocks until a token is available for the request and takes it.
+            Returns False without taking it if the request was cancelled
+            while waiting.
+        """
+        ticket = (-priority, next(self.__sequence))
+        with self.__condition:
+            heapq.heappush(self.__waiting, ticket)
+            try:
+                while True:
+                    if is_cancelled is not None and is_cancelled():
+                        return False
+                    wait_time = self._wait_time()
+                    if self.__waiting[0] == ticket and wait_time <= 0:
+                        self.tokens -= 1
+                        break
+                    # the waiters are woken up on every release, the timeout covers the refill
+                    self.__condition.wait(timeout=min(max(wait_time, 0.01), 0.25))
+            finally:
+                self.__waiting.remove(ticket)
+                heapq.heapify(self.__waiting)
+                self.__condition.notify_all()
+        self._notify()
+        return True
+
+    async def acquire_async(self, priority: int = 0, is_cancelled: Callable[[], bool] = None) -> bool:
+        """
+            Same as acquire, waiting as a coroutine of the running loop. The
+            request keeps its place among the blocking ones while it waits.
+        """
+        ticket = (-priority, next(self.__sequence))
+        with self.__condition:
+            heapq.heappush(self.__waiting, ticket)
+        try:
+            while True:
+                if is_cancelled is not None and is_cancelled():
+                    return False
+                with self.__condition:
+                    wait_time = self._wait_time()
+                    if self.__waiting[0] == ticket and wait_time <= 0:
+                        self.tokens -= 1
+                        break
+                await asyncio.sleep(min(max(wait_time, 0.01), 0.25))
+        finally:
+            with self.__condition:
+                self.__waiting.remove(ticket)
+                heapq.heapify(self.__waiting)
+                self.__condition.notify_all()
+        self._notify()
+        return True
+
+    def succeed(self) -> None:
+        """Raises the rate a little after a request accepted by the provider"""
+        with self.__condition:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+        self._notify()
+
+    def throttle(self) -> None:
+        """Halves the rate and stops the requests for a while after the provider rejected one"""
+        with self.__condition:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            self.__paused_until = monotonic() + self.cooldown
+        self._notify()
+
+    def budget(self) -> Tuple[float, float]:
+        """Returns the tokens available and the current rate"""
+        with self.__condition:
+            self._refill()
+            return self.tokens, self.rate
+
+    def _wait_time(self) -> float:
+        """Returns the seconds left until a token is available, must be called with the lock held"""
+        self._refill()
+        now = monotonic()
+        if now < self.__paused_until:
+            return self.__paused_until - now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def _refill(self) -> None:
+        now = monotonic()
+        if now > self.__paused_until:
+            self.tokens = min(self.capacity, self.tokens + (now - max(self.__updated, self.__paused_until)) * self.rate)
+        self.__updated = now
+
+    def _notify(self) -> None:
+        if self.listener is not None:
+            tokens, rate = self.budget()
+            self.listener(tokens, rate)
+
+
+rate_limiter = None
+if rate_limiter is None:
+    rate_limiter = RateLimiter(rate=config.get_float("translator.rate") or 5.0,
+                               capacity=config.get_float("translator.burst") or 10.0)
@@ -0,0 +1,144 @@
+"""
+This module provides a translator that routes every request to the fastest
+healthy provider among several, hedging the slow requests with a second one.
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from threading import Lock
+from time import monotonic
+from typing import Callable, Dict, List, Optional
+
+from transclip.impl import AbstractTranslator
+from transclip.logger import logger
+
+
+class ProviderStats:
+    """Keeps the latencies of the last requests answered by a provider and its health"""
+
+    def __init__(self, window: int = 50, cooldown: float = 5.0):
+        """A provider that fails is left out of the routing during the cooldown, doubled on every failure"""
+        super(ProviderStats, self).__init__()
+        self.cooldown = cooldown
+        self.failures: int = 0
+        self.__latencies: deque = deque(maxlen=window)
+        self.__down_until: float = 0.0
+        self.__lock = Lock()
+
+    def record_success(self, latency: float) -> None:
+        with self.__lock:
+            self.__latencies.append(latency)
+            self.failures = 0
+            self.__down_until = 0.0
+
+    def record_failure(self) -> None:
+        with self.__lock:
+            self.failures += 1
+            self.__down_until = monotonic() + self.cooldown * 2 ** min(self.failures - 1, 5)
+
+    def is_healthy(self) -> bool:
+        return monotonic() >= self.__down_until
+
+    def percentile(self, percent: float) -> float:
+        """Returns the latency under which the given percent of the requests were answered, 0 without data"""
+        with self.__lock:
+            latencies = sorted(self.__latencies)
+        if len(latencies) == 0:
+            return 0.0
+        return latencies[min(int(round(percent / 100 * (len(latencies) - 1))), len(latencies) - 1)]
+
+
+class Provider(AbstractTranslator):
+    """Adapts any translator to the routing, along with the longest text it accepts"""
+
+    def __init__(self, name: str, translator: AbstractTranslator, max_chars: int = 5000):
+        super(Provider, self).__init__()
+        self.name = name
+        self.translator = translator
+        self.max_chars = max_chars
+
+    def translate(self, text: str) -> str:
+        return self.translator.translate(text)
+
+    def close(self) -> None:
+        self.translator.close()
+
+
+class FactoryTranslator(AbstractTranslator):
+    """
+        Builds a new translator for every request, used with the deep_translator
+        classes that keep the request state in the instance and therefore
+        cannot be shared between threads.
+    """
+
+    def __init__(self, factory: Callable[[], object]):
+        super(FactoryTranslator, self).__init__()
+        self.factory = factory
+
+    def translate(self, text: str) -> str:
+        return self.factory().translate(text)
+
+
+class RoutingTranslator(AbstractTranslator):
+    """
+        Sends each request to the healthy provider with the lowest median
+        latency. If it does not answer within the hedge delay, the same
+        request is sent to the next provider and the first answer wins.
+    """
+
+    def __init__(self, providers: List[Provider], hedge_delay: float = 0.4, window: int = 50):
+        """The providers are tried in the given order until they have latency data"""
+        super(RoutingTranslator, self).__init__()
+        self.providers = providers
+        self.hedge_delay = hedge_delay
+        self.stats: Dict[str, ProviderStats] = {provider.name: ProviderStats(window) for provider in providers}
+        self.__pool = ThreadPoolExecutor(max_workers=max(len(providers), 1) * 4, thread_name_prefix="provider")
+
+    def ranking(self, text: str = "") -> List[Provider]:
+        """Returns the providers able to take the text, healthy ones first, each group ordered by median latency"""
+        candidates = [provider for provider in self.providers if len(text) <= provider.max_chars]
+        return sorted(candidates, key=lambda provider: (not self.stats[provider.name].is_healthy(),
+                                                        self.stats[provider.name].percentile(50),
+                                                        self.stats[provider.name].percentile(95)))
+
+    def translate(self, text: str) -> str:
+        providers = self.ranking(text)
+        if len(providers) == 0:
+            raise ValueError(f"No provider accepts a text of {len(text)} characters")
+        pending = {self.__pool.submit(self._request, providers[0], text)}
+        index = 1
+        error: Optional[Exception] = None
+        while len(pending) > 0:
+            hedging = index < len(providers)
+            done, pending = wait(pending, timeout=self.hedge_delay if hedging else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as ex:
+                    error = ex
+            if hedging and (len(done) == 0 or len(pending) == 0):
+                # the hedge delay expired or every request in flight failed, the next provider is tried
+                pending.add(self.__pool.submit(self._request, providers[index], text))
+                index += 1
+        raise error
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Returns the p50 and p95 latencies of every provider"""
+        return {name: {"p50": stats.percentile(50), "p95": stats.percentile(95), "healthy": stats.is_healthy()}
+                for name, stats in self.stats.items()}
+
+    def close(self) -> None:
+        self.__pool.shutdown(wait=False)
+        for provider in self.providers:
+            provider.close()
+
+    def _request(self, provider: Provider, text: str) -> str:
+        started = monotonic()
+        try:
+            translated = provider.translate(text)
+        except Exception as ex:
+            self.stats[provider.name].record_failure()
+            logger.warning(f"Provider {provider.name} failed: {ex}")
+            raise
+        self.stats[provider.name].record_success(monotonic() - started)
+        return translated
@@ -0,0 +1,114 @@
+"""
+This module splits the formatted texts into the segments (sentences and
+paragraphs) that are translated and cached independently.
+"""
+
+import re
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+# A segment ends at a line break or at the whitespace that follows a sentence terminator
+SEGMENT_BOUNDARY = re.compile(r"(\s*\n\s*|(?<=[.!?])\s+)")
+
+# Boundaries tried in order to split a text that does not fit in a single request
+CHUNK_BOUNDARIES = (re.compile(r"(\n\s*\n\s*)"), SEGMENT_BOUNDARY, re.compile(r"(\s+)"))
+
+
+def split_segments(text: str) -> Tuple[List[str], List[str]]:
+    """
+        Splits a text into its segments and the separators between them,
+        the separators keep the original whitespace so that the text can be
+        rebuilt exactly with join_segments.
+    """
+    parts = SEGMENT_BOUNDARY.split(text)
+    return parts[0::2], parts[1::2]
+
+
+def join_segments(segments: List[str], separators: List[str]) -> str:
+    """Rebuilds a text from its segments and separators"""
+    buffer = [segments[0]] if len(segments) > 0 else []
+    for separator, segment in zip(separators, segments[1:]):
+        buffer.append(separator)
+        buffer.append(segment)
+    return "".join(buffer)
+
+
+class PrefixJoiner:
+    """
+        Rebuilds a text from parts that are translated in any order. Every
+        time the part complete from the start of the text grows, the listener
+        receives how many parts are complete, the total and the new text with
+        its separators, so that appending each new text gives join_segments.
+    """
+
+    def __init__(self, separators: List[str], listener: Callable[[int, int, str], None]):
+        super(PrefixJoiner, self).__init__()
+        self.separators = separators
+        self.total = len(separators) + 1
+        self.listener = listener
+        self.__parts: List[Optional[str]] = [None] * self.total
+        self.__complete = 0
+        self.__lock = Lock()
+
+    def put(self, parts: Dict[int, str]) -> None:
+        """Stores the parts given by their position and reports the new prefix, if any"""
+        with self.__lock:
+            for index, part in parts.items():
+                self.__parts[index] = part
+            start = self.__complete
+            while self.__complete < self.total and self.__parts[self.__complete] is not None:
+                self.__complete += 1
+            if self.__complete > start:
+                buffer = []
+                for index in range(start, self.__complete):
+                    if index > 0:
+                        buffer.append(self.separators[index - 1])
+                    buffer.append(self.__parts[index])
+                # reported while locked, so that the texts arrive in order
+                self.listener(self.__complete, self.total, "".join(buffer))
+
+
+def split_chunks(text: str, limit: int, level: int = 0) -> Tuple[List[str], List[str]]:
+    """
+        Splits a text into chunks of at most limit characters, preferring
+        paragraph boundaries, then sentences, then whitespace. Consecutive
+        pieces are packed together while they fit, so the text is sent in as
+        few requests as possible. Like split_segments, it returns the chunks
+        and the separators between them.
+    """
+    if len(text) <= limit:
+        return [text], []
+    if level == len(CHUNK_BOUNDARIES):
+        pieces = [text[index:index + limit] for index in range(0, len(text), limit)]
+        return pieces, [""] * (len(pieces) - 1)
+    parts = CHUNK_BOUNDARIES[level].split(text)
+    chunks: List[str] = []
+    separators: List[str] = []
+    current = None
+    for index, piece in enumerate(parts[0::2]):
+        pieces, inner_separators = split_chunks(piece, limit, level + 1)
+        for position, sub_piece in enumerate(pieces):
+            joiner = parts[2 * index - 1] if position == 0 else inner_separators[position - 1]
+            if current is not None and len(current) + len(joiner) + len(sub_piece) <= limit:
+                current += joiner + sub_piece
+            else:
+                if current is not None:
+                    chunks.append(current)
+                    separators.append(joiner)
+                current = sub_piece
+    chunks.append(current)
+    return chunks, separators
+
+
+def pack_segments(segments: List[str], limit: int, delimiter: str = "\n") -> List[List[str]]:
+    """Groups consecutive segments so that each group joined by the delimiter fits in limit characters"""
+    groups: List[List[str]] = []
+    size = 0
+    for segment in segments:
+        if len(groups) > 0 and size + len(delimiter) + len(segment) <= limit:
+            groups[-1].append(segment)
+            size += len(delimiter) + len(segment)
+        else:
+            groups.append([segment])
+            size = len(segment)
+    return groups
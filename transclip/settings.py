@@ -6,14 +6,10 @@ from PyQt5.QtWidgets import QComboBox, QPushButton, QLabel, QDoubleSpinBox, QToo
 from PyQt5.QtWidgets import QDialog, QMessageBox, QFileDialog
 from PyQt5.QtWidgets import QGridLayout, QVBoxLayout, QHBoxLayout
 
-from os.path import join, isfile
-from json import load
-from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
-
-from transclip.config import config
+from transclip.config import config, parse_list
 from transclip.dialog import show_question_dialog, show_warning_dialog, show_error_dialog, show_info_dialog
 from transclip.logger import logger
-from transclip.util import locale, resources_path, svg_loader
+from transclip.util import locale, resource_cache, resources_path, svg_loader
 
 
 # noinspection PyAttributeOutsideInit
@@ -24,7 +20,7 @@ class SettingsAssistant(QDialog):
         super(SettingsAssistant, self).__init__(parent)
         self.setWindowTitle(locale.value("TRANSCLIP_SETTINGS_TITLE"))
         # self.resize(300, 200)
-        self.setFixedSize(350, 250)
+        self.setFixedSize(350, 340)
 
         self.dialog_layout = QVBoxLayout()
         self.setLayout(self.dialog_layout)
@@ -44,23 +40,33 @@ class SettingsAssistant(QDialog):
         self.widgets_layout.addWidget(QLabel(locale.value("TARGET_LABEL_TEXT")), 1, 0)
         self.widgets_layout.addWidget(self._get_targets(), 1, 1)
 
+        self.widgets_layout.addWidget(QLabel(locale.value("TARGETS_LABEL_TEXT")), 2, 0)
+        self.widgets_layout.addWidget(self._get_additional_targets(), 2, 1)
+
         self.widgets_layout.addWidget(
-            QLabel(locale.value("DELAY_LABEL_TEXT") + " (" + locale.value("TRANSCLIP_SECONDS") + ")"), 2, 0)
-        self.widgets_layout.addWidget(self._get_monitor_delay(), 2, 1)
+            QLabel(locale.value("DELAY_LABEL_TEXT") + " (" + locale.value("TRANSCLIP_SECONDS") + ")"), 3, 0)
+        self.widgets_layout.addWidget(self._get_monitor_delay(), 3, 1)
+
+        self.widgets_layout.addWidget(
+            QLabel(locale.value("COALESCE_LABEL_TEXT") + " (" + locale.value("TRANSCLIP_SECONDS") + ")"), 4, 0)
+        self.widgets_layout.addWidget(self._get_monitor_coalesce(), 4, 1)
+
+        self.widgets_layout.addWidget(QLabel(locale.value("TRANSCLIP_BACKEND")), 5, 0)
+        self.widgets_layout.addWidget(self._get_backends(), 5, 1)
 
     def start_additional_widgets(self):
         """ Settings for theme and lang """
-        self.widgets_layout.addWidget(QLabel(locale.value("TRANSCLIP_LOCALE_LANG")), 3, 0)
-        self.widgets_layout.addWidget(self._get_locales(), 3, 1)
+        self.widgets_layout.addWidget(QLabel(locale.value("TRANSCLIP_LOCALE_LANG")), 6, 0)
+        self.widgets_layout.addWidget(self._get_locales(), 6, 1)
 
-        self.widgets_layout.addWidget(QLabel(locale.value("TRANSCLIP_GLOBAL_THEME")), 4, 0)
-        self.widgets_layout.addWidget(self._get_themes(), 4, 1)
+        self.widgets_layout.addWidget(QLabel(locale.value("TRANSCLIP_GLOBAL_THEME")), 7, 0)
+        self.widgets_layout.addWidget(self._get_themes(), 7, 1)
 
-        self.widgets_layout.addWidget(QLabel(locale.value("TRANSCLIP_ORIGINAL_TEXT")), 5, 0)
-        self.widgets_layout.addWidget(self._get_source_options(), 5, 1)
+        self.widgets_layout.addWidget(QLabel(locale.value("TRANSCLIP_ORIGINAL_TEXT")), 8, 0)
+        self.widgets_layout.addWidget(self._get_source_options(), 8, 1)
 
-        self.widgets_layout.addWidget(QLabel(locale.value("TRANSCLIP_RESOURCE_PATH")), 6, 0)
-        self.widgets_layout.addLayout(self._get_resources_path(), 6, 1)
+        self.widgets_layout.addWidget(QLabel(locale.value("TRANSCLIP_RESOURCE_PATH")), 9, 0)
+        self.widgets_layout.addLayout(self._get_resources_path(), 9, 1)
 
     def start_settings_option(self):
         foot_layout = QHBoxLayout()
@@ -76,11 +82,18 @@ class SettingsAssistant(QDialog):
         self.dialog_layout.addLayout(foot_layout)
 
     def save_changes(self):
-        if self._have_changes():
+        unknown = self._unknown_targets()
+        if len(unknown) > 0:
+            show_error_dialog(self, title=locale.value("TRANSCLIP_WARNING"),
+                              message=f"{locale.value('TRANSCLIP_UNKNOWN_LANGUAGES')}: {', '.join(unknown)}")
+        elif self._have_changes():
             config.clean_to_save()
             config.add_to_save(key="translator.source", value=self.source_combo.currentText())
             config.add_to_save(key="translator.target", value=self.target_combo.currentText())
-            config.add_to_save(key="monitor.interval", value=self.delay_selector.text())
+            config.add_to_save(key="translator.targets", value=",".join(self._get_targets_list()))
+            config.add_to_save(key="monitor.interval", value=str(self.delay_selector.value()))
+            config.add_to_save(key="monitor.coalesce", value=str(self.coalesce_selector.value()))
+            config.add_to_save(key="translator.backend", value=self.backend_combo.currentText())
             config.add_to_save(key="transclip.locale", value=self.locale_combo.currentText())
             config.add_to_save(key="transclip.theme", value=self.theme_combo.currentText())
             config.add_to_save(key="editext.source.view", value="True" if self.text_source_combo.currentText() == locale.value("TRANSCLIP_YES_OPTION") else "False")
@@ -89,7 +102,6 @@ class SettingsAssistant(QDialog):
             if not save_state:  # Checking not error occurred
                 show_info_dialog(self, title=locale.value("TRANSCLIP_SAVE_SUCCESS_TITLE"),
                                  message=locale.value("TRANSCLIP_SAVE_SUCCESS_MESSAGE"))
-                config.load()
                 self.close()
             else:
                 show_error_dialog(self, title=locale.value("TRANSCLIP_SAVE_ERROR_TITLE"),
@@ -99,14 +111,17 @@ class SettingsAssistant(QDialog):
                                 message=locale.value("TRANSCLIP_UNCHANGED"), buttons=False)
 
     def _get_sources(self) -> QComboBox:
+        from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
         current_source = config.get("translator.source")
-        sources = list(GOOGLE_LANGUAGES_TO_CODES.keys())
+        # with auto, the source language is identified for every text
+        sources = ["auto"] + list(GOOGLE_LANGUAGES_TO_CODES.keys())
         self.source_combo = QComboBox()
         self.source_combo.addItems(sources)
         self.source_combo.setCurrentIndex(sources.index(current_source))
         return self.source_combo
 
     def _get_targets(self) -> QComboBox:
+        from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
         current_target = config.get("translator.target")
         targets = list(GOOGLE_LANGUAGES_TO_CODES.keys())
         self.target_combo = QComboBox()
@@ -114,6 +129,20 @@ class SettingsAssistant(QDialog):
         self.target_combo.setCurrentIndex(targets.index(current_target))
         return self.target_combo
 
+    def _get_additional_targets(self) -> QLineEdit:
+        self.targets_input = QLineEdit()
+        self.targets_input.setText(", ".join(config.get_list("translator.targets")))
+        self.targets_input.setPlaceholderText(locale.value("TARGETS_PLACEHOLDER_TEXT"))
+        return self.targets_input
+
+    def _get_targets_list(self) -> list:
+        """Returns the additional languages written, in lower case and without repetitions"""
+        return list(dict.fromkeys(language.lower() for language in parse_list(self.targets_input.text())))
+
+    def _unknown_targets(self) -> list:
+        from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
+        return [language for language in self._get_targets_list() if language not in GOOGLE_LANGUAGES_TO_CODES]
+
     def _get_monitor_delay(self) -> QDoubleSpinBox:
         self.delay_selector = QDoubleSpinBox()
         self.delay_selector.setValue(config.get_float("monitor.interval"))
@@ -121,13 +150,24 @@ class SettingsAssistant(QDialog):
         self.delay_selector.setSingleStep(0.1)
         return self.delay_selector
 
+    def _get_monitor_coalesce(self) -> QDoubleSpinBox:
+        self.coalesce_selector = QDoubleSpinBox()
+        self.coalesce_selector.setValue(config.get_float("monitor.coalesce"))
+        self.coalesce_selector.setDecimals(1)
+        self.coalesce_selector.setSingleStep(0.1)
+        return self.coalesce_selector
+
+    def _get_backends(self) -> QComboBox:
+        backends = ["google", "local", "routing"]
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItems(backends)
+        current_backend = config.get("translator.backend")
+        self.backend_combo.setCurrentIndex(backends.index(current_backend) if current_backend in backends else 0)
+        return self.backend_combo
+
     def _get_themes(self) -> QComboBox:
         # config.get("transclip.style")
-        theme_list = join(resources_path(), "styles", "index.json")
-        themes = {}
-        if isfile(theme_list):
-            with open(theme_list, mode="r", encoding="utf-8") as theme_file:
-                themes = load(theme_file)
+        themes = resource_cache.json("styles/index.json", {})
 
         self.theme_combo = QComboBox()
         themes_list = list(themes.keys())
@@ -186,12 +226,16 @@ class SettingsAssistant(QDialog):
     def _have_changes(self) -> bool:
         source_changed = config.get("translator.source") != self.source_combo.currentText()
         target_changed = config.get("translator.target") != self.target_combo.currentText()
-        delay_changed = config.get("monitor.interval") != self.delay_selector.text()
+        targets_changed = config.get_list("translator.targets") != self._get_targets_list()
+        delay_changed = config.get_float("monitor.interval") != self.delay_selector.value()
+        coalesce_changed = config.get_float("monitor.coalesce") != self.coalesce_selector.value()
+        backend_changed = config.get("translator.backend") != self.backend_combo.currentText()
         lang_changed = config.get("transclip.locale") != self.locale_combo.currentText()
         theme_changed = config.get("transclip.theme") != self.theme_combo.currentText()
         source_view_changed = config.get("editext.source.view") != ("True" if self.text_source_combo.currentText() == locale.value("TRANSCLIP_YES_OPTION") else "False")
         resources_dir_changed = resources_path() != self.resources_path_input.text()
-        return source_changed or target_changed or delay_changed or lang_changed or theme_changed or source_view_changed or resources_dir_changed
+        return source_changed or target_changed or targets_changed or delay_changed or coalesce_changed or backend_changed or \
+            lang_changed or theme_changed or source_view_changed or resources_dir_changed
 
     def closeEvent(self, event: QCloseEvent) -> None:
         if self._have_changes():
@@ -0,0 +1,87 @@
+"""
+This module provides the text boxes that show the clipboard content and its
+translations, they load long texts in slices so the window keeps responding.
+"""
+
+from collections import deque
+from typing import Deque
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QPlainTextEdit, QTextEdit
+
+from transclip.config import config
+
+# Characters inserted in each iteration of the event loop, small enough to be laid out within a frame
+SLICE_SIZE = 32 * 1024
+
+
+class ProgressiveText:
+    """
+        Fills a text box in slices from the event loop instead of at once.
+        A new text replaces the one still being loaded and the appended ones
+        are queued after it, so the text box always ends up with the whole
+        content in order.
+    """
+
+    def __init__(self):
+        self.__pending: Deque[str] = deque()
+        self.__timer = QTimer()
+        self.__timer.setInterval(0)
+        self.__timer.timeout.connect(self._insert_slice)
+
+    def set_text(self, text: str):
+        """Replaces the content, the part that does not fit in a slice is inserted in the next iterations"""
+        self.__pending.clear()
+        self.setPlainText(text[:SLICE_SIZE])
+        self._queue(text[SLICE_SIZE:])
+
+    def append_text(self, text: str):
+        """Adds the text after the current content, or after the one still being loaded"""
+        if len(self.__pending) == 0 and len(text) <= SLICE_SIZE:
+            self._insert(text)
+        else:
+            self._queue(text)
+
+    def is_loading(self) -> bool:
+        return len(self.__pending) > 0
+
+    def _queue(self, text: str):
+        for start in range(0, len(text), SLICE_SIZE):
+            self.__pending.append(text[start:start + SLICE_SIZE])
+        if len(self.__pending) > 0 and not self.__timer.isActive():
+            # the slices inserted do not fill the undo history, set_text clears it anyway
+            self.document().setUndoRedoEnabled(False)
+            self.__timer.start()
+
+    def _insert_slice(self):
+        if len(self.__pending) > 0:
+            self._insert(self.__pending.popleft())
+        if len(self.__pending) == 0:
+            self.__timer.stop()
+            self.document().setUndoRedoEnabled(True)
+
+    def _insert(self, text: str):
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+
+
+class PlainTextPane(QPlainTextEdit, ProgressiveText):
+    """Lays out only the visible paragraphs, the default for the panes of the main window"""
+
+    def __init__(self):
+        QPlainTextEdit.__init__(self)
+        ProgressiveText.__init__(self)
+
+
+class RichTextPane(QTextEdit, ProgressiveText):
+
+    def __init__(self):
+        QTextEdit.__init__(self)
+        ProgressiveText.__init__(self)
+
+
+def create_text_pane():
+    """Returns the text box used by the panes of the main window, as configured in editext.plain.view"""
+    return PlainTextPane() if config.get_bool("editext.plain.view") else RichTextPane()
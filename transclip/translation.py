@@ -2,7 +2,47 @@
 This module provides all the necessary functionality to work with translation.
 """
 
-from deep_translator import GoogleTranslator
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from json import load
+from os.path import isfile, join
+from threading import Lock
+from time import sleep
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from deep_translator import GoogleTranslator, MyMemoryTranslator
+from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
+from deep_translator.exceptions import RequestError, TooManyRequests, TranslationNotFound
+from deep_translator.validate import is_empty, is_input_valid, request_failed
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+from transclip.cache import TranslationCache
+from transclip.config import config
+from transclip.executor import current_job, progress_listener
+from transclip.homedir import get_home_path
+from transclip.impl import AbstractTranslator
+from transclip.langid import language_identifier
+from transclip.logger import logger
+from transclip.network import AsyncHttpClient
+from transclip.ratelimit import RateLimiter, rate_limiter
+from transclip.routing import FactoryTranslator, Provider, RoutingTranslator
+from transclip.segments import PrefixJoiner, split_segments, join_segments, split_chunks, pack_segments
+from transclip.util import resources_path
+
+# Backends available to translate the texts
+GOOGLE_BACKEND = "google"
+LOCAL_BACKEND = "local"
+ROUTING_BACKEND = "routing"
+
+# Characters accepted by the provider in a single request
+CHUNK_LIMIT = 4500
+
+# Seconds to wait for the provider before giving up a request
+REQUEST_TIMEOUT = 10
 
 
 class TranslationException(Exception):
@@ -13,20 +53,609 @@ class TranslationException(Exception):
         super(TranslationException, self).__init__(args, kwargs)
 
 
-class PlainTextTranslator:
+class TranslationCancelledException(TranslationException):
+    """This exception is raised when the job that requested a translation was superseded"""
+
+    def __init__(self, *args, **kwargs):
+        super(TranslationCancelledException, self).__init__(*args, **kwargs)
+
+
+class PooledGoogleTranslator(GoogleTranslator, AbstractTranslator):
+    """
+        GoogleTranslator that sends its requests through a persistent session,
+        so the connection (DNS lookup and TLS handshake included) is reused
+        between translations. The request parameters are built per call,
+        which also allows the chunk pool to share the instance. The async
+        pipeline sends the same requests through a non-blocking client with
+        the headers of the session.
+
+        The request mirrors GoogleTranslator.translate of deep_translator
+        and reads the same private attributes (_base_url, _url_params and the
+        element queries), they must be checked when the dependency is
+        upgraded. Like upstream, a translation equal to the input is asked
+        again without the interface language (hl).
+    """
+
+    def __init__(self, source: str, target: str, session: Session = None, **kwargs):
+        """Uses the session given to send every request, or a new one with a connection pool per worker"""
+        super(PooledGoogleTranslator, self).__init__(source=source, target=target, **kwargs)
+        if session is None:
+            session = Session()
+            session.mount("https://", HTTPAdapter(pool_maxsize=config.get_int("translator.workers") or 4))
+        self.session = session
+        self.__client: Optional[AsyncHttpClient] = None
+
+    def translate(self, text: str, **kwargs) -> str:
+        if is_input_valid(text, max_chars=5000):
+            text = text.strip()
+            if self._same_source_target() or is_empty(text):
+                return text
+            params = self._get_params(text)
+            translated = self._request(params, text)
+            if translated == text and "hl" in params:
+                # Google may echo the text in the interface language, upstream retries once without it
+                del params["hl"]
+                translated = self._request(params, text)
+            return translated
+
+    async def translate_async(self, text: str, **kwargs) -> str:
+        if is_input_valid(text, max_chars=5000):
+            text = text.strip()
+            if self._same_source_target() or is_empty(text):
+                return text
+            params = self._get_params(text)
+            translated = await self._request_async(params, text)
+            if translated == text and "hl" in params:
+                del params["hl"]
+                translated = await self._request_async(params, text)
+            return translated
+
+    def _get_params(self, text: str) -> dict:
+        params = dict(self._url_params)
+        params.update({"tl": self._target, "sl": self._source, self.payload_key: text})
+        return params
+
+    def _request(self, params: dict, text: str) -> str:
+        response = self.session.get(self._base_url, params=params, proxies=self.proxies, timeout=REQUEST_TIMEOUT)
+        try:
+            return self._parse(response.status_code, response.text, text)
+        finally:
+            response.close()
+
+    async def _request_async(self, params: dict, text: str) -> str:
+        if self.__client is None:
+            headers = {name: value for name, value in self.session.headers.items()
+                       if name.lower() not in ("accept-encoding", "connection")}
+            self.__client = AsyncHttpClient(headers, self.proxies, config.get_int("translator.workers") or 4)
+        response = await self.__client.get(self._base_url, params=params, timeout=REQUEST_TIMEOUT)
+        # the page takes tens of milliseconds to parse, the loop goes on meanwhile
+        return await asyncio.get_running_loop().run_in_executor(None, self._parse, response.status, response.text,
+                                                                text)
+
+    def _parse(self, status_code: int, page: str, text: str) -> str:
+        """Returns the translation found in the page answered by Google"""
+        if status_code == 429:
+            raise TooManyRequests()
+        if request_failed(status_code=status_code):
+            raise RequestError()
+        soup = BeautifulSoup(page, "html.parser")
+        element = soup.find(self._element_tag, self._element_query)
+        if not element:
+            element = soup.find(self._element_tag, self._alt_element_query)
+            if not element:
+                raise TranslationNotFound(text)
+        return element.get_text(strip=True)
+
+    def close(self) -> None:
+        self.session.close()
+        if self.__client is not None:
+            self.__client.close()
+
+
+class LocalTranslator(AbstractTranslator):
+    """
+        Offline translator backed by a phrase table, the longest known phrase
+        is replaced at each position and the unknown words are kept as they
+        are. The tables are JSON objects named <source>-<target>.json, read
+        from the phrases folder of the resources and of the working directory.
+    """
+
+    def __init__(self, source: str, target: str, table: Dict[str, str] = None):
+        """Loads the phrase table of the language pair unless one is given"""
+        super(LocalTranslator, self).__init__()
+        self.source = source
+        self.target = target
+        self.table: Dict[str, str] = {}
+        for phrase, translation in (load_phrase_table(source, target) if table is None else table).items():
+            self.table[" ".join(phrase.split()).lower()] = translation
+        self.longest = max((len(phrase.split()) for phrase in self.table), default=0)
+
+    def translate(self, text: str) -> str:
+        stripped = text.strip()
+        phrase = " ".join(stripped.split()).lower()
+        if phrase in self.table:
+            return self._match_case(stripped, self.table[phrase])
+        tokens = TOKENS.findall(stripped)
+        buffer: List[str] = []
+        index = 0
+        while index < len(tokens):
+            length, translation = self._longest_phrase(tokens, index)
+            if length > 0:
+                buffer.append(self._match_case(tokens[index], translation))
+                index += length
+            else:
+                buffer.append(tokens[index])
+                index += 1
+        return "".join(buffer)
+
+    async def translate_async(self, text: str) -> str:
+        """The phrase table is in memory, the text is translated in the running loop"""
+        return self.translate(text)
+
+    def _longest_phrase(self, tokens: List[str], index: int) -> Tuple[int, str]:
+        """Returns the number of tokens covered by the longest known phrase starting at index"""
+        if tokens[index].isspace():
+            return 0, ""
+        words = 0
+        end = index
+        candidates = []
+        while end < len(tokens) and words < self.longest:
+            if not tokens[end].isspace():
+                words += 1
+                candidates.append(end + 1)
+            end += 1
+        for end in reversed(candidates):
+            phrase = "".join(" " if token.isspace() else token for token in tokens[index:end]).lower()
+            if phrase in self.table:
+                return end - index, self.table[phrase]
+        return 0, ""
+
+    @staticmethod
+    def _match_case(original: str, translation: str) -> str:
+        if len(original) > 0 and len(translation) > 0 and original[0].isupper():
+            return translation[0].upper() + translation[1:]
+        return translation
+
+
+# Words, punctuation and whitespace, the units replaced by the local translator
+TOKENS = re.compile(r"\w+|[^\w\s]|\s+")
+
+
+def load_phrase_table(source: str, target: str) -> Dict[str, str]:
+    """Reads the phrase tables of a language pair, the tables of the working directory take precedence"""
+    table: Dict[str, str] = {}
+    for folder in (join(resources_path(), "phrases"), join(get_home_path(), "phrases")):
+        file_path = join(folder, f"{source}-{target}.json")
+        if isfile(file_path):
+            try:
+                with open(file_path, mode="r", encoding="utf-8") as phrases:
+                    table.update(load(phrases))
+                logger.info(f"Phrase table found in: {file_path}")
+            except Exception as ex:
+                logger.error(ex)
+    if len(table) == 0:
+        logger.warning(f"No phrase table found for {source}-{target}")
+    return table
+
+
+class PlainTextTranslator(AbstractTranslator):
     """This class is used to translate plain text from one language to another."""
 
-    def __init__(self, source: str, target: str):
-        """Start the basic settings of the translator"""
+    def __init__(self, source: str, target: str, cache: TranslationCache = None, backend: AbstractTranslator = None,
+                 limiter: RateLimiter = None):
+        """Start the basic settings of the translator, by default the texts are sent to Google"""
         super(PlainTextTranslator, self).__init__()
+        self.source = source
+        self.target = target
+        self.cache = cache
+        self.limiter = limiter
+        self.chunk_limit = min(config.get_int("translator.chunk.size") or CHUNK_LIMIT, CHUNK_LIMIT)
+        self.retries = config.get_int("translator.retries")
         if source == target:
             self.__translator = None
             raise TranslationException()
+        elif backend is not None:
+            self.__translator = backend
         else:
-            self.__translator = GoogleTranslator(source=source, target=target)
+            self.__translator = PooledGoogleTranslator(source=source, target=target)
+
+    def close(self) -> None:
+        """Closes the connections kept by the translator"""
+        if self.__translator is not None:
+            self.__translator.close()
 
     def translate(self, text):
         if self.__translator is not None:
-            return self.__translator.translate(text)
+            if self.source == "auto" and language_identifier.detect(text) == self.target:
+                # the provider would return the same text
+                return text
+            # only the outer call reports the progress, the nested ones are parts of it
+            listener = progress_listener.get()
+            if self.cache is None:
+                return self._translate_text(text, listener=listener)
+            translated = self.cache.get(self.source, self.target, text)
+            if translated is None:
+                translated = self._translate_segments(text.strip(), listener)
+                self.cache.put(self.source, self.target, text, translated)
+            return translated
         else:
             return "Translation failed"
+
+    async def translate_async(self, text):
+        """
+            Same as translate, the chunks and segments are sent at the same
+            time as coroutines of the running loop, through the non-blocking
+            method of the backend.
+        """
+        if self.__translator is not None:
+            if self.source == "auto" and language_identifier.detect(text) == self.target:
+                return text
+            listener = progress_listener.get()
+            if self.cache is None:
+                return await self._translate_text_async(text, listener=listener)
+            translated = self.cache.get(self.source, self.target, text)
+            if translated is None:
+                translated = await self._translate_segments_async(text.strip(), listener)
+                self.cache.put(self.source, self.target, text, translated)
+            return translated
+        else:
+            return "Translation failed"
+
+    def _translate_text(self, text: str, parallel: bool = True, listener: Callable = None) -> str:
+        """Translates a text of any size, splitting it into chunks that are translated in parallel"""
+        chunks, separators = split_chunks(text, self.chunk_limit)
+        if len(chunks) == 1:
+            return self._translate_chunk(chunks[0])
+        joiner = PrefixJoiner(separators, listener) if listener is not None else None
+
+        def translate(index: int) -> Optional[str]:
+            translation = self._translate_chunk(chunks[index])
+            if joiner is not None:
+                joiner.put({index: translation or ""})
+            return translation
+
+        if parallel:
+            translated = parallel_map(translate, list(range(len(chunks))))
+        else:
+            # already running inside the pool, waiting on it could exhaust the workers
+            translated = [translate(index) for index in range(len(chunks))]
+        return join_segments([translation or "" for translation in translated], separators)
+
+    async def _translate_text_async(self, text: str, listener: Callable = None) -> str:
+        chunks, separators = split_chunks(text, self.chunk_limit)
+        if len(chunks) == 1:
+            return await self._translate_chunk_async(chunks[0])
+        joiner = PrefixJoiner(separators, listener) if listener is not None else None
+
+        async def translate(index: int) -> Optional[str]:
+            translation = await self._translate_chunk_async(chunks[index])
+            if joiner is not None:
+                joiner.put({index: translation or ""})
+            return translation
+
+        translated = await asyncio.gather(*(translate(index) for index in range(len(chunks))))
+        return join_segments([translation or "" for translation in translated], separators)
+
+    def _translate_chunk(self, chunk: str) -> str:
+        """Sends a single request to the provider, retrying it if it fails"""
+        attempt = 0
+        while True:
+            job = current_job.get()
+            if job is not None and job.is_cancelled():
+                raise TranslationCancelledException()
+            if self.limiter is not None and not self.limiter.acquire(*self._get_ticket(job)):
+                raise TranslationCancelledException()
+            try:
+                translated = self.__translator.translate(chunk)
+            except Exception as ex:
+                attempt += 1
+                sleep(self._get_retry_delay(ex, attempt))
+                continue
+            if self.limiter is not None:
+                self.limiter.succeed()
+            return translated
+
+    async def _translate_chunk_async(self, chunk: str) -> str:
+        attempt = 0
+        while True:
+            job = current_job.get()
+            if job is not None and job.is_cancelled():
+                raise TranslationCancelledException()
+            if self.limiter is not None and not await self.limiter.acquire_async(*self._get_ticket(job)):
+                raise TranslationCancelledException()
+            try:
+                translated = await self.__translator.translate_async(chunk)
+            except Exception as ex:
+                attempt += 1
+                await asyncio.sleep(self._get_retry_delay(ex, attempt))
+                continue
+            if self.limiter is not None:
+                self.limiter.succeed()
+            return translated
+
+    @staticmethod
+    def _get_ticket(job) -> Tuple[int, Optional[Callable[[], bool]]]:
+        """Returns the priority of the requests of the job in the limiter and the check of its cancellation"""
+        return (job.generation, job.is_cancelled) if job is not None else (0, None)
+
+    def _get_retry_delay(self, ex: Exception, attempt: int) -> float:
+        """Returns the seconds to wait before the attempt given, or raises the error once the retries are spent"""
+        if self.limiter is not None and isinstance(ex, (TooManyRequests, RequestError)):
+            self.limiter.throttle()
+        if attempt > self.retries:
+            raise ex
+        logger.warning(f"Retrying translation chunk ({attempt}/{self.retries}): {ex}")
+        return 0.25 * 2 ** attempt
+
+    def _translate_segments(self, text: str, listener: Callable = None) -> str:
+        """Translates only the segments of the text that are not in the cache and rebuilds it in order"""
+        segments, separators = split_segments(text)
+        translations, missing = self._lookup_segments(segments)
+        joiner, positions = self._start_joiner(segments, separators, translations, listener)
+
+        def translate(group: List[str]) -> Optional[List[str]]:
+            group_translations = self._translate_group(group)
+            self._put_group(joiner, positions, group, group_translations)
+            return group_translations
+
+        groups = pack_segments(list(missing), self.chunk_limit)
+        if len(groups) == 1:
+            translated = [translate(groups[0])]
+        else:
+            translated = parallel_map(translate, groups)
+        self._learn(groups, translated, translations)
+        if any(segment not in translations for segment in missing):
+            # the groups whose lines did not match are translated again as plain text
+            return self._translate_runs(segments, separators, translations, joiner)
+        return join_segments([translations[segment] for segment in segments], separators)
+
+    async def _translate_segments_async(self, text: str, listener: Callable = None) -> str:
+        segments, separators = split_segments(text)
+        translations, missing = self._lookup_segments(segments)
+        joiner, positions = self._start_joiner(segments, separators, translations, listener)
+
+        async def translate(group: List[str]) -> Optional[List[str]]:
+            group_translations = await self._translate_group_async(group)
+            self._put_group(joiner, positions, group, group_translations)
+            return group_translations
+
+        groups = pack_segments(list(missing), self.chunk_limit)
+        translated = await asyncio.gather(*(translate(group) for group in groups))
+        self._learn(groups, translated, translations)
+        if any(segment not in translations for segment in missing):
+            return await self._translate_runs_async(segments, separators, translations, joiner)
+        return join_segments([translations[segment] for segment in segments], separators)
+
+    def _lookup_segments(self, segments: List[str]) -> Tuple[Dict[str, str], Dict[str, None]]:
+        """Returns the translations of the segments found in the cache and the segments missing, in order"""
+        translations: Dict[str, str] = {}
+        missing: Dict[str, None] = {}
+        for segment in segments:
+            if segment in translations or segment in missing:
+                continue
+            cached = self.cache.get(self.source, self.target, segment) if len(segment.strip()) > 0 else segment
+            if cached is None:
+                missing[segment] = None
+            else:
+                translations[segment] = cached
+        return translations, missing
+
+    @staticmethod
+    def _start_joiner(segments: List[str], separators: List[str], translations: Dict[str, str],
+                      listener: Optional[Callable]) -> Tuple[Optional[PrefixJoiner], Dict[str, List[int]]]:
+        """Returns the joiner that reports the progress of the segments and the positions of every segment"""
+        joiner = PrefixJoiner(separators, listener) if listener is not None and len(segments) > 1 else None
+        positions: Dict[str, List[int]] = {}
+        for index, segment in enumerate(segments):
+            positions.setdefault(segment, []).append(index)
+        if joiner is not None:
+            # the cached segments at the start of the text are shown before any request is answered
+            joiner.put({index: translations[segment] for index, segment in enumerate(segments)
+                        if segment in translations})
+        return joiner, positions
+
+    @staticmethod
+    def _put_group(joiner: Optional[PrefixJoiner], positions: Dict[str, List[int]], group: List[str],
+                   group_translations: Optional[List[str]]) -> None:
+        if joiner is not None and group_translations is not None:
+            joiner.put({index: translation if translation is not None else segment
+                        for segment, translation in zip(group, group_translations)
+                        for index in positions[segment]})
+
+    def _learn(self, groups: List[List[str]], translated: List[Optional[List[str]]],
+               translations: Dict[str, str]) -> None:
+        """Adds the translations of the groups to the ones of the text and stores them in the cache"""
+        learned: Dict[str, str] = {}
+        for group, group_translations in zip(groups, translated):
+            if group_translations is None:
+                continue
+            for segment, translation in zip(group, group_translations):
+                if translation is None:
+                    translations[segment] = segment
+                else:
+                    translations[segment] = translation
+                    learned[segment] = translation
+        self.cache.put_many(self.source, self.target, learned)
+
+    def _translate_group(self, segments: List[str]) -> Optional[List[str]]:
+        """
+            Sends several segments in a single request, one per line. Returns
+            None if the lines translated do not match the segments, or if the
+            segment is too long for a single request.
+        """
+        if len(segments) == 1 and len(segments[0]) > self.chunk_limit:
+            return None
+        return self._split_group(segments, self._translate_chunk("\n".join(segments)))
+
+    async def _translate_group_async(self, segments: List[str]) -> Optional[List[str]]:
+        if len(segments) == 1 and len(segments[0]) > self.chunk_limit:
+            return None
+        return self._split_group(segments, await self._translate_chunk_async("\n".join(segments)))
+
+    @staticmethod
+    def _split_group(segments: List[str], translated: Optional[str]) -> Optional[List[str]]:
+        if len(segments) == 1:
+            return [translated]
+        lines = translated.split("\n") if translated is not None else []
+        return lines if len(lines) == len(segments) else None
+
+    def _translate_runs(self, segments: List[str], separators: List[str], translations: Dict[str, str],
+                        joiner: Optional[PrefixJoiner]) -> str:
+        """
+            Rebuilds the text translating the runs of consecutive segments
+            left without translation as texts, with their own separators, so
+            they are sent in chunks instead of one request per segment.
+        """
+        runs = self._find_runs(segments, translations)
+
+        def translate(run: Tuple[int, int], parallel: bool = False) -> str:
+            start, end = run
+            translation = self._translate_text(join_segments(segments[start:end], separators[start:end - 1]),
+                                               parallel) or ""
+            self._put_run(joiner, run, translation)
+            return translation
+
+        if len(runs) == 1:
+            translated = [translate(runs[0], parallel=True)]
+        else:
+            translated = parallel_map(translate, runs)
+        return self._join_runs(segments, separators, translations, runs, translated)
+
+    async def _translate_runs_async(self, segments: List[str], separators: List[str], translations: Dict[str, str],
+                                    joiner: Optional[PrefixJoiner]) -> str:
+        runs = self._find_runs(segments, translations)
+
+        async def translate(run: Tuple[int, int]) -> str:
+            start, end = run
+            translation = await self._translate_text_async(join_segments(segments[start:end],
+                                                                         separators[start:end - 1])) or ""
+            self._put_run(joiner, run, translation)
+            return translation
+
+        translated = await asyncio.gather(*(translate(run) for run in runs))
+        return self._join_runs(segments, separators, translations, runs, list(translated))
+
+    @staticmethod
+    def _find_runs(segments: List[str], translations: Dict[str, str]) -> List[Tuple[int, int]]:
+        """Returns the start and end of every run of consecutive segments without translation"""
+        runs: List[Tuple[int, int]] = []
+        index = 0
+        while index < len(segments):
+            if segments[index] in translations:
+                index += 1
+                continue
+            end = index + 1
+            while end < len(segments) and segments[end] not in translations:
+                end += 1
+            runs.append((index, end))
+            index = end
+        return runs
+
+    @staticmethod
+    def _put_run(joiner: Optional[PrefixJoiner], run: Tuple[int, int], translation: str) -> None:
+        if joiner is not None:
+            start, end = run
+            joiner.put({index: translation if index == start else "" for index in range(start, end)})
+
+    @staticmethod
+    def _join_runs(segments: List[str], separators: List[str], translations: Dict[str, str],
+                   runs: List[Tuple[int, int]], translated: List[str]) -> str:
+        """Rebuilds the text from the translated segments and the translations of the runs"""
+        parts: List[str] = []
+        part_separators: List[str] = []
+        index = 0
+        for (start, end), translation in zip(runs + [(len(segments), len(segments))], translated + [None]):
+            for position in range(index, start):
+                if position > 0:
+                    part_separators.append(separators[position - 1])
+                parts.append(translations[segments[position]])
+            if translation is not None:
+                if start > 0:
+                    part_separators.append(separators[start - 1])
+                parts.append(translation)
+            index = end
+        return join_segments(parts, part_separators)
+
+
+def parallel_map(function: Callable, items: List) -> List:
+    """Applies the function to the items in the chunk pool, propagating the current job to the workers"""
+    futures = [chunk_pool.submit(copy_context().run, function, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def build_providers(source: str, target: str) -> List[Provider]:
+    """Builds the providers listed in the translator.providers setting, skipping the ones unable to take the pair"""
+    names = {code: name for name, code in GOOGLE_LANGUAGES_TO_CODES.items()}
+    providers: List[Provider] = []
+    for name in config.get_list("translator.providers") or [GOOGLE_BACKEND]:
+        try:
+            if name == GOOGLE_BACKEND:
+                providers.append(Provider(name, PooledGoogleTranslator(source=source, target=target)))
+            elif name == "mymemory":
+                # built once to validate the languages, MyMemory does not detect the source language
+                MyMemoryTranslator(source=names.get(source, source), target=names.get(target, target))
+                providers.append(Provider(name, FactoryTranslator(
+                    lambda: MyMemoryTranslator(source=names.get(source, source), target=names.get(target, target))),
+                    max_chars=500))
+            elif name == LOCAL_BACKEND:
+                providers.append(Provider(name, LocalTranslator(source, target)))
+            else:
+                logger.warning(f"Unknown translation provider: {name}")
+        except Exception as ex:
+            logger.error(ex)
+    return providers
+
+
+class TranslatorService:
+    """Keeps a single translator, and therefore a single HTTP session, per language pair"""
+
+    def __init__(self):
+        """Starts without translators, they are created on demand"""
+        super(TranslatorService, self).__init__()
+        self.__translators: Dict[Tuple[str, str, str], PlainTextTranslator] = {}
+        self.__lock = Lock()
+
+    def get(self, source: str, target: str, cache: TranslationCache = None,
+            backend: str = GOOGLE_BACKEND) -> PlainTextTranslator:
+        """
+            Returns the translator of the language pair and backend, reusing it
+            across monitors. The local backend is never cached, its lookups
+            are already cheaper than the cache.
+        """
+        with self.__lock:
+            translator = self.__translators.get((backend, source, target))
+            if translator is None:
+                if backend == LOCAL_BACKEND:
+                    translator = PlainTextTranslator(source, target, backend=LocalTranslator(source, target))
+                elif backend == ROUTING_BACKEND:
+                    routing = RoutingTranslator(build_providers(source, target),
+                                                hedge_delay=config.get_float("translator.hedge.delay"))
+                    translator = PlainTextTranslator(source, target, backend=routing, limiter=rate_limiter)
+                else:
+                    translator = PlainTextTranslator(source, target, limiter=rate_limiter)
+                self.__translators[(backend, source, target)] = translator
+            translator.cache = cache if backend != LOCAL_BACKEND else None
+            return translator
+
+    def close(self) -> None:
+        """Closes the sessions of every translator"""
+        with self.__lock:
+            for translator in self.__translators.values():
+                translator.close()
+            self.__translators.clear()
+
+
+translator_service = None
+if translator_service is None:
+    translator_service = TranslatorService()
+
+chunk_pool = None
+if chunk_pool is None:
+    chunk_pool = ThreadPoolExecutor(max_workers=config.get_int("translator.workers") or 4,
+                                    thread_name_prefix="translator")
+
+# Translates the same text into several target languages at once, apart from the chunk pool they wait on
+target_pool = None
+if target_pool is None:
+    target_pool = ThreadPoolExecutor(max_workers=config.get_int("translator.workers") or 4,
+                                     thread_name_prefix="target")
@@ -1,17 +1,25 @@
-from json import load
-from os import getcwd
-from os.path import isfile, join
-from typing import Dict
+from json import loads
+from os import getcwd, listdir
+from os.path import isdir, isfile, join
+from threading import Lock, Thread
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 import sys
 
-from PyQt5.QtCore import QUrl, Qt
-from PyQt5.QtGui import QDesktopServices, QIcon, QBitmap, QImage, QPixmap
-from requests import get
+from PyQt5.QtCore import QByteArray, QRect, QSize, QUrl, Qt
+from PyQt5.QtGui import QDesktopServices, QIcon, QIconEngine, QBitmap, QPainter, QPixmap
+from PyQt5.QtSvg import QSvgRenderer
+from PyQt5.QtWidgets import QApplication, QStyleOption
 
+from transclip.bundle import cached_resource_path, refresh_resources, resource_bundle
 from transclip.config import config
-from transclip.homedir import get_home_path, create_dir
+from transclip.homedir import get_home_path
+from transclip.lazy import LazyObject
 from transclip.logger import logger
 
+# Resources taken from the bundle because they are missing on the system, they can be refreshed from the network
+_missing_resources: Set[str] = set()
+_missing_lock = Lock()
+
 
 def browse(url: str):
     """
@@ -21,17 +29,6 @@ def browse(url: str):
     QDesktopServices.openUrl(QUrl(url))
 
 
-def load_remote_file(url: str):
-    file_path = join(create_dir("cache"), url.split("/")[-1])
-    if not isfile(file_path):
-        remote_file = open(file=file_path, mode="w", encoding="utf-8")
-        data = get(url)
-        remote_file.write(data.content.decode("utf-8"))
-        data.close()
-        remote_file.close()
-    return file_path
-
-
 def resources_path():
     to_database = config.get_string('transclip.resources.path')
     if '${CURRENT}' in to_database:
@@ -46,92 +43,302 @@ def resources_path():
     return to_database
 
 
+def read_resource(name: str) -> Optional[bytes]:
+    """
+        Returns the content of a resource given by its path inside the
+        resources folder, like styles/index.json. The resources folder comes
+        first, then the copies refreshed from the network and at last the
+        bundle shipped with the program, so a missing file never needs the
+        network.
+    """
+    for file_path in (join(resources_path(), *name.split("/")), cached_resource_path(name)):
+        if isfile(file_path):
+            with open(file_path, mode="rb") as resource:
+                return resource.read()
+    content = resource_bundle.get(name)
+    if content is not None:
+        logger.info(f"Resource taken from the bundle: {name}")
+        with _missing_lock:
+            _missing_resources.add(name)
+    return content
+
+
+def refresh_missing_resources():
+    """Downloads in the background the newer versions of the resources that were taken from the bundle"""
+    if config.get_bool("transclip.resources.refresh"):
+        with _missing_lock:
+            names = sorted(_missing_resources)
+        if len(names) > 0:
+            Thread(target=refresh_resources, args=(config.get("transclip.resources.url"), names),
+                   name="refresh", daemon=True).start()
+
+
+class ResourceCache:
+    """
+        Keeps the resources already read and the JSON files already parsed,
+        so the theme index, the stylesheets and the images are read once per
+        run however many widgets ask for them.
+    """
+
+    def __init__(self):
+        super(ResourceCache, self).__init__()
+        self.__lock = Lock()
+        self.__data: Dict[str, Optional[bytes]] = {}
+        self.__documents: Dict[str, object] = {}
+
+    def data(self, name: str) -> Optional[bytes]:
+        with self.__lock:
+            if name in self.__data:
+                return self.__data[name]
+        content = read_resource(name)
+        with self.__lock:
+            return self.__data.setdefault(name, content)
+
+    def json(self, name: str, default=None):
+        """Returns the parsed content of a JSON resource, it must not be modified since it is shared"""
+        with self.__lock:
+            if name in self.__documents:
+                document = self.__documents[name]
+                return document if document is not None else default
+        content = self.data(name)
+        document = None
+        if content is not None:
+            try:
+                document = loads(content.decode("utf-8"))
+            except Exception as ex:
+                logger.error(ex)
+        with self.__lock:
+            document = self.__documents.setdefault(name, document)
+        return document if document is not None else default
+
+    def preload(self, names: Iterable[str]) -> Thread:
+        """Reads the resources given in a background thread, the next requests for them do not touch the disk"""
+        thread = Thread(target=lambda: [self.data(name) for name in names], name="resources", daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__data.clear()
+            self.__documents.clear()
+
+
 def load_style(function):
     style_name = config.get("transclip.theme")
     if style_name is not None and style_name != 'System default':
-        theme_list = join(resources_path(), "styles", "index.json")
-        themes = {}
-        if isfile(theme_list):
-            with open(theme_list, mode="r", encoding="utf-8") as theme_file:
-                themes = load(theme_file)
+        themes = resource_cache.json("styles/index.json", {})
         if style_name in themes:
-            style = join(resources_path(), "styles", themes[style_name])
-            if isfile(style):
-                with open(style, mode="r", encoding="utf-8") as stylesheet:
-                    function(stylesheet.read())
-                logger.info(f"Stylesheet found in: {style}")
+            style = resource_cache.data(f"styles/{themes[style_name]}")
+            if style is not None:
+                function(style.decode("utf-8"))
+                logger.info(f"Stylesheet loaded: {themes[style_name]}")
         else:
             logger.warn("Stylesheet not found for" + style_name + " theme")
     else:
         logger.warn("Loading default system style")
 
 
+class SvgIconEngine(QIconEngine):
+    """
+        Renders an icon from the content of an SVG file for each size shown,
+        so the icons created from memory stay as sharp as the ones created
+        from a file name.
+    """
+
+    def __init__(self, data: bytes):
+        super(SvgIconEngine, self).__init__()
+        self.data = data
+        self.renderer = QSvgRenderer(QByteArray(data))
+        self.__pixmaps: Dict[tuple, QPixmap] = {}
+
+    def is_valid(self) -> bool:
+        return self.renderer.isValid()
+
+    def paint(self, painter: QPainter, rect: QRect, mode: QIcon.Mode, state: QIcon.State):
+        painter.drawPixmap(rect, self.pixmap(rect.size(), mode, state))
+
+    def pixmap(self, size: QSize, mode: QIcon.Mode, state: QIcon.State) -> QPixmap:
+        key = (size.width(), size.height(), mode)
+        pixmap = self.__pixmaps.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(size)
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            self.renderer.render(painter)
+            painter.end()
+            if mode != QIcon.Normal and QApplication.instance() is not None:
+                # the disabled and selected looks are the ones of the style, as for the icons read from a file
+                pixmap = QApplication.style().generatedIconPixmap(mode, pixmap, QStyleOption())
+            self.__pixmaps[key] = pixmap
+        return pixmap
+
+    def clone(self) -> QIconEngine:
+        return SvgIconEngine(self.data)
+
+
 class ImageLoader:
+    """
+        Creates the icons and images of the interface. Each one is created
+        once and shared by every widget that shows it, the SVG files are
+        listed once instead of checked one by one and their content comes
+        from the resource cache, which the preload fills in the background.
+    """
 
     def __init__(self):
         super(ImageLoader, self).__init__()
-        self.image_dir = join(resources_path(), "svg")
+        image_dir = join(resources_path(), "svg")
+        self.image_files: Set[str] = set(listdir(image_dir)) if isdir(image_dir) else set()
+        self.__images: Dict[tuple, object] = {}
 
     def load(self, name: str, function, object_type="icon"):
-        if self.image_dir is not None and isfile(join(self.image_dir, f"{name}.svg")):
-            file_name = join(self.image_dir, f"{name}.svg")
-            logger.info(f"Loading: {file_name}")
-            if object_type == "bitmap":
-                function(QBitmap(file_name))
-            elif object_type == "icon":
-                function(QIcon(file_name))
-            elif object_type == "image":
-                function(QImage(file_name))
+        image = self._get_image(name, object_type)
+        if image is not None:
+            function(image)
 
     def load_scaled_pixmap(self, name: str, width: int, height: int, function):
-        if self.image_dir is not None and isfile(join(self.image_dir, f"{name}.svg")):
-            file_name = join(self.image_dir, f"{name}.svg")
-            logger.info(f"Loading: {file_name}")
-            function(QPixmap(file_name).scaled(width, height, Qt.KeepAspectRatio))
+        key = (name, "pixmap", width, height)
+        pixmap = self.__images.get(key)
+        if pixmap is None:
+            source = self._get_image(name, "pixmap")
+            if source is None:
+                return
+            pixmap = self.__images[key] = source.scaled(width, height, Qt.KeepAspectRatio)
+        function(pixmap)
+
+    def preload(self) -> Thread:
+        """Reads every SVG file in the background, the images created later are rendered from memory"""
+        names = self.image_files if len(self.image_files) > 0 else resource_bundle.names("svg")
+        return resource_cache.preload(f"svg/{file_name}" for file_name in sorted(names))
+
+    def _get_image(self, name: str, object_type: str):
+        key = (name, object_type)
+        image = self.__images.get(key)
+        if image is None:
+            image = self._create_image(name, object_type)
+            if image is not None:
+                self.__images[key] = image
+        return image
+
+    def _create_image(self, name: str, object_type: str):
+        data = resource_cache.data(f"svg/{name}.svg")
+        if data is None:
+            return None
+        if object_type == "icon":
+            # the icon stays scalable, it is rendered for each size shown
+            engine = SvgIconEngine(data)
+            return QIcon(engine) if engine.is_valid() else None
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(data, "SVG"):
+            return None
+        if object_type == "bitmap":
+            return QBitmap(pixmap)
+        elif object_type == "image":
+            return pixmap.toImage()
+        return pixmap
+
+
+class StringTable:
+    """
+        Immutable texts of a dictionary stored by message id. The ids come
+        from the keys of the reference dictionary, so a key has the same id
+        in every language and the keys missing in a translation keep their
+        reference text.
+    """
+
+    def __init__(self, dictionary: Dict[str, str], reference: Optional["StringTable"] = None):
+        ids: Dict[str, int] = dict(reference.ids) if reference is not None else {}
+        messages: List[str] = list(reference.messages) if reference is not None else []
+        for key, text in dictionary.items():
+            if key not in ids:
+                ids[sys.intern(key)] = len(messages)
+                messages.append("")
+            messages[ids[key]] = sys.intern(str(text))
+        self.ids = ids
+        self.messages: Tuple[str, ...] = tuple(messages)
+
+    def text(self, key: str) -> Optional[str]:
+        message_id = self.ids.get(key)
+        return self.messages[message_id] if message_id is not None else None
+
+
+# Most labels kept formatted by the locale, the status bar shows a handful of values at a time
+LABEL_CACHE_SIZE = 1024
 
 
 class LocaleUtil:
+    """
+        Provides the texts of the interface in the configured language. The
+        dictionary is compiled into a string table when it is loaded and
+        replaced when the language setting changes, the widgets subscribed
+        show their texts again without restarting the program.
+    """
 
     def __init__(self):
-        self.dictionary = None
         self.available_locales = self.list_locales()
-        file_path = join(resources_path(), "locales", self._get_safe_locale())
-        if isfile(file_path):
-            logger.info(f"Dictionary found in: {file_path}")
-            file = open(file_path, mode="r", encoding="utf-8")
-            self.dictionary = load(file)
-            file.close()
-        else:
-            file_path = load_remote_file(f"https://raw.githubusercontent.com/jhondevcode/Transclip-qt/master/src"
-                                         f"/resources/locales/{self._get_safe_locale()}")
-            logger.info(f"Dictionary downloaded from: {file_path}")
-            file = open(file=file_path, mode="r", encoding="utf-8")
+        self.reference = StringTable(resource_cache.json("locales/en.json", {}))
+        self.table = self.reference
+        self.__labels: Dict[tuple, str] = {}
+        self.__listeners: List[Callable[[], None]] = []
+        self.switch(config.get("transclip.locale"))
+        config.subscribe("transclip.locale", self.switch)
+
+    def switch(self, name: str) -> None:
+        """Loads the dictionary of the language given and asks the subscribed widgets to show their texts again"""
+        file_name = self.available_locales[name] if name in self.available_locales else "en.json"
+        dictionary = resource_cache.json(f"locales/{file_name}") if file_name != "en.json" else None
+        self.table = StringTable(dictionary, self.reference) if dictionary is not None else self.reference
+        self.__labels = {}
+        logger.info(f"Dictionary loaded: {file_name}")
+        for listener in list(self.__listeners):
             try:
-                self.dictionary = load(file)
-            except Exception as err:
-                logger.error(err)
-            file.close()
+                listener()
+            except Exception as ex:
+                logger.error(ex)
+
+    def subscribe(self, listener: Callable[[], None]) -> None:
+        """Registers a function called after the language changes"""
+        self.__listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[], None]) -> None:
+        if listener in self.__listeners:
+            self.__listeners.remove(listener)
+
+    def message_id(self, key: str) -> int:
+        """Returns the id of a key, it does not change when the language does"""
+        return self.reference.ids.get(key, -1)
+
+    def message(self, message_id: int) -> str:
+        messages = self.table.messages
+        return messages[message_id] if 0 <= message_id < len(messages) else "unknown"
 
     def value(self, key: str) -> str:
-        return self.dictionary[key] if self.dictionary is not None and key in self.dictionary else "unknown"
+        text = self.table.text(key)
+        return text if text is not None else "unknown"
+
+    def label(self, key: str, value) -> str:
+        """Returns the text of the key followed by the value given, the labels already built are reused"""
+        labels = self.__labels
+        # 1 and 1.0 are equal keys but different labels
+        label_key = (key, type(value), value)
+        text = labels.get(label_key)
+        if text is None:
+            if len(labels) >= LABEL_CACHE_SIZE:
+                labels.clear()
+            text = labels[label_key] = f"{self.value(key)}: {value}"
+        return text
 
     def list_locales(self) -> Dict[str, str]:
-        list_file = join(resources_path(), "locales", "index.json")
-        locale_dict = {}
-        if isfile(list_file):
-            with open(list_file, mode="r", encoding="utf-8") as data_list:
-                locale_dict = load(data_list)
-        return locale_dict
+        return resource_cache.json("locales/index.json", {})
 
-    def _get_safe_locale(self):
-        config_locale = config.get('transclip.locale')
-        return self.available_locales[config_locale] if config_locale in self.available_locales else "en.json"
 
+resource_cache = None
+if resource_cache is None:
+    resource_cache = ResourceCache()
 
 svg_loader = None
 if svg_loader is None:
-    svg_loader = ImageLoader()
+    svg_loader = LazyObject(ImageLoader)
 
 locale = None
 if locale is None:
-    locale = LocaleUtil()
+    locale = LazyObject(LocaleUtil)
@@ -1,20 +1,22 @@
 from mimetypes import guess_type
 from os import listdir, remove
 from os.path import isfile, join
-from typing import List
+from typing import Dict, List, Tuple
 
 from PyQt5.QtGui import QCloseEvent
 from PyQt5.QtWidgets import QApplication, QMainWindow, QMenuBar, QMessageBox
 from PyQt5.QtWidgets import QHBoxLayout, QVBoxLayout
-from PyQt5.QtWidgets import QTextEdit, QLabel, QWidget, QFileDialog
+from PyQt5.QtWidgets import QLabel, QWidget, QFileDialog, QTabWidget
 
 from transclip.clipboard import clear, copy
 from transclip.config import config
 from transclip.constant import PROGRAM_NAME, PROGRAM_VERSION, PROGRAM_URL
 from transclip.dialog import show_text_dialog, show_question_dialog, show_info_dialog, show_error_dialog, show_about_dialog
+from transclip.dialog import show_history_dialog
 from transclip.impl import Requester
 from transclip.logger import logger, LOG_DIR, log_file, log_file_name
 from transclip.settings import show_settings_dialog
+from transclip.textpane import ProgressiveText, create_text_pane
 from transclip.util import browse, locale, svg_loader
 
 
@@ -25,7 +27,12 @@ class MainWindow(QMainWindow, Requester):
         Requester.__init__(self)
         self.monitor = None
         self.app_loop = app
+        self.network_state = 4
         self.init_window()
+        locale.subscribe(self.retranslate)
+        # the tabs follow the languages saved in the settings, as the monitor does
+        config.subscribe("translator.target", self.rebuild_targets)
+        config.subscribe("translator.targets", self.rebuild_targets)
 
     def init_window(self):
         self.setWindowTitle(f"{PROGRAM_NAME} {PROGRAM_VERSION}")
@@ -58,26 +65,85 @@ class MainWindow(QMainWindow, Requester):
         self.central_layout = QVBoxLayout()
         self.central_widget.setLayout(self.central_layout)
         self.source_text_edit = None
-        if config.get("editext.source.view") == "True":
-            self.source_text_edit = QTextEdit()
+        if config.get_bool("editext.source.view"):
+            self.source_text_edit = create_text_pane()
             self.central_layout.addWidget(self.source_text_edit)
-        self.target_text_edit = QTextEdit()
-        self.central_layout.addWidget(self.target_text_edit)
+        self.target_text_edit = create_text_pane()
+        # the parts of the translation in progress already shown in the target pane
+        self.target_parts: List[str] = []
+        self.target_text_edits: Dict[str, ProgressiveText] = {}
+        self.target_tabs = None
+        self.rebuild_targets()
+
+    def rebuild_targets(self, _value=None):
+        """
+            Places the target panes after the source one: the main target
+            alone, or a tab for it and each additional language. The panes of
+            the languages kept are reused along with their texts.
+        """
+        targets = [language for language in config.get_list("translator.targets")
+                   if language != config.get("translator.target")]
+        kept: Dict[str, ProgressiveText] = {}
+        if self.target_tabs is not None:
+            for pane in [self.target_text_edit] + list(self.target_text_edits.values()):
+                self.target_tabs.removeTab(self.target_tabs.indexOf(pane))
+                pane.setParent(None)
+            self.central_layout.removeWidget(self.target_tabs)
+            self.target_tabs.deleteLater()
+            self.target_tabs = None
+            kept = {language: pane for language, pane in self.target_text_edits.items() if language in targets}
+        else:
+            self.central_layout.removeWidget(self.target_text_edit)
+        for language, pane in self.target_text_edits.items():
+            if language not in kept:
+                pane.deleteLater()
+        self.target_text_edits = {}
+        position = 1 if self.source_text_edit is not None else 0
+        if len(targets) > 0:
+            # each additional language gets its own tab next to the main target
+            self.target_tabs = QTabWidget()
+            self.target_tabs.addTab(self.target_text_edit, config.get("translator.target"))
+            for language in targets:
+                self.target_text_edits[language] = kept.get(language) or create_text_pane()
+                self.target_tabs.addTab(self.target_text_edits[language], language)
+            self.central_layout.insertWidget(position, self.target_tabs)
+        else:
+            self.central_layout.insertWidget(position, self.target_text_edit)
+            # taken out of the tabs, the pane is hidden until it is shown again
+            self.target_text_edit.show()
 
     def init_status_bar(self):
         self.state_bar = StateBar()
         self.central_layout.addLayout(self.state_bar)
-        self.state_bar.set_state(locale.value("STATE_LABEL_OFF"))
+        self.set_network_state(self.network_state)
         self.state_bar.set_source(config.get("translator.source"))
         self.state_bar.set_target(config.get("translator.target"))
         self.state_bar.set_words(0)
-        self.state_bar.set_delay(float(config.get("monitor.interval")))
+        self.state_bar.set_delay(config.get_float("monitor.interval"))
+        self.state_bar.set_avoided(0)
+        self.state_bar.set_skipped(0)
+        self.state_bar.set_same_language(0)
+        self.state_bar.set_budget(config.get_float("translator.burst"), config.get_float("translator.rate"))
+        self.state_bar.set_progress(0, 0)
+
+    def retranslate(self):
+        """Shows the texts of the window again after the language changes"""
+        self.menu_bar.retranslate()
+        self.state_bar.retranslate()
+        self.set_network_state(self.network_state)
 
     def closeEvent(self, event: QCloseEvent) -> None:
         quit_message = show_question_dialog(self, locale.value("EXIT_DIALOG_TITLE"),
                                             locale.value("EXIT_DIALOG_MESSAGE"))
         if quit_message == QMessageBox.StandardButton.Yes:
             self.stop_monitor()
+            if self.monitor is not None:
+                from transclip.translation import translator_service
+                translator_service.close()
+                from transclip.cache import translation_cache
+                translation_cache.flush()
+                from transclip.history import clipboard_history
+                clipboard_history.close()
             event.accept()
         else:
             event.ignore()
@@ -85,18 +151,54 @@ class MainWindow(QMainWindow, Requester):
     # @pyqtSlot(str)
     def set_source_text(self, text: str):
         if self.source_text_edit is not None:
-            self.source_text_edit.setPlainText(text)
+            self.source_text_edit.set_text(text)
 
     # @pyqtSlot(str)
     def set_target_text(self, text: str):
-        self.target_text_edit.setPlainText(text)
+        if len(self.target_parts) == 0 or "".join(self.target_parts) != text:
+            self.target_text_edit.set_text(text)
+            self.state_bar.set_progress(0, 0)
+        self.target_parts = []
+
+    # @pyqtSlot(int, int, str)
+    def add_target_part(self, complete: int, total: int, text: str):
+        """Shows the next part of the translation in progress, the first one replaces the placeholder"""
+        if len(self.target_parts) == 0:
+            self.target_text_edit.set_text(text)
+        else:
+            self.target_text_edit.append_text(text)
+        self.target_parts.append(text)
+        self.state_bar.set_progress(complete, total)
+
+    # @pyqtSlot(dict)
+    def set_targets_text(self, translations: Dict[str, str]):
+        for language, text in translations.items():
+            if language in self.target_text_edits:
+                self.target_text_edits[language].set_text(text)
 
     # @pyqtSlot(int)
     def set_words_counter(self, words: int):
         self.state_bar.set_words(words)
 
+    # @pyqtSlot(int)
+    def set_avoided_counter(self, avoided: int):
+        self.state_bar.set_avoided(avoided)
+
+    # @pyqtSlot(int)
+    def set_skipped_counter(self, skipped: int):
+        self.state_bar.set_skipped(skipped)
+
+    # @pyqtSlot(int)
+    def set_same_language_counter(self, same_language: int):
+        self.state_bar.set_same_language(same_language)
+
+    # @pyqtSlot(float, float)
+    def set_budget_counter(self, tokens: float, rate: float):
+        self.state_bar.set_budget(tokens, rate)
+
     def set_network_state(self, state: int):
         """1 -> connecting, 2 -> connected, 3 -> disconnecting, 4 -> disconnected, 5 -> bad network"""
+        self.network_state = state
         if state == -1:
             self.state_bar.set_state(locale.value("STATE_LABEL_FAILED"))
         elif state == 1:
@@ -140,11 +242,17 @@ class MainWindow(QMainWindow, Requester):
 
     def start_monitor(self):
         try:
-            from monitor import Monitor
-            self.monitor = Monitor(self)
+            from transclip.pipeline import create_monitor
+            self.monitor = create_monitor(self)
             self.monitor.source.connect(self.set_source_text)
             self.monitor.target.connect(self.set_target_text)
+            self.monitor.targets.connect(self.set_targets_text)
             self.monitor.words.connect(self.set_words_counter)
+            self.monitor.avoided.connect(self.set_avoided_counter)
+            self.monitor.skipped.connect(self.set_skipped_counter)
+            self.monitor.same_language.connect(self.set_same_language_counter)
+            self.monitor.budget.connect(self.set_budget_counter)
+            self.monitor.progress.connect(self.add_target_part)
             logger.info("Starting monitor...")
             self.monitor.start_monitoring()
         except Exception as ex:
@@ -224,6 +332,8 @@ class MenuBar(QMenuBar):
         svg_loader.load("clipboard", self.clipboard_menu.setIcon)
 
         self.clipboard_history_action = self.clipboard_menu.addAction(locale.value("MENU_BAR_TOOLS_CLIPBOARD_HISTORY"))
+        self.clipboard_history_action.setShortcut("Ctrl+Shift+Y")
+        self.clipboard_history_action.triggered.connect(lambda: show_history_dialog(self.parent))
 
         self.clipboard_clear_action = self.clipboard_menu.addAction(locale.value("MENU_BAR_TOOLS_CLIPBOARD_CLEAR"))
         self.clipboard_clear_action.triggered.connect(clear)
@@ -250,6 +360,29 @@ class MenuBar(QMenuBar):
         self.about_action.setShortcut("Ctrl+Shift+A")
         self.about_action.triggered.connect(lambda: show_about_dialog(self.parent))
 
+    def retranslate(self):
+        """Shows the menus again in the current language"""
+        self.file_menu.setTitle(locale.value("MENU_BAR_FILE"))
+        self.open_action.setText(locale.value("MENU_BAR_FILE_OPEN"))
+        self.save_action.setText(locale.value("MENU_BAR_FILE_SAVE"))
+        self.exit_action.setText(locale.value("MENU_BAR_FILE_EXIT"))
+        self.run_menu.setTitle(locale.value("MENU_BAR_RUN"))
+        self.start_monitor_action.setText(locale.value("MENU_BAR_RUN_START_MONITOR"))
+        self.stop_monitor_action.setText(locale.value("MENU_BAR_RUN_STOP_MONITOR"))
+        self.tools_menu.setTitle(locale.value("MENU_BAR_TOOLS"))
+        self.logs_menu.setTitle(locale.value("MENU_BAR_TOOLS_LOGS"))
+        self.show_log_action.setText(locale.value("MENU_BAR_TOOLS_LOGS_SHOW"))
+        self.open_logdir_action.setText(locale.value("MENU_BAR_TOOLS_LOGS_DIR"))
+        self.clear_logs_action.setText(locale.value("MENU_BAR_TOOLS_LOGS_CLEAR"))
+        self.clipboard_menu.setTitle(locale.value("MENU_BAR_TOOLS_CLIPBOARD"))
+        self.clipboard_history_action.setText(locale.value("MENU_BAR_TOOLS_CLIPBOARD_HISTORY"))
+        self.clipboard_clear_action.setText(locale.value("MENU_BAR_TOOLS_CLIPBOARD_CLEAR"))
+        self.setting_action.setText(locale.value("MENU_BAR_TOOLS_SETTINGS"))
+        self.help_menu.setTitle(locale.value("MENU_BAR_HELP"))
+        self.help_action.setText(locale.value("MENU_BAR_HELP"))
+        self.github_action.setText(locale.value("MENU_BAR_HELP_GITHUB"))
+        self.about_action.setText(locale.value("MENU_BAR_HELP_ABOUT"))
+
     def read_text_file(self):
         text_file = QFileDialog.getOpenFileName(None, "Open text file", filter="txt (*.txt);; All files (*.*)")
         if len(text_file) > 0:
@@ -286,7 +419,12 @@ class StateBar(QHBoxLayout):
 
     def __init__(self):
         super(StateBar, self).__init__()
+        # the key and the value shown by each label, to show them again when the language changes
+        self.__values: Dict[QLabel, Tuple[str, object]] = {}
         self.load_ui()
+        config.subscribe("translator.source", self.set_source)
+        config.subscribe("translator.target", self.set_target)
+        config.subscribe("monitor.interval", self.set_delay)
 
     def load_ui(self):
         self.state_label = QLabel()
@@ -304,17 +442,56 @@ class StateBar(QHBoxLayout):
         self.delay_label = QLabel()
         self.addWidget(self.delay_label)
 
+        self.avoided_label = QLabel()
+        self.addWidget(self.avoided_label)
+
+        self.skipped_label = QLabel()
+        self.addWidget(self.skipped_label)
+
+        self.same_language_label = QLabel()
+        self.addWidget(self.same_language_label)
+
+        self.budget_label = QLabel()
+        self.addWidget(self.budget_label)
+
+        self.progress_label = QLabel()
+        self.addWidget(self.progress_label)
+
     def set_state(self, state: str):
-        self.state_label.setText(f'{locale.value("STATE_LABEL_TEXT")}: {state}')
+        self._show(self.state_label, "STATE_LABEL_TEXT", state)
 
     def set_source(self, source: str):
-        self.source_label.setText(f'{locale.value("SOURCE_LABEL_TEXT")}: {source}')
+        self._show(self.source_label, "SOURCE_LABEL_TEXT", source)
 
     def set_target(self, target: str):
-        self.target_label.setText(f'{locale.value("TARGET_LABEL_TEXT")}: {target}')
+        self._show(self.target_label, "TARGET_LABEL_TEXT", target)
 
     def set_words(self, words: int):
-        self.words_label.setText(f'{locale.value("WORDS_LABEL_TEXT")}: {words}')
+        self._show(self.words_label, "WORDS_LABEL_TEXT", words)
 
     def set_delay(self, delay: float):
-        self.delay_label.setText(f'{locale.value("DELAY_LABEL_TEXT")}: {delay}')
+        self._show(self.delay_label, "DELAY_LABEL_TEXT", delay)
+
+    def set_avoided(self, avoided: int):
+        self._show(self.avoided_label, "AVOIDED_LABEL_TEXT", avoided)
+
+    def set_skipped(self, skipped: int):
+        self._show(self.skipped_label, "SKIPPED_LABEL_TEXT", skipped)
+
+    def set_same_language(self, same_language: int):
+        self._show(self.same_language_label, "SAME_LANGUAGE_LABEL_TEXT", same_language)
+
+    def set_budget(self, tokens: float, rate: float):
+        self._show(self.budget_label, "BUDGET_LABEL_TEXT", f"{max(int(tokens), 0)} ({rate:.1f}/s)")
+
+    def set_progress(self, complete: int, total: int):
+        self._show(self.progress_label, "PROGRESS_LABEL_TEXT", f"{complete}/{total}" if total > 0 else "-")
+
+    def retranslate(self):
+        """Shows the labels again in the current language"""
+        for label, (key, value) in self.__values.items():
+            label.setText(locale.label(key, value))
+
+    def _show(self, label: QLabel, key: str, value):
+        self.__values[label] = (key, value)
+        label.setText(locale.label(key, value))